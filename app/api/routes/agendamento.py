@@ -5,27 +5,75 @@ Rotas da API para agendamentos.
 from typing import List
 from datetime import datetime, date
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from loguru import logger
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.database.manager import get_db
+from app.database.executor_banco import executor_banco
+from app.database.manager import SessaoBanco, get_db, get_db_async, get_db_leitura_async
 from app.schemas.schemas import (
     Agendamento,
     AgendamentoCreate,
+    AgendamentoLoteCreate,
+    AgendamentoLoteResponse,
+    ResultadoItemLote,
+    AusenciaMedicoRequest,
+    ResumoAusenciaMedico,
     AgendamentoUpdate,
     AgendamentoReagendar,
     AgendamentoCancelar,
     StatusAgendamento,
 )
-from app.services.agendamento_service import AgendamentoService
+from app.services.agendamento_service import (
+    AgendamentoService,
+    AgendamentoServiceAsync,
+    ConflitoVersaoAgendamento,
+    ResultadoDisponibilidade,
+    TransicaoStatusInvalida,
+)
+from app.services.ausencia_medico_service import AusenciaMedicoService
 
 router = APIRouter(prefix="/agendamentos", tags=["agendamentos"])
 
 
+def _erro_validacao_horario(validacao: ResultadoDisponibilidade, acao: str) -> HTTPException:
+    """Converte a recusa de um horário em erro HTTP: 409 se ocupado, 400 nos demais casos."""
+    if validacao.conflito:
+        detalhe = f"{acao}: {validacao.descricao}."
+        if validacao.agendamento_conflitante_id is not None:
+            detalhe = f"{acao}: {validacao.descricao} (agendamento {validacao.agendamento_conflitante_id})."
+        return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detalhe)
+
+    detalhe = f"{acao}: {validacao.descricao}"
+    if validacao.limite is not None:
+        detalhe += f" (limite: {validacao.limite.strftime('%d/%m/%Y %H:%M')})"
+    elif validacao.periodos:
+        periodos = ", ".join(
+            f"{inicio.strftime('%H:%M')}-{fim.strftime('%H:%M')}" for inicio, fim in validacao.periodos
+        )
+        detalhe += f" (atendimento: {periodos})"
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{detalhe}.")
+
+
+def _erro_transicao_status(erro: TransicaoStatusInvalida) -> HTTPException:
+    """Converte uma transição de status não permitida em erro 409."""
+    logger.warning(
+        f"[AGENDAMENTO] Transição de status não permitida | agendamento_id={erro.agendamento_id} | "
+        f"status_atual={erro.status_atual.value} | status_novo={erro.status_novo.value}"
+    )
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=(
+            f"Agendamento está {erro.status_atual.value} e não pode passar para "
+            f"{erro.status_novo.value}."
+        ),
+    )
+
+
 @router.post("", response_model=Agendamento, status_code=status.HTTP_201_CREATED)
 async def criar_agendamento(
-    agendamento: AgendamentoCreate, db: Session = Depends(get_db)
+    agendamento: AgendamentoCreate, db: SessaoBanco = Depends(get_db_async)
 ):
     """Cria um novo agendamento."""
     dados = agendamento.model_dump()
@@ -35,15 +83,20 @@ async def criar_agendamento(
     )
     
     try:
-        service = AgendamentoService(db)
-        agendamento_criado = service.criar_agendamento(dados)
+        service = AgendamentoServiceAsync(db)
+        agendamento_criado = await service.criar_agendamento(dados)
 
         if not agendamento_criado:
+            validacao = service.ultima_validacao
+            # Uma recusa é falsa (ResultadoDisponibilidade.__bool__): testa o motivo
+            recusado = validacao is not None and validacao.motivo is not None
             logger.warning(
                 f"[AGENDAMENTO] Falha ao criar agendamento | paciente_id={dados.get('paciente_id')} | "
                 f"medico_id={dados.get('medico_id')} | data_hora={dados.get('data_hora')} | "
-                f"motivo=Horário indisponível ou validação falhou"
+                f"motivo={validacao.motivo.value if recusado else 'Horário indisponível ou validação falhou'}"
             )
+            if recusado:
+                raise _erro_validacao_horario(validacao, "Não foi possível criar o agendamento")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Não foi possível criar o agendamento. Verifique a disponibilidade do horário.",
@@ -69,6 +122,114 @@ async def criar_agendamento(
         )
 
 
+@router.post("/lote", response_model=AgendamentoLoteResponse)
+async def criar_agendamentos_lote(
+    lote: AgendamentoLoteCreate, db: SessaoBanco = Depends(get_db_async)
+):
+    """
+    Cria vários agendamentos (ex.: série recorrente ou importação) em uma única transação.
+
+    Cada item é validado com as mesmas regras da criação individual e o
+    resultado é informado por item. Com tudo_ou_nada=True, nenhum agendamento
+    é criado se algum item for rejeitado.
+    """
+    itens = [agendamento.model_dump() for agendamento in lote.agendamentos]
+    logger.info(
+        f"[AGENDAMENTO] Requisição para criar agendamentos em lote | itens={len(itens)} | "
+        f"tudo_ou_nada={lote.tudo_ou_nada}"
+    )
+
+    try:
+        service = AgendamentoServiceAsync(db)
+        resultados = await service.criar_agendamentos_lote(itens, tudo_ou_nada=lote.tudo_ou_nada)
+
+        criados = sum(1 for resultado in resultados if resultado["sucesso"])
+        logger.success(
+            f"[AGENDAMENTO] Lote processado | itens={len(itens)} | criados={criados} | "
+            f"rejeitados={len(itens) - criados}"
+        )
+        return AgendamentoLoteResponse(
+            resultados=[ResultadoItemLote(**resultado) for resultado in resultados],
+            total=len(resultados),
+            criados=criados,
+            rejeitados=len(resultados) - criados,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(
+            f"[AGENDAMENTO] Erro ao criar agendamentos em lote | itens={len(itens)} | erro={str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao criar agendamentos em lote",
+        )
+
+
+@router.post("/ausencia-medico", response_model=ResumoAusenciaMedico)
+async def tratar_ausencia_medico(
+    ausencia: AusenciaMedicoRequest, db: Session = Depends(get_db)
+):
+    """
+    Cancela ou redistribui os agendamentos de um médico ausente no período.
+
+    Ações:
+    - cancelar: cancela todos os agendamentos ativos do período
+    - reagendar: move cada agendamento para o próximo horário livre do mesmo médico após o período
+    - transferir: move cada agendamento para o primeiro horário livre de outro médico da mesma
+      especialidade, mantendo o horário original sempre que possível
+
+    Agendamentos sem horário livre não são alterados e aparecem no resumo como sem_horario.
+    """
+    logger.info(
+        f"[AGENDAMENTO] Requisição para tratar ausência de médico | medico_id={ausencia.medico_id} | "
+        f"periodo={ausencia.data_inicio} a {ausencia.data_fim} | acao={ausencia.acao.value}"
+    )
+
+    if ausencia.data_fim < ausencia.data_inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="data_fim deve ser igual ou posterior a data_inicio",
+        )
+
+    try:
+        service = AusenciaMedicoService(db)
+        resumo = await executor_banco.executar(
+            service.processar,
+            ausencia.medico_id,
+            ausencia.data_inicio,
+            ausencia.data_fim,
+            ausencia.acao,
+            ausencia.motivo,
+        )
+
+        if resumo is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Médico não encontrado",
+            )
+
+        logger.success(
+            f"[AGENDAMENTO] Ausência de médico tratada | medico_id={ausencia.medico_id} | "
+            f"total={resumo['total']} | cancelados={resumo['cancelados']} | "
+            f"reagendados={resumo['reagendados']} | sem_horario={resumo['sem_horario']}"
+        )
+        return ResumoAusenciaMedico(**resumo)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(
+            f"[AGENDAMENTO] Erro ao tratar ausência de médico | medico_id={ausencia.medico_id} | "
+            f"erro={str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao tratar ausência do médico",
+        )
+
+
 @router.get("", response_model=List[Agendamento])
 async def listar_agendamentos(
     skip: int = 0,
@@ -76,7 +237,7 @@ async def listar_agendamentos(
     medico_id: int = None,
     paciente_id: int = None,
     status: StatusAgendamento = None,
-    db: Session = Depends(get_db),
+    db: SessaoBanco = Depends(get_db_leitura_async),
 ):
     """Lista agendamentos com filtros opcionais."""
     logger.info(
@@ -85,8 +246,8 @@ async def listar_agendamentos(
     )
     
     try:
-        service = AgendamentoService(db)
-        agendamentos = service.listar_agendamentos(
+        service = AgendamentoServiceAsync(db)
+        agendamentos = await service.listar_agendamentos(
             skip=skip,
             limit=limit,
             medico_id=medico_id,
@@ -100,6 +261,8 @@ async def listar_agendamentos(
         )
         return agendamentos
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(
             f"[AGENDAMENTO] Erro ao listar agendamentos | skip={skip} | limit={limit} | erro={str(e)}"
@@ -111,13 +274,15 @@ async def listar_agendamentos(
 
 
 @router.get("/{agendamento_id}", response_model=Agendamento)
-async def buscar_agendamento(agendamento_id: int, db: Session = Depends(get_db)):
+async def buscar_agendamento(
+    agendamento_id: int, db: SessaoBanco = Depends(get_db_async)
+):
     """Busca um agendamento por ID."""
     logger.debug(f"[AGENDAMENTO] Requisição para buscar agendamento | agendamento_id={agendamento_id}")
     
     try:
-        service = AgendamentoService(db)
-        agendamento = service.buscar_agendamento(agendamento_id)
+        service = AgendamentoServiceAsync(db)
+        agendamento = await service.buscar_agendamento(agendamento_id)
 
         if not agendamento:
             logger.warning(f"[AGENDAMENTO] Agendamento não encontrado | agendamento_id={agendamento_id}")
@@ -151,81 +316,132 @@ async def atualizar_agendamento(
     agendamento_update: AgendamentoUpdate,
     db: Session = Depends(get_db),
 ):
-    """Atualiza um agendamento."""
+    """
+    Atualiza um agendamento.
+
+    Mudanças de status seguem as mesmas regras de /confirmar, /cancelar,
+    /concluir e /falta (409 se o status atual não permite a transição). A
+    data/hora não é alterada por esta rota (422): use /reagendar, que valida
+    o novo horário e trava a agenda do médico. A atualização roda no executor
+    do banco, sem bloquear o event loop.
+    """
     dados_update = agendamento_update.model_dump(exclude_unset=True)
+    versao_esperada = dados_update.pop("versao", None)
     campos_atualizar = list(dados_update.keys())
+    novo_status = dados_update.pop("status", None)
     
     logger.info(
         f"[AGENDAMENTO] Requisição para atualizar agendamento | agendamento_id={agendamento_id} | "
         f"campos={campos_atualizar}"
     )
     
-    try:
-        service = AgendamentoService(db)
-        agendamento = service.buscar_agendamento(agendamento_id)
-
-        if not agendamento:
+    def executar():
+        try:
+            service = AgendamentoService(db)
+            agendamento = service.buscar_agendamento(agendamento_id)
+
+            if not agendamento:
+                logger.warning(
+                    f"[AGENDAMENTO] Agendamento não encontrado para atualização | agendamento_id={agendamento_id}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Agendamento não encontrado",
+                )
+
+            service.verificar_versao(agendamento, versao_esperada)
+
+            # Armazena valores antigos para log
+            valores_antigos = {
+                "status": agendamento.status.value,
+                "observacoes": agendamento.observacoes,
+            }
+
+            if "data_hora" in dados_update:
+                logger.warning(
+                    f"[AGENDAMENTO] Data/hora enviada na atualização | agendamento_id={agendamento_id}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="A data/hora não pode ser alterada nesta rota. Use /reagendar para mudar o horário.",
+                )
+
+            # Atualiza campos
+            if novo_status is not None:
+                # Transição de status com as regras das rotas dedicadas; as
+                # observações vão no mesmo UPDATE
+                agendamento = service.alterar_status(
+                    agendamento_id, novo_status, versao_esperada, dados_update
+                )
+                if not agendamento:
+                    logger.warning(
+                        f"[AGENDAMENTO] Agendamento não encontrado para atualização | agendamento_id={agendamento_id}"
+                    )
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Agendamento não encontrado",
+                    )
+            elif dados_update:
+                for key, value in dados_update.items():
+                    setattr(agendamento, key, value)
+
+                db.commit()
+                db.refresh(agendamento)
+
+            if campos_atualizar:
+                # Log das mudanças
+                mudancas = []
+                for campo in ["status", "observacoes"]:
+                    if campo in campos_atualizar:
+                        valor_antigo = valores_antigos.get(campo)
+                        valor_novo = getattr(agendamento, campo)
+                        if campo == "status":
+                            valor_novo = valor_novo.value if hasattr(valor_novo, 'value') else valor_novo
+                        if valor_antigo != valor_novo:
+                            mudancas.append(f"{campo}: {valor_antigo} -> {valor_novo}")
+
+                logger.success(
+                    f"[AGENDAMENTO] Agendamento atualizado com sucesso | agendamento_id={agendamento_id} | "
+                    f"mudancas={', '.join(mudancas) if mudancas else 'Nenhuma'}"
+                )
+            else:
+                logger.debug(f"[AGENDAMENTO] Nenhum campo para atualizar | agendamento_id={agendamento_id}")
+
+            return agendamento
+
+        except HTTPException:
+            raise
+        except (ConflitoVersaoAgendamento, StaleDataError):
+            db.rollback()
             logger.warning(
-                f"[AGENDAMENTO] Agendamento não encontrado para atualização | agendamento_id={agendamento_id}"
+                f"[AGENDAMENTO] Conflito de versão | agendamento_id={agendamento_id} | "
+                f"versao_esperada={versao_esperada}"
             )
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Agendamento não encontrado",
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Agendamento alterado por outra requisição. Recarregue e tente novamente.",
             )
-
-        # Armazena valores antigos para log
-        valores_antigos = {
-            "status": agendamento.status.value,
-            "observacoes": agendamento.observacoes,
-        }
-
-        # Atualiza campos
-        if dados_update:
-            for key, value in dados_update.items():
-                setattr(agendamento, key, value)
-
-            db.commit()
-            db.refresh(agendamento)
-            
-            # Log das mudanças
-            mudancas = []
-            for campo in ["status", "observacoes"]:
-                if campo in dados_update:
-                    valor_antigo = valores_antigos.get(campo)
-                    valor_novo = getattr(agendamento, campo)
-                    if campo == "status":
-                        valor_novo = valor_novo.value if hasattr(valor_novo, 'value') else valor_novo
-                    if valor_antigo != valor_novo:
-                        mudancas.append(f"{campo}: {valor_antigo} -> {valor_novo}")
-
-            logger.success(
-                f"[AGENDAMENTO] Agendamento atualizado com sucesso | agendamento_id={agendamento_id} | "
-                f"mudancas={', '.join(mudancas) if mudancas else 'Nenhuma'}"
+        except TransicaoStatusInvalida as e:
+            raise _erro_transicao_status(e)
+        except Exception as e:
+            logger.exception(
+                f"[AGENDAMENTO] Erro ao atualizar agendamento | agendamento_id={agendamento_id} | "
+                f"campos={campos_atualizar} | erro={str(e)}"
+            )
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Erro interno ao atualizar agendamento",
             )
-        else:
-            logger.debug(f"[AGENDAMENTO] Nenhum campo para atualizar | agendamento_id={agendamento_id}")
-
-        return agendamento
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception(
-            f"[AGENDAMENTO] Erro ao atualizar agendamento | agendamento_id={agendamento_id} | "
-            f"campos={campos_atualizar} | erro={str(e)}"
-        )
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Erro interno ao atualizar agendamento",
-        )
+    return await executor_banco.executar(executar)
 
 
 @router.post("/{agendamento_id}/reagendar", response_model=Agendamento)
 async def reagendar_agendamento(
     agendamento_id: int,
     reagendamento: AgendamentoReagendar,
-    db: Session = Depends(get_db),
+    db: SessaoBanco = Depends(get_db_async),
 ):
     """Reagenda um agendamento."""
     logger.info(
@@ -234,16 +450,25 @@ async def reagendar_agendamento(
     )
     
     try:
-        service = AgendamentoService(db)
-        agendamento = service.reagendar(
-            agendamento_id, reagendamento.nova_data_hora, reagendamento.motivo
+        service = AgendamentoServiceAsync(db)
+        agendamento = await service.reagendar(
+            agendamento_id,
+            reagendamento.nova_data_hora,
+            reagendamento.motivo,
+            versao_esperada=reagendamento.versao,
         )
 
         if not agendamento:
+            validacao = service.ultima_validacao
+            # Uma recusa é falsa (ResultadoDisponibilidade.__bool__): testa o motivo
+            recusado = validacao is not None and validacao.motivo is not None
             logger.warning(
                 f"[AGENDAMENTO] Falha ao reagendar agendamento | agendamento_id={agendamento_id} | "
-                f"nova_data_hora={reagendamento.nova_data_hora} | motivo=Horário indisponível ou validação falhou"
+                f"nova_data_hora={reagendamento.nova_data_hora} | "
+                f"motivo={validacao.motivo.value if recusado else 'Horário indisponível ou validação falhou'}"
             )
+            if recusado:
+                raise _erro_validacao_horario(validacao, "Não foi possível reagendar")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Não foi possível reagendar. Verifique a disponibilidade do novo horário.",
@@ -258,6 +483,15 @@ async def reagendar_agendamento(
 
     except HTTPException:
         raise
+    except ConflitoVersaoAgendamento as e:
+        logger.warning(
+            f"[AGENDAMENTO] Conflito de versão | agendamento_id={agendamento_id} | "
+            f"versao_esperada={e.versao_esperada}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Agendamento alterado por outra requisição. Recarregue e tente novamente.",
+        )
     except Exception as e:
         logger.exception(
             f"[AGENDAMENTO] Erro ao reagendar agendamento | agendamento_id={agendamento_id} | "
@@ -273,7 +507,7 @@ async def reagendar_agendamento(
 async def cancelar_agendamento(
     agendamento_id: int,
     cancelamento: AgendamentoCancelar,
-    db: Session = Depends(get_db),
+    db: SessaoBanco = Depends(get_db_async),
 ):
     """Cancela um agendamento."""
     logger.info(
@@ -282,8 +516,10 @@ async def cancelar_agendamento(
     )
     
     try:
-        service = AgendamentoService(db)
-        agendamento = service.cancelar(agendamento_id, cancelamento.motivo)
+        service = AgendamentoServiceAsync(db)
+        agendamento = await service.cancelar(
+            agendamento_id, cancelamento.motivo, versao_esperada=cancelamento.versao
+        )
 
         if not agendamento:
             logger.warning(f"[AGENDAMENTO] Agendamento não encontrado para cancelamento | agendamento_id={agendamento_id}")
@@ -302,6 +538,17 @@ async def cancelar_agendamento(
 
     except HTTPException:
         raise
+    except ConflitoVersaoAgendamento as e:
+        logger.warning(
+            f"[AGENDAMENTO] Conflito de versão | agendamento_id={agendamento_id} | "
+            f"versao_esperada={e.versao_esperada}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Agendamento alterado por outra requisição. Recarregue e tente novamente.",
+        )
+    except TransicaoStatusInvalida as e:
+        raise _erro_transicao_status(e)
     except Exception as e:
         logger.exception(
             f"[AGENDAMENTO] Erro ao cancelar agendamento | agendamento_id={agendamento_id} | erro={str(e)}"
@@ -313,13 +560,17 @@ async def cancelar_agendamento(
 
 
 @router.post("/{agendamento_id}/confirmar", response_model=Agendamento)
-async def confirmar_agendamento(agendamento_id: int, db: Session = Depends(get_db)):
+async def confirmar_agendamento(
+    agendamento_id: int,
+    versao: int = Query(None, description="Versão esperada do agendamento"),
+    db: SessaoBanco = Depends(get_db_async),
+):
     """Confirma um agendamento."""
     logger.info(f"[AGENDAMENTO] Requisição para confirmar agendamento | agendamento_id={agendamento_id}")
     
     try:
-        service = AgendamentoService(db)
-        agendamento = service.confirmar(agendamento_id)
+        service = AgendamentoServiceAsync(db)
+        agendamento = await service.confirmar(agendamento_id, versao_esperada=versao)
 
         if not agendamento:
             logger.warning(f"[AGENDAMENTO] Agendamento não encontrado para confirmação | agendamento_id={agendamento_id}")
@@ -337,6 +588,17 @@ async def confirmar_agendamento(agendamento_id: int, db: Session = Depends(get_d
 
     except HTTPException:
         raise
+    except ConflitoVersaoAgendamento as e:
+        logger.warning(
+            f"[AGENDAMENTO] Conflito de versão | agendamento_id={agendamento_id} | "
+            f"versao_esperada={e.versao_esperada}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Agendamento alterado por outra requisição. Recarregue e tente novamente.",
+        )
+    except TransicaoStatusInvalida as e:
+        raise _erro_transicao_status(e)
     except Exception as e:
         logger.exception(
             f"[AGENDAMENTO] Erro ao confirmar agendamento | agendamento_id={agendamento_id} | erro={str(e)}"
@@ -346,3 +608,102 @@ async def confirmar_agendamento(agendamento_id: int, db: Session = Depends(get_d
             detail="Erro interno ao confirmar agendamento",
         )
 
+
+@router.post("/{agendamento_id}/concluir", response_model=Agendamento)
+async def concluir_agendamento(
+    agendamento_id: int,
+    versao: int = Query(None, description="Versão esperada do agendamento"),
+    db: SessaoBanco = Depends(get_db_async),
+):
+    """Marca um agendamento como concluído (consulta realizada)."""
+    logger.info(f"[AGENDAMENTO] Requisição para concluir agendamento | agendamento_id={agendamento_id}")
+    
+    try:
+        service = AgendamentoServiceAsync(db)
+        agendamento = await service.concluir(agendamento_id, versao_esperada=versao)
+
+        if not agendamento:
+            logger.warning(f"[AGENDAMENTO] Agendamento não encontrado para conclusão | agendamento_id={agendamento_id}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Agendamento não encontrado",
+            )
+
+        logger.success(
+            f"[AGENDAMENTO] Agendamento concluído com sucesso | agendamento_id={agendamento.id} | "
+            f"paciente_id={agendamento.paciente_id} | medico_id={agendamento.medico_id} | "
+            f"data_hora={agendamento.data_hora} | status={agendamento.status.value}"
+        )
+        return agendamento
+
+    except HTTPException:
+        raise
+    except ConflitoVersaoAgendamento as e:
+        logger.warning(
+            f"[AGENDAMENTO] Conflito de versão | agendamento_id={agendamento_id} | "
+            f"versao_esperada={e.versao_esperada}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Agendamento alterado por outra requisição. Recarregue e tente novamente.",
+        )
+    except TransicaoStatusInvalida as e:
+        raise _erro_transicao_status(e)
+    except Exception as e:
+        logger.exception(
+            f"[AGENDAMENTO] Erro ao concluir agendamento | agendamento_id={agendamento_id} | erro={str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao concluir agendamento",
+        )
+
+
+@router.post("/{agendamento_id}/falta", response_model=Agendamento)
+async def registrar_falta_agendamento(
+    agendamento_id: int,
+    versao: int = Query(None, description="Versão esperada do agendamento"),
+    db: SessaoBanco = Depends(get_db_async),
+):
+    """Registra que o paciente faltou à consulta."""
+    logger.info(f"[AGENDAMENTO] Requisição para registrar falta | agendamento_id={agendamento_id}")
+    
+    try:
+        service = AgendamentoServiceAsync(db)
+        agendamento = await service.registrar_falta(agendamento_id, versao_esperada=versao)
+
+        if not agendamento:
+            logger.warning(f"[AGENDAMENTO] Agendamento não encontrado para registro de falta | agendamento_id={agendamento_id}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Agendamento não encontrado",
+            )
+
+        logger.success(
+            f"[AGENDAMENTO] Falta registrada com sucesso | agendamento_id={agendamento.id} | "
+            f"paciente_id={agendamento.paciente_id} | medico_id={agendamento.medico_id} | "
+            f"data_hora={agendamento.data_hora} | status={agendamento.status.value}"
+        )
+        return agendamento
+
+    except HTTPException:
+        raise
+    except ConflitoVersaoAgendamento as e:
+        logger.warning(
+            f"[AGENDAMENTO] Conflito de versão | agendamento_id={agendamento_id} | "
+            f"versao_esperada={e.versao_esperada}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Agendamento alterado por outra requisição. Recarregue e tente novamente.",
+        )
+    except TransicaoStatusInvalida as e:
+        raise _erro_transicao_status(e)
+    except Exception as e:
+        logger.exception(
+            f"[AGENDAMENTO] Erro ao registrar falta | agendamento_id={agendamento_id} | erro={str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao registrar falta",
+        )
@@ -10,14 +10,21 @@ Este módulo implementa o fluxo completo de agendamento via Botconversa:
 4. Listar horários disponíveis na data escolhida
 """
 
-from typing import List
+import json
+from typing import List, Optional
 from datetime import datetime, date, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from loguru import logger
 from sqlalchemy.orm import Session
 
-from app.database.manager import get_db
+from app.database.leitura_replica import janela_leitura_principal, sessao_da_replica
+from app.database.manager import get_db, get_db_leitura
+from app.database.models import Agendamento, Disponibilidade
+from app.database.contador_consultas import orcamento_consultas
+from app.database.executor_banco import ExecutorBancoSaturado, executor_banco
 from app.schemas.schemas import (
     EspecialidadesResponse,
     EspecialidadeBotconversa,
@@ -29,14 +36,24 @@ from app.schemas.schemas import (
     HorarioDisponivelBotconversa,
     AgendamentoBotconversaCreate,
     AgendamentoConfirmacaoResponse,
+    ReservaHorarioBotconversaCreate,
+    ReservaHorarioLiberar,
+    ReservaHorarioResponse,
 )
 from app.services.medico_service import MedicoService, EspecialidadeService
 from app.services.agendamento_service import AgendamentoService
 from app.services.paciente_service import PacienteService
+from app.services.slot_inventario_service import SlotInventarioService
+from app.services.disponibilidade_service import DisponibilidadeService
+from app.services.coalescencia import coalescedor
+from app.services.idempotencia_service import IdempotenciaService
+from app.services.reserva_horario_service import ReservaHorarioService
 from app.config.config import settings
 
 router = APIRouter(prefix="/botconversa", tags=["botconversa"])
 
+ROTA_CRIAR_AGENDAMENTO = "/botconversa/criar-agendamento"
+
 
 def formatar_data_pt_br(data: date) -> str:
     """Formata data para formato brasileiro: DD/MM/YYYY"""
@@ -60,7 +77,7 @@ def obter_dia_semana_pt_br(data: date) -> str:
 @router.get("/especialidades", response_model=EspecialidadesResponse)
 async def listar_especialidades_botconversa(
     ativa: bool = Query(True, description="Listar apenas especialidades ativas"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
 ):
     """
     Lista especialidades disponíveis formatadas para Botconversa.
@@ -73,8 +90,9 @@ async def listar_especialidades_botconversa(
     )
 
     try:
-        service = EspecialidadeService(db)
-        especialidades_list = service.listar_especialidades(ativa=ativa)
+        especialidades_list = await executor_banco.executar(
+            EspecialidadeService(db).listar_especialidades, ativa=ativa
+        )
 
         especialidades_formatadas = [
             EspecialidadeBotconversa(
@@ -96,6 +114,8 @@ async def listar_especialidades_botconversa(
             mensagem="Escolha uma especialidade:",
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(
             f"[BOTCONVERSA] Erro ao listar especialidades | filtro_ativa={ativa} | erro={str(e)}"
@@ -109,7 +129,7 @@ async def listar_especialidades_botconversa(
 @router.get("/medicos", response_model=MedicosResponse)
 async def listar_medicos_botconversa(
     especialidade_id: int = Query(..., description="ID da especialidade escolhida"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
 ):
     """
     Lista médicos disponíveis de uma especialidade formatados para Botconversa.
@@ -123,8 +143,9 @@ async def listar_medicos_botconversa(
 
     try:
         # Verifica se a especialidade existe
-        esp_service = EspecialidadeService(db)
-        especialidade = esp_service.buscar_especialidade(especialidade_id)
+        especialidade = await executor_banco.executar(
+            EspecialidadeService(db).buscar_especialidade, especialidade_id
+        )
 
         if not especialidade:
             logger.warning(
@@ -141,8 +162,8 @@ async def listar_medicos_botconversa(
         )
 
         # Busca médicos ativos da especialidade
-        medico_service = MedicoService(db)
-        medicos_list = medico_service.listar_medicos(
+        medicos_list = await executor_banco.executar(
+            MedicoService(db).listar_medicos,
             especialidade_id=especialidade_id,
             ativo=True,
         )
@@ -197,15 +218,15 @@ async def listar_datas_disponiveis_botconversa(
     dias_frente: int = Query(
         90, description="Quantos dias à frente buscar", ge=1, le=180
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
 ):
     """
     Lista datas disponíveis do médico formatadas para Botconversa.
 
     Esta rota é chamada após o paciente escolher um médico.
-    Retorna as datas disponíveis baseadas nos dias da semana que o médico atende
-    (ex: se atende terça, quinta e sexta, retorna todas as terças, quintas e sextas
-    dentro do período configurado).
+    Retorna apenas as datas em que o médico atende e que ainda têm ao menos um
+    horário livre, com a quantidade de horários livres de cada data. Datas
+    totalmente ocupadas não são oferecidas ao paciente.
     """
     logger.info(
         f"[BOTCONVERSA] Requisição para listar datas disponíveis | medico_id={medico_id} | "
@@ -213,112 +234,111 @@ async def listar_datas_disponiveis_botconversa(
     )
 
     try:
-        from app.database.models import Medico, Disponibilidade
-        from app.config.config import settings
+        def montar_resposta(db: Session):
+            # Sessão própria do cálculo, que pode ser compartilhado com outras requisições
+            # Verifica se o médico existe e está ativo
+            medico_service = MedicoService(db)
+            medico = medico_service.buscar_medico(medico_id)
 
-        # Verifica se o médico existe e está ativo
-        medico_service = MedicoService(db)
-        medico = medico_service.buscar_medico(medico_id)
+            if not medico:
+                logger.warning(
+                    f"[BOTCONVERSA] Médico não encontrado | medico_id={medico_id}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Médico não encontrado",
+                )
 
-        if not medico:
-            logger.warning(
-                f"[BOTCONVERSA] Médico não encontrado | medico_id={medico_id}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Médico não encontrado",
-            )
+            if not medico.ativo:
+                logger.warning(
+                    f"[BOTCONVERSA] Médico inativo | medico_id={medico_id} | nome={medico.nome}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Médico não está ativo",
+                )
 
-        if not medico.ativo:
-            logger.warning(
-                f"[BOTCONVERSA] Médico inativo | medico_id={medico_id} | nome={medico.nome}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Médico não está ativo",
+            logger.debug(
+                f"[BOTCONVERSA] Médico validado | medico_id={medico_id} | nome={medico.nome}"
             )
 
-        logger.debug(
-            f"[BOTCONVERSA] Médico validado | medico_id={medico_id} | nome={medico.nome}"
-        )
-
-        # Busca disponibilidades do médico
-        disponibilidades = (
-            db.query(Disponibilidade)
-            .filter(
-                Disponibilidade.medico_id == medico_id,
-                Disponibilidade.ativa == True,
-            )
-            .all()
-        )
+            data_inicio = (
+                datetime.now() + timedelta(hours=settings.min_advance_booking_hours)
+            ).date()
+            data_fim = datetime.now().date() + timedelta(days=dias_frente)
 
-        if not disponibilidades:
-            logger.warning(
-                f"[BOTCONVERSA] Nenhuma disponibilidade configurada | medico_id={medico_id} | "
-                f"nome={medico.nome}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Nenhuma disponibilidade configurada para este médico",
+            logger.debug(
+                f"[BOTCONVERSA] Período de busca | data_inicio={data_inicio} | data_fim={data_fim} | "
+                f"dias_total={(data_fim - data_inicio).days}"
             )
 
-        # Extrai os dias da semana que o médico atende
-        dias_semana_disponiveis = [disp.dia_semana for disp in disponibilidades]
-        logger.debug(
-            f"[BOTCONVERSA] Disponibilidades encontradas | medico_id={medico_id} | "
-            f"total_disponibilidades={len(disponibilidades)} | dias_semana={dias_semana_disponiveis}"
-        )
-
-        # Calcula datas disponíveis
-        data_inicio = datetime.now().date()
-        data_fim = data_inicio + timedelta(days=dias_frente)
+            if settings.slot_inventario_habilitado:
+                # Inventário materializado: uma única varredura indexada
+                datas_livres = SlotInventarioService(db).listar_datas_livres(
+                    medico_id, data_inicio, data_fim
+                )
+            else:
+                disponibilidade_service = DisponibilidadeService(db)
+                disponibilidades = disponibilidade_service.carregar_disponibilidades([medico_id])
 
-        # Aplica antecedência mínima
-        min_advance = timedelta(hours=settings.min_advance_booking_hours)
-        data_inicio = (datetime.now() + min_advance).date()
+                if not disponibilidades[medico_id]:
+                    logger.warning(
+                        f"[BOTCONVERSA] Nenhuma disponibilidade configurada | medico_id={medico_id} | "
+                        f"nome={medico.nome}"
+                    )
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Nenhuma disponibilidade configurada para este médico",
+                    )
 
-        logger.debug(
-            f"[BOTCONVERSA] Período de busca | data_inicio={data_inicio} | data_fim={data_fim} | "
-            f"dias_total={(data_fim - data_inicio).days}"
-        )
+                logger.debug(
+                    f"[BOTCONVERSA] Disponibilidades encontradas | medico_id={medico_id} | "
+                    f"dias_semana={sorted(disponibilidades[medico_id])}"
+                )
 
-        datas_disponiveis = []
-        data_atual = data_inicio
+                # Uma única passada sobre os agendamentos do período
+                datas_livres = disponibilidade_service.contar_horarios_livres_por_data(
+                    medico_id, data_inicio, data_fim, disponibilidades=disponibilidades
+                )
 
-        while data_atual <= data_fim:
-            # Verifica se o dia da semana está na lista de disponibilidade
-            if data_atual.weekday() in dias_semana_disponiveis:
-                datas_disponiveis.append(
-                    DataDisponivelBotconversa(
-                        data=data_atual,
-                        data_formatada=formatar_data_pt_br(data_atual),
-                        dia_semana=obter_dia_semana_pt_br(data_atual),
-                    )
+            # Apenas datas que ainda têm horário livre
+            datas_disponiveis = [
+                DataDisponivelBotconversa(
+                    data=data_livre,
+                    data_formatada=formatar_data_pt_br(data_livre),
+                    dia_semana=obter_dia_semana_pt_br(data_livre),
+                    total_horarios_livres=total_livres,
                 )
+                for data_livre, total_livres in datas_livres.items()
+            ]
 
-            data_atual += timedelta(days=1)
+            if not datas_disponiveis:
+                logger.warning(
+                    f"[BOTCONVERSA] Nenhuma data disponível encontrada | medico_id={medico_id} | "
+                    f"periodo={data_inicio} a {data_fim}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Nenhuma data disponível encontrada no período configurado",
+                )
 
-        if not datas_disponiveis:
-            logger.warning(
-                f"[BOTCONVERSA] Nenhuma data disponível encontrada | medico_id={medico_id} | "
+            logger.success(
+                f"[BOTCONVERSA] Datas disponíveis listadas | medico_id={medico_id} | "
+                f"medico_nome={medico.nome} | total_datas={len(datas_disponiveis)} | "
                 f"periodo={data_inicio} a {data_fim}"
             )
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Nenhuma data disponível encontrada no período configurado",
-            )
 
-        logger.success(
-            f"[BOTCONVERSA] Datas disponíveis listadas | medico_id={medico_id} | "
-            f"medico_nome={medico.nome} | total_datas={len(datas_disponiveis)} | "
-            f"periodo={data_inicio} a {data_fim}"
-        )
+            return DatasDisponiveisResponse(
+                datas=datas_disponiveis,
+                total=len(datas_disponiveis),
+                medico_nome=medico.nome,
+                mensagem=f"Escolha uma data para consulta com Dr(a). {medico.nome}:",
+            )
 
-        return DatasDisponiveisResponse(
-            datas=datas_disponiveis,
-            total=len(datas_disponiveis),
-            medico_nome=medico.nome,
-            mensagem=f"Escolha uma data para consulta com Dr(a). {medico.nome}:",
+        # Requisições idênticas simultâneas compartilham o mesmo cálculo, separadas
+        # entre réplica e principal (janela de leitura após escrita)
+        return await coalescedor.executar(
+            ("botconversa_datas", medico_id, dias_frente), montar_resposta, sessao_da_replica(db)
         )
 
     except HTTPException:
@@ -338,7 +358,7 @@ async def listar_datas_disponiveis_botconversa(
 async def listar_horarios_disponiveis_botconversa(
     medico_id: int = Query(..., description="ID do médico escolhido"),
     data: date = Query(..., description="Data escolhida no formato YYYY-MM-DD"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
 ):
     """
     Lista horários disponíveis na data escolhida formatados para Botconversa.
@@ -355,122 +375,135 @@ async def listar_horarios_disponiveis_botconversa(
     )
 
     try:
-        from app.database.models import Medico, Disponibilidade
-        from app.config.config import settings
+        def montar_resposta(db: Session):
+            # Sessão própria do cálculo, que pode ser compartilhado com outras requisições
+            # Verifica se o médico existe e está ativo
+            medico_service = MedicoService(db)
+            medico = medico_service.buscar_medico(medico_id)
 
-        # Verifica se o médico existe e está ativo
-        medico_service = MedicoService(db)
-        medico = medico_service.buscar_medico(medico_id)
+            if not medico:
+                logger.warning(
+                    f"[BOTCONVERSA] Médico não encontrado | medico_id={medico_id}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Médico não encontrado",
+                )
 
-        if not medico:
-            logger.warning(
-                f"[BOTCONVERSA] Médico não encontrado | medico_id={medico_id}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Médico não encontrado",
-            )
+            if not medico.ativo:
+                logger.warning(
+                    f"[BOTCONVERSA] Médico inativo | medico_id={medico_id} | nome={medico.nome}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Médico não está ativo",
+                )
 
-        if not medico.ativo:
-            logger.warning(
-                f"[BOTCONVERSA] Médico inativo | medico_id={medico_id} | nome={medico.nome}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Médico não está ativo",
-            )
+            # Valida se a data não é no passado
+            if data < datetime.now().date():
+                logger.warning(
+                    f"[BOTCONVERSA] Tentativa de agendar em data passada | medico_id={medico_id} | "
+                    f"data={data} | hoje={datetime.now().date()}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Não é possível agendar em data passada",
+                )
 
-        # Valida se a data não é no passado
-        if data < datetime.now().date():
-            logger.warning(
-                f"[BOTCONVERSA] Tentativa de agendar em data passada | medico_id={medico_id} | "
-                f"data={data} | hoje={datetime.now().date()}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Não é possível agendar em data passada",
-            )
+            if settings.slot_inventario_habilitado:
+                # Inventário materializado: uma única varredura indexada
+                horarios_data = SlotInventarioService(db).listar_horarios_livres(
+                    medico_id, data
+                )
+            else:
+                # Busca disponibilidade do médico para o dia da semana
+                dia_semana = data.weekday()
+                disponibilidade = (
+                    db.query(Disponibilidade)
+                    .filter(
+                        Disponibilidade.medico_id == medico_id,
+                        Disponibilidade.dia_semana == dia_semana,
+                        Disponibilidade.ativa == True,
+                    )
+                    .first()
+                )
 
-        # Busca disponibilidade do médico para o dia da semana
-        dia_semana = data.weekday()
-        disponibilidade = (
-            db.query(Disponibilidade)
-            .filter(
-                Disponibilidade.medico_id == medico_id,
-                Disponibilidade.dia_semana == dia_semana,
-                Disponibilidade.ativa == True,
-            )
-            .first()
-        )
+                if not disponibilidade:
+                    logger.warning(
+                        f"[BOTCONVERSA] Médico não atende neste dia da semana | medico_id={medico_id} | "
+                        f"data={data} | dia_semana={dia_semana} | dia_nome={obter_dia_semana_pt_br(data)}"
+                    )
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Médico não atende neste dia da semana ({obter_dia_semana_pt_br(data)})",
+                    )
 
-        if not disponibilidade:
-            logger.warning(
-                f"[BOTCONVERSA] Médico não atende neste dia da semana | medico_id={medico_id} | "
-                f"data={data} | dia_semana={dia_semana} | dia_nome={obter_dia_semana_pt_br(data)}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Médico não atende neste dia da semana ({obter_dia_semana_pt_br(data)})",
-            )
+                logger.debug(
+                    f"[BOTCONVERSA] Disponibilidade encontrada | medico_id={medico_id} | "
+                    f"data={data} | hora_inicio={disponibilidade.hora_inicio} | "
+                    f"hora_fim={disponibilidade.hora_fim}"
+                )
 
-        logger.debug(
-            f"[BOTCONVERSA] Disponibilidade encontrada | medico_id={medico_id} | "
-            f"data={data} | hora_inicio={disponibilidade.hora_inicio} | "
-            f"hora_fim={disponibilidade.hora_fim}"
-        )
+                # Gera horários disponíveis usando o serviço de agendamento
+                agendamento_service = AgendamentoService(db)
 
-        # Gera horários disponíveis usando o serviço de agendamento
-        agendamento_service = AgendamentoService(db)
+                # Calcula data/hora início e fim do dia (todos os períodos de atendimento)
+                data_inicio = datetime.combine(data, datetime.min.time())
+                data_fim = datetime.combine(data, datetime.max.time())
 
-        # Calcula data/hora início e fim do dia
-        data_inicio = datetime.combine(data, disponibilidade.hora_inicio)
-        data_fim = datetime.combine(data, disponibilidade.hora_fim)
+                logger.debug(
+                    f"[BOTCONVERSA] Buscando horários disponíveis | medico_id={medico_id} | "
+                    f"data_inicio={data_inicio} | data_fim={data_fim}"
+                )
 
-        logger.debug(
-            f"[BOTCONVERSA] Buscando horários disponíveis | medico_id={medico_id} | "
-            f"data_inicio={data_inicio} | data_fim={data_fim}"
-        )
+                # Busca horários disponíveis usando o método existente
+                horarios = agendamento_service.buscar_horarios_disponiveis(
+                    medico_id=medico_id,
+                    data_inicio=data_inicio,
+                    data_fim=data_fim,
+                )
 
-        # Busca horários disponíveis usando o método existente
-        horarios = agendamento_service.buscar_horarios_disponiveis(
-            medico_id=medico_id,
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-        )
+                # Filtra apenas horários da data escolhida
+                horarios_data = [
+                    h["data_hora"] for h in horarios if h["data_hora"].date() == data
+                ]
 
-        # Filtra apenas horários da data escolhida
-        horarios_data = [h for h in horarios if h["data_hora"].date() == data]
+            if not horarios_data:
+                logger.warning(
+                    f"[BOTCONVERSA] Nenhum horário disponível para esta data | medico_id={medico_id} | "
+                    f"data={data} | medico_nome={medico.nome}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Nenhum horário disponível para esta data",
+                )
 
-        if not horarios_data:
-            logger.warning(
-                f"[BOTCONVERSA] Nenhum horário disponível para esta data | medico_id={medico_id} | "
-                f"data={data} | medico_nome={medico.nome}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Nenhum horário disponível para esta data",
-            )
+            # Formata horários para Botconversa
+            horarios_formatados = [
+                HorarioDisponivelBotconversa(
+                    horario=data_hora.strftime("%H:%M"),
+                    data_hora=data_hora,
+                )
+                for data_hora in horarios_data
+            ]
 
-        # Formata horários para Botconversa
-        horarios_formatados = [
-            HorarioDisponivelBotconversa(
-                horario=h["data_hora"].strftime("%H:%M"),
-                data_hora=h["data_hora"],
+            logger.success(
+                f"[BOTCONVERSA] Horários disponíveis listados | medico_id={medico_id} | "
+                f"medico_nome={medico.nome} | data={data} | total_horarios={len(horarios_formatados)}"
             )
-            for h in horarios_data
-        ]
 
-        logger.success(
-            f"[BOTCONVERSA] Horários disponíveis listados | medico_id={medico_id} | "
-            f"medico_nome={medico.nome} | data={data} | total_horarios={len(horarios_formatados)}"
-        )
+            return HorariosDisponiveisResponse(
+                horarios=horarios_formatados,
+                total=len(horarios_formatados),
+                medico_nome=medico.nome,
+                data_formatada=formatar_data_pt_br(data),
+                mensagem=f"Escolha um horário para {formatar_data_pt_br(data)} ({obter_dia_semana_pt_br(data)}):",
+            )
 
-        return HorariosDisponiveisResponse(
-            horarios=horarios_formatados,
-            total=len(horarios_formatados),
-            medico_nome=medico.nome,
-            data_formatada=formatar_data_pt_br(data),
-            mensagem=f"Escolha um horário para {formatar_data_pt_br(data)} ({obter_dia_semana_pt_br(data)}):",
+        # Requisições idênticas simultâneas compartilham o mesmo cálculo, separadas
+        # entre réplica e principal (janela de leitura após escrita)
+        return await coalescedor.executar(
+            ("botconversa_horarios", medico_id, data), montar_resposta, sessao_da_replica(db)
         )
 
     except HTTPException:
@@ -543,9 +576,113 @@ Obrigado por escolher nossos serviços!
     return mensagem.strip()
 
 
+def _montar_confirmacao_agendamento(agendamento: Agendamento) -> AgendamentoConfirmacaoResponse:
+    """Monta a resposta de confirmação (paciente, médico e especialidade já carregados)."""
+    logger.debug(
+        f"[BOTCONVERSA] Formatando mensagem de confirmação | agendamento_id={agendamento.id}"
+    )
+    mensagem = formatar_mensagem_confirmacao_agendamento(
+        agendamento=agendamento,
+        medico=agendamento.medico,
+        especialidade=agendamento.medico.especialidade,
+        paciente=agendamento.paciente,
+        hospital_name=settings.hospital_name,
+        hospital_address=settings.hospital_address,
+        hospital_phone=settings.hospital_phone,
+    )
+    return AgendamentoConfirmacaoResponse(
+        agendamento_id=agendamento.id,
+        mensagem=mensagem,
+        agendamento=agendamento,
+    )
+
+
+@router.post("/reservar-horario", response_model=ReservaHorarioResponse)
+async def reservar_horario_botconversa(
+    reserva_data: ReservaHorarioBotconversaCreate,
+    db: Session = Depends(get_db),
+):
+    """
+    Reserva temporariamente um horário para o telefone do paciente.
+
+    Chamada quando o paciente escolhe o horário, antes de confirmar os dados.
+    Enquanto a reserva vale (RESERVA_HORARIO_TTL_MINUTOS), o horário deixa de
+    aparecer para os demais pacientes e apenas este telefone consegue agendá-lo
+    em /criar-agendamento. Uma nova reserva do mesmo telefone substitui a anterior.
+    """
+    logger.info(
+        f"[BOTCONVERSA] Requisição para reservar horário | telefone={reserva_data.telefone} | "
+        f"medico_id={reserva_data.medico_id} | data_hora={reserva_data.data_hora}"
+    )
+
+    try:
+        reserva = await executor_banco.executar(
+            ReservaHorarioService(db).reservar,
+            reserva_data.telefone,
+            reserva_data.medico_id,
+            reserva_data.data_hora,
+            reserva_data.duracao_minutos,
+        )
+
+        if not reserva:
+            logger.warning(
+                f"[BOTCONVERSA] Horário indisponível para reserva | telefone={reserva_data.telefone} | "
+                f"medico_id={reserva_data.medico_id} | data_hora={reserva_data.data_hora}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Este horário não está mais disponível. Por favor, escolha outro horário.",
+            )
+
+        janela_leitura_principal.registrar_escrita(telefone=reserva_data.telefone)
+        return ReservaHorarioResponse(
+            reserva_id=reserva.id,
+            telefone=reserva.telefone,
+            medico_id=reserva.medico_id,
+            data_hora=reserva.data_hora,
+            duracao_minutos=reserva.duracao_minutos,
+            expira_em=reserva.expira_em,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(
+            f"[BOTCONVERSA] Erro ao reservar horário | telefone={reserva_data.telefone} | "
+            f"erro={str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro interno ao reservar horário: {str(e)}",
+        )
+
+
+@router.post("/liberar-reserva", status_code=status.HTTP_204_NO_CONTENT)
+async def liberar_reserva_botconversa(
+    liberacao: ReservaHorarioLiberar,
+    db: Session = Depends(get_db),
+):
+    """Libera a reserva temporária do telefone (ex.: paciente desistiu do horário)."""
+    logger.info(f"[BOTCONVERSA] Requisição para liberar reserva | telefone={liberacao.telefone}")
+
+    if not await executor_banco.executar(ReservaHorarioService(db).liberar, liberacao.telefone):
+        logger.warning(
+            f"[BOTCONVERSA] Nenhuma reserva para liberar | telefone={liberacao.telefone}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nenhuma reserva encontrada para este telefone",
+        )
+
+    janela_leitura_principal.registrar_escrita(telefone=liberacao.telefone)
+    logger.success(f"[BOTCONVERSA] Reserva liberada com sucesso | telefone={liberacao.telefone}")
+    return None
+
+
 @router.post("/criar-agendamento", response_model=AgendamentoConfirmacaoResponse)
 async def criar_agendamento_botconversa(
     agendamento_data: AgendamentoBotconversaCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
 ):
     """
@@ -557,7 +694,104 @@ async def criar_agendamento_botconversa(
     2. Valida disponibilidade do horário
     3. Cria o agendamento
     4. Retorna mensagem formatada para enviar via Botconversa
+
+    Com o cabeçalho Idempotency-Key, repetições da mesma requisição (por
+    exemplo, reenvios do N8N/Make após timeout) recebem a resposta gravada na
+    primeira execução, sem criar outro agendamento. Apenas respostas de sucesso
+    são gravadas, no mesmo commit do agendamento; em caso de erro a chave é
+    liberada para nova tentativa.
+    """
+    if not idempotency_key:
+        return await _criar_agendamento_botconversa(agendamento_data, db)
+
+    idempotencia = IdempotenciaService(db)
+    hash_requisicao = idempotencia.calcular_hash(agendamento_data.model_dump_json())
+    registro = await executor_banco.executar(
+        idempotencia.reservar, idempotency_key, ROTA_CRIAR_AGENDAMENTO, hash_requisicao
+    )
+
+    if registro is not None:
+        if registro.rota != ROTA_CRIAR_AGENDAMENTO or registro.hash_requisicao != hash_requisicao:
+            logger.warning(
+                f"[BOTCONVERSA] Idempotency-Key reutilizada com outra requisição | "
+                f"chave={idempotency_key} | telefone={agendamento_data.telefone}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key já utilizada com uma requisição diferente",
+            )
+
+        if registro.resposta is None:
+            logger.warning(
+                f"[BOTCONVERSA] Requisição com a mesma Idempotency-Key em andamento | "
+                f"chave={idempotency_key}"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Requisição com esta Idempotency-Key ainda em processamento",
+                headers={"Retry-After": "1"},
+            )
+
+        logger.info(
+            f"[BOTCONVERSA] Resposta idempotente reutilizada | chave={idempotency_key} | "
+            f"status_code={registro.status_code}"
+        )
+        return JSONResponse(
+            status_code=registro.status_code,
+            content=json.loads(registro.resposta),
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    try:
+        return await _criar_agendamento_botconversa(
+            agendamento_data, db, chave_idempotencia=idempotency_key
+        )
+    except Exception:
+        try:
+            await executor_banco.executar(idempotencia.descartar, idempotency_key)
+        except ExecutorBancoSaturado:
+            # Sem vaga para descartar: a chave é liberada quando o prazo da reserva vencer
+            logger.warning(
+                f"[BOTCONVERSA] Idempotency-Key não descartada, executor saturado | "
+                f"chave={idempotency_key}"
+            )
+        raise
+
+
+async def _criar_agendamento_botconversa(
+    agendamento_data: AgendamentoBotconversaCreate,
+    db: Session,
+    chave_idempotencia: Optional[str] = None,
+) -> AgendamentoConfirmacaoResponse:
+    """
+    Executa a criação do agendamento via Botconversa.
+
+    A rota tem um orçamento fixo de comandos SQL (orcamento_consultas_criar_agendamento_bot):
+    paciente e médico (com especialidade) são buscados uma única vez, o cadastro
+    ou a atualização do paciente entram na mesma transação do agendamento, o
+    médico carregado é reaproveitado na validação e há um único commit.
+    Com chave_idempotencia, a resposta é gravada na chave nesse mesmo commit.
+    A criação roda no executor do banco, sem bloquear o event loop.
     """
+
+    def executar() -> AgendamentoConfirmacaoResponse:
+        with orcamento_consultas(
+            ROTA_CRIAR_AGENDAMENTO, settings.orcamento_consultas_criar_agendamento_bot
+        ):
+            return _executar_criacao_agendamento_botconversa(
+                agendamento_data, db, chave_idempotencia
+            )
+
+    resposta = await executor_banco.executar(executar)
+    janela_leitura_principal.registrar_escrita(telefone=agendamento_data.telefone)
+    return resposta
+
+
+def _executar_criacao_agendamento_botconversa(
+    agendamento_data: AgendamentoBotconversaCreate,
+    db: Session,
+    chave_idempotencia: Optional[str] = None,
+) -> AgendamentoConfirmacaoResponse:
     logger.info(
         f"[BOTCONVERSA] Requisição para criar agendamento | telefone={agendamento_data.telefone} | "
         f"medico_id={agendamento_data.medico_id} | data_hora={agendamento_data.data_hora} | "
@@ -565,10 +799,7 @@ async def criar_agendamento_botconversa(
     )
 
     try:
-        from app.database.models import Medico, Especialidade, Agendamento, StatusAgendamento
-        from sqlalchemy import and_
-
-        # Busca ou cria paciente
+        # Busca ou cria paciente (sem commit: entra na transação do agendamento)
         logger.debug(
             f"[BOTCONVERSA] Buscando paciente | telefone={agendamento_data.telefone}"
         )
@@ -598,7 +829,7 @@ async def criar_agendamento_botconversa(
                 "nome": agendamento_data.nome_paciente,
                 "telefone": agendamento_data.telefone,
             }
-            paciente = paciente_service.criar_paciente(paciente_dados)
+            paciente = paciente_service.adicionar_paciente(paciente_dados)
 
             if not paciente:
                 logger.error(
@@ -613,28 +844,29 @@ async def criar_agendamento_botconversa(
                 f"[BOTCONVERSA] Paciente criado | paciente_id={paciente.id} | "
                 f"nome={paciente.nome} | telefone={paciente.telefone}"
             )
-        elif agendamento_data.nome_paciente:
-            # Atualiza nome se fornecido
+        elif agendamento_data.nome_paciente and agendamento_data.nome_paciente != paciente.nome:
+            # Atualiza nome se fornecido (gravado no flush do agendamento)
             logger.debug(
                 f"[BOTCONVERSA] Atualizando nome do paciente | paciente_id={paciente.id} | "
                 f"nome_antigo={paciente.nome} | nome_novo={agendamento_data.nome_paciente}"
             )
             paciente.nome = agendamento_data.nome_paciente
-            db.commit()
-            db.refresh(paciente)
 
+        paciente_id = paciente.id
         logger.debug(
-            f"[BOTCONVERSA] Paciente validado | paciente_id={paciente.id} | "
+            f"[BOTCONVERSA] Paciente validado | paciente_id={paciente_id} | "
             f"nome={paciente.nome} | telefone={paciente.telefone} | "
             f"paciente_criado={paciente_criado}"
         )
 
-        # Busca médico e especialidade
+        # Busca médico e especialidade em uma única consulta
         logger.debug(
             f"[BOTCONVERSA] Buscando médico | medico_id={agendamento_data.medico_id}"
         )
         medico_service = MedicoService(db)
-        medico = medico_service.buscar_medico(agendamento_data.medico_id)
+        medico = medico_service.buscar_medico(
+            agendamento_data.medico_id, com_especialidade=True
+        )
 
         if not medico:
             logger.warning(
@@ -655,14 +887,7 @@ async def criar_agendamento_botconversa(
                 detail="Médico não está ativo",
             )
 
-        # Busca especialidade
-        logger.debug(
-            f"[BOTCONVERSA] Buscando especialidade | especialidade_id={medico.especialidade_id}"
-        )
-        esp_service = EspecialidadeService(db)
-        especialidade = esp_service.buscar_especialidade(medico.especialidade_id)
-
-        if not especialidade:
+        if not medico.especialidade:
             logger.warning(
                 f"[BOTCONVERSA] Especialidade não encontrada | especialidade_id={medico.especialidade_id}"
             )
@@ -673,66 +898,65 @@ async def criar_agendamento_botconversa(
 
         logger.debug(
             f"[BOTCONVERSA] Médico e especialidade validados | medico_id={medico.id} | "
-            f"medico_nome={medico.nome} | especialidade_nome={especialidade.nome}"
+            f"medico_nome={medico.nome} | especialidade_nome={medico.especialidade.nome}"
         )
 
         # Cria agendamento
         logger.debug(
-            f"[BOTCONVERSA] Criando agendamento | paciente_id={paciente.id} | "
+            f"[BOTCONVERSA] Criando agendamento | paciente_id={paciente_id} | "
             f"medico_id={agendamento_data.medico_id} | data_hora={agendamento_data.data_hora}"
         )
         agendamento_service = AgendamentoService(db)
         agendamento_dados = {
-            "paciente_id": paciente.id,
+            "paciente_id": paciente_id,
             "medico_id": agendamento_data.medico_id,
             "data_hora": agendamento_data.data_hora,
             "duracao_minutos": agendamento_data.duracao_minutos,
             "observacoes": agendamento_data.observacoes,
+            "telefone_reserva": agendamento_data.telefone,
         }
 
-        agendamento = agendamento_service.criar_agendamento(agendamento_dados)
+        gravar_resposta = None
+        if chave_idempotencia:
+
+            def gravar_resposta(agendamento_criado: Agendamento) -> None:
+                IdempotenciaService(db).concluir(
+                    chave_idempotencia,
+                    status.HTTP_200_OK,
+                    jsonable_encoder(_montar_confirmacao_agendamento(agendamento_criado)),
+                )
+
+        agendamento = agendamento_service.criar_agendamento(
+            agendamento_dados, medico=medico, antes_do_commit=gravar_resposta
+        )
 
         if not agendamento:
-            # Revalida para determinar o motivo específico
-            fim_consulta = agendamento_data.data_hora + timedelta(minutes=agendamento_data.duracao_minutos or 30)
-            conflito_existente = (
-                db.query(Agendamento)
-                .filter(
-                    and_(
-                        Agendamento.medico_id == agendamento_data.medico_id,
-                        Agendamento.status.in_([StatusAgendamento.AGENDADO, StatusAgendamento.CONFIRMADO]),
-                        Agendamento.data_hora < fim_consulta,
-                    )
+            validacao = agendamento_service.ultima_validacao
+            if validacao is not None and validacao.conflito:
+                logger.warning(
+                    f"[BOTCONVERSA] Horário já ocupado | paciente_id={paciente_id} | "
+                    f"medico_id={agendamento_data.medico_id} | data_hora={agendamento_data.data_hora} | "
+                    f"motivo={validacao.motivo.value} | "
+                    f"conflito_com_agendamento_id={validacao.agendamento_conflitante_id}"
                 )
-                .first()
-            )
-            
-            if conflito_existente:
-                # Verifica se há sobreposição real
-                fim_conflito = conflito_existente.data_hora + timedelta(minutes=conflito_existente.duracao_minutos)
-                if (
-                    (conflito_existente.data_hora <= agendamento_data.data_hora < fim_conflito)
-                    or (conflito_existente.data_hora < fim_consulta <= fim_conflito)
-                    or (agendamento_data.data_hora <= conflito_existente.data_hora < fim_consulta)
-                ):
-                    logger.warning(
-                        f"[BOTCONVERSA] Horário já ocupado | paciente_id={paciente.id} | "
-                        f"medico_id={agendamento_data.medico_id} | data_hora={agendamento_data.data_hora} | "
-                        f"conflito_com_agendamento_id={conflito_existente.id}"
-                    )
-                    raise HTTPException(
-                        status_code=status.HTTP_409_CONFLICT,
-                        detail=f"Este horário já está ocupado. Por favor, escolha outro horário disponível.",
-                    )
-            
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Este horário já está ocupado. Por favor, escolha outro horário disponível.",
+                )
+
+            motivo = validacao.descricao if validacao is not None else None
             logger.warning(
-                f"[BOTCONVERSA] Falha ao criar agendamento | paciente_id={paciente.id} | "
+                f"[BOTCONVERSA] Falha ao criar agendamento | paciente_id={paciente_id} | "
                 f"medico_id={agendamento_data.medico_id} | data_hora={agendamento_data.data_hora} | "
-                f"motivo=Horário indisponível ou validação falhou"
+                f"motivo={motivo or 'Horário indisponível ou validação falhou'}"
             )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Não foi possível criar o agendamento. Horário pode estar indisponível.",
+                detail=(
+                    f"Não foi possível criar o agendamento: {motivo}."
+                    if motivo
+                    else "Não foi possível criar o agendamento. Horário pode estar indisponível."
+                ),
             )
 
         logger.debug(
@@ -740,19 +964,11 @@ async def criar_agendamento_botconversa(
             f"status={agendamento.status.value}"
         )
 
-        # Formata mensagem de confirmação
-        logger.debug(
-            f"[BOTCONVERSA] Formatando mensagem de confirmação | agendamento_id={agendamento.id}"
-        )
-        mensagem = formatar_mensagem_confirmacao_agendamento(
-            agendamento=agendamento,
-            medico=medico,
-            especialidade=especialidade,
-            paciente=paciente,
-            hospital_name=settings.hospital_name,
-            hospital_address=settings.hospital_address,
-            hospital_phone=settings.hospital_phone,
-        )
+        # Paciente, médico e especialidade vêm carregados com o agendamento
+        paciente = agendamento.paciente
+        medico = agendamento.medico
+        especialidade = medico.especialidade
+        resposta = _montar_confirmacao_agendamento(agendamento)
 
         logger.success(
             f"[BOTCONVERSA] Agendamento criado com sucesso via Botconversa | "
@@ -762,15 +978,13 @@ async def criar_agendamento_botconversa(
             f"paciente_criado={paciente_criado}"
         )
 
-        return AgendamentoConfirmacaoResponse(
-            agendamento_id=agendamento.id,
-            mensagem=mensagem,
-            agendamento=agendamento,
-        )
+        return resposta
 
     except HTTPException:
+        db.rollback()
         raise
     except Exception as e:
+        db.rollback()
         logger.exception(
             f"[BOTCONVERSA] Erro ao criar agendamento | telefone={agendamento_data.telefone} | "
             f"medico_id={agendamento_data.medico_id} | data_hora={agendamento_data.data_hora} | "
@@ -2,37 +2,111 @@
 Rotas da API para consulta de disponibilidade.
 """
 
-from typing import List
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterator
+from datetime import datetime, date, timedelta
+from itertools import islice
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from loguru import logger
 from sqlalchemy.orm import Session
 
-from app.database.manager import get_db
-from app.schemas.schemas import HorarioDisponivel, DisponibilidadeResponse
-from app.services.agendamento_service import AgendamentoService
+from app.database.executor_banco import executor_banco
+from app.database.leitura_replica import sessao_da_replica
+from app.database.manager import get_db, get_db_leitura
+from app.schemas.schemas import (
+    HorarioDisponivel,
+    DisponibilidadeResponse,
+    ReconstrucaoInventarioResponse,
+    CacheDisponibilidadeEstatisticas,
+    ResumoDiaMedico,
+    ResumoDisponibilidadeResponse,
+)
+from app.services.disponibilidade_service import DisponibilidadeService, PeriodoDia
+from app.services.slot_inventario_service import SlotInventarioService
+from app.services.cache_disponibilidade import cache_disponibilidade
+from app.services.coalescencia import coalescedor
 
 router = APIRouter(prefix="/disponibilidade", tags=["disponibilidade"])
 
+MEDIA_TYPE_NDJSON = "application/x-ndjson"
+
+# Período máximo aceito pelo resumo de disponibilidade
+MAX_DIAS_RESUMO = 92
+
+
+def _serializar_ndjson(horarios: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """Serializa os horários como NDJSON, um objeto por linha, à medida que são gerados."""
+    total = 0
+    try:
+        for h in horarios:
+            yield HorarioDisponivel(**h).model_dump_json() + "\n"
+            total += 1
+    except Exception as e:
+        # Com a resposta já iniciada não é possível devolver 500: a conexão é encerrada
+        logger.exception(
+            f"[DISPONIBILIDADE] Erro durante o streaming de horários | enviados={total} | erro={str(e)}"
+        )
+        raise
+    logger.success(f"[DISPONIBILIDADE] Streaming de horários concluído | total={total}")
+
 
 @router.get("/horarios", response_model=DisponibilidadeResponse)
 async def buscar_horarios_disponiveis(
+    request: Request,
     medico_id: int = Query(None, description="ID do médico"),
     especialidade_id: int = Query(None, description="ID da especialidade"),
     data_inicio: datetime = Query(None, description="Data de início da busca"),
     data_fim: datetime = Query(None, description="Data de fim da busca"),
-    db: Session = Depends(get_db),
+    limit: int = Query(None, description="Quantidade máxima de horários por página", ge=1),
+    cursor: str = Query(None, description="Cursor retornado na página anterior"),
+    formato: str = Query(
+        "json", description="Formato da resposta (json ou ndjson)", pattern="^(json|ndjson)$"
+    ),
+    db: Session = Depends(get_db_leitura),
 ):
-    """Busca horários disponíveis para agendamento."""
+    """
+    Busca horários disponíveis para agendamento.
+
+    Os horários são gerados sob demanda em ordem cronológica. Com `limit`, a
+    geração para assim que a página é preenchida e a resposta traz
+    `proximo_cursor` para buscar a página seguinte.
+
+    Com `formato=ndjson` (ou `Accept: application/x-ndjson`) a resposta é
+    enviada em streaming, um horário por linha, conforme os horários são
+    gerados. Indicado para períodos longos, pois o tempo até o primeiro byte
+    e o consumo de memória não dependem do tamanho do resultado.
+    """
+    if MEDIA_TYPE_NDJSON in request.headers.get("accept", ""):
+        formato = "ndjson"
+
     logger.info(
         f"[DISPONIBILIDADE] Requisição para buscar horários disponíveis | medico_id={medico_id} | "
-        f"especialidade_id={especialidade_id} | data_inicio={data_inicio} | data_fim={data_fim}"
+        f"especialidade_id={especialidade_id} | data_inicio={data_inicio} | data_fim={data_fim} | "
+        f"limit={limit} | cursor={cursor} | formato={formato}"
     )
-    
+
     try:
-        service = AgendamentoService(db)
+        apos = DisponibilidadeService.decodificar_cursor(cursor) if cursor else None
+    except ValueError:
+        logger.warning(f"[DISPONIBILIDADE] Cursor inválido | cursor={cursor}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido",
+        )
+
+    # Chave de coalescência com os parâmetros como recebidos (antes dos padrões baseados em agora)
+    chave = (
+        "horarios",
+        medico_id,
+        especialidade_id,
+        data_inicio,
+        data_fim,
+        limit,
+        cursor,
+    )
 
+    try:
         # Define período padrão se não fornecido
         if not data_inicio:
             data_inicio = datetime.now()
@@ -44,12 +118,35 @@ async def buscar_horarios_disponiveis(
             f"dias_total={(data_fim - data_inicio).days}"
         )
 
-        horarios = service.buscar_horarios_disponiveis(
-            medico_id=medico_id,
-            especialidade_id=especialidade_id,
-            data_inicio=data_inicio,
-            data_fim=data_fim,
+        def iterar(sessao: Session) -> Iterator[Dict[str, Any]]:
+            return DisponibilidadeService(sessao).iterar_horarios(
+                medico_id=medico_id,
+                especialidade_id=especialidade_id,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                apos=apos,
+            )
+
+        if formato == "ndjson":
+            # A sessão só é liberada após o envio da resposta, então pode ser
+            # usada pelo gerador durante todo o streaming
+            fluxo = iterar(db)
+            if limit:
+                fluxo = islice(fluxo, limit)
+            return StreamingResponse(_serializar_ndjson(fluxo), media_type=MEDIA_TYPE_NDJSON)
+
+        # Busca um horário a mais para saber se existe próxima página; requisições
+        # idênticas simultâneas compartilham o mesmo cálculo, separadas entre réplica
+        # e principal (janela de leitura após escrita)
+        horarios = await coalescedor.executar(
+            chave,
+            lambda sessao: list(islice(iterar(sessao), limit + 1) if limit else iterar(sessao)),
+            sessao_da_replica(db),
         )
+        proximo_cursor = None
+        if limit and len(horarios) > limit:
+            horarios = horarios[:limit]
+            proximo_cursor = DisponibilidadeService.codificar_cursor(horarios[-1])
 
         # Converte para formato de resposta
         horarios_disponiveis = [
@@ -65,13 +162,17 @@ async def buscar_horarios_disponiveis(
         logger.success(
             f"[DISPONIBILIDADE] Horários disponíveis encontrados | total={len(horarios_disponiveis)} | "
             f"medico_id={medico_id} | especialidade_id={especialidade_id} | "
-            f"periodo={data_inicio} a {data_fim}"
+            f"periodo={data_inicio} a {data_fim} | possui_proxima_pagina={proximo_cursor is not None}"
         )
 
         return DisponibilidadeResponse(
-            horarios_disponiveis=horarios_disponiveis, total=len(horarios_disponiveis)
+            horarios_disponiveis=horarios_disponiveis,
+            total=len(horarios_disponiveis),
+            proximo_cursor=proximo_cursor,
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(
             f"[DISPONIBILIDADE] Erro ao buscar horários disponíveis | medico_id={medico_id} | "
@@ -82,3 +183,178 @@ async def buscar_horarios_disponiveis(
             detail="Erro interno ao buscar horários disponíveis",
         )
 
+
+@router.get("/proximos-horarios", response_model=DisponibilidadeResponse)
+async def buscar_proximos_horarios(
+    especialidade_id: int = Query(..., description="ID da especialidade"),
+    quantidade: int = Query(5, description="Quantidade de horários", ge=1, le=50),
+    periodo: PeriodoDia = Query(None, description="Período do dia preferido"),
+    db: Session = Depends(get_db_leitura),
+):
+    """
+    Busca os próximos horários disponíveis entre todos os médicos de uma especialidade.
+
+    Retorna os N horários livres mais próximos, em ordem cronológica, sem
+    precisar buscar o período inteiro de cada médico.
+    """
+    logger.info(
+        f"[DISPONIBILIDADE] Requisição para buscar próximos horários | "
+        f"especialidade_id={especialidade_id} | quantidade={quantidade} | "
+        f"periodo={periodo.value if periodo else None}"
+    )
+
+    try:
+        horarios = await coalescedor.executar(
+            ("proximos_horarios", especialidade_id, quantidade, periodo),
+            lambda sessao: DisponibilidadeService(sessao).buscar_proximos_horarios(
+                especialidade_id=especialidade_id,
+                quantidade=quantidade,
+                periodo=periodo,
+            ),
+            sessao_da_replica(db),
+        )
+
+        horarios_disponiveis = [HorarioDisponivel(**h) for h in horarios]
+
+        logger.success(
+            f"[DISPONIBILIDADE] Próximos horários encontrados | total={len(horarios_disponiveis)} | "
+            f"especialidade_id={especialidade_id} | periodo={periodo.value if periodo else None}"
+        )
+
+        return DisponibilidadeResponse(
+            horarios_disponiveis=horarios_disponiveis, total=len(horarios_disponiveis)
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(
+            f"[DISPONIBILIDADE] Erro ao buscar próximos horários | "
+            f"especialidade_id={especialidade_id} | erro={str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao buscar próximos horários",
+        )
+
+
+@router.get("/resumo", response_model=ResumoDisponibilidadeResponse)
+async def resumir_disponibilidade(
+    data_inicio: date = Query(..., description="Primeira data do período"),
+    data_fim: date = Query(..., description="Última data do período (inclusive)"),
+    especialidade_id: int = Query(None, description="ID da especialidade"),
+    medico_ids: List[int] = Query(None, description="IDs dos médicos"),
+    db: Session = Depends(get_db_leitura),
+):
+    """
+    Resume a agenda por médico e por dia: total de horários, ocupados e livres.
+
+    Calculado com agregação no banco, sem gerar os horários individuais.
+    Indicado para a visão mensal do painel da central de atendimento.
+    """
+    logger.info(
+        f"[DISPONIBILIDADE] Requisição para resumo de disponibilidade | "
+        f"especialidade_id={especialidade_id} | medico_ids={medico_ids} | "
+        f"periodo={data_inicio} a {data_fim}"
+    )
+
+    if data_fim < data_inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="data_fim deve ser maior ou igual a data_inicio",
+        )
+    if (data_fim - data_inicio).days > MAX_DIAS_RESUMO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O período do resumo deve ter no máximo {MAX_DIAS_RESUMO} dias",
+        )
+
+    try:
+        resumo = await coalescedor.executar(
+            (
+                "resumo",
+                data_inicio,
+                data_fim,
+                especialidade_id,
+                tuple(medico_ids or ()),
+            ),
+            lambda sessao: DisponibilidadeService(sessao).resumir_periodo(
+                data_inicio,
+                data_fim,
+                especialidade_id=especialidade_id,
+                medico_ids=medico_ids,
+            ),
+            sessao_da_replica(db),
+        )
+
+        logger.success(
+            f"[DISPONIBILIDADE] Resumo de disponibilidade calculado | total={len(resumo)} | "
+            f"especialidade_id={especialidade_id} | periodo={data_inicio} a {data_fim}"
+        )
+
+        return ResumoDisponibilidadeResponse(
+            resumo=[ResumoDiaMedico(**linha) for linha in resumo],
+            total=len(resumo),
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(
+            f"[DISPONIBILIDADE] Erro ao calcular resumo de disponibilidade | "
+            f"especialidade_id={especialidade_id} | erro={str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao calcular resumo de disponibilidade",
+        )
+
+
+@router.post("/inventario/reconstruir", response_model=ReconstrucaoInventarioResponse)
+async def reconstruir_inventario(
+    medico_id: int = Query(None, description="ID do médico (padrão: todos)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Reconstrói o inventário de horários a partir das disponibilidades.
+
+    Deve ser chamado quando a agenda semanal de um médico é alterada.
+    """
+    logger.info(
+        f"[DISPONIBILIDADE] Requisição para reconstruir inventário | medico_id={medico_id}"
+    )
+
+    try:
+        total_slots = await executor_banco.executar(
+            SlotInventarioService(db).reconstruir, medico_id=medico_id
+        )
+
+        logger.success(
+            f"[DISPONIBILIDADE] Inventário reconstruído | medico_id={medico_id} | "
+            f"total_slots={total_slots}"
+        )
+        return ReconstrucaoInventarioResponse(medico_id=medico_id, total_slots=total_slots)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(
+            f"[DISPONIBILIDADE] Erro ao reconstruir inventário | medico_id={medico_id} | erro={str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno ao reconstruir inventário de horários",
+        )
+
+
+@router.get("/cache/estatisticas", response_model=CacheDisponibilidadeEstatisticas)
+async def obter_estatisticas_cache():
+    """Retorna os contadores de uso do cache de disponibilidade deste processo."""
+    estatisticas = cache_disponibilidade.estatisticas()
+    logger.info(
+        f"[DISPONIBILIDADE] Estatísticas do cache | entradas={estatisticas['entradas']} | "
+        f"acertos={estatisticas['acertos']} | falhas={estatisticas['falhas']}"
+    )
+    return CacheDisponibilidadeEstatisticas(**estatisticas)
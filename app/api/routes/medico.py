@@ -6,17 +6,16 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from loguru import logger
-from sqlalchemy.orm import Session
 
-from app.database.manager import get_db
+from app.database.manager import SessaoBanco, get_db_async, get_db_leitura_async
 from app.schemas.schemas import Medico, MedicoCreate, MedicoUpdate, Especialidade, EspecialidadeCreate
-from app.services.medico_service import MedicoService, EspecialidadeService
+from app.services.medico_service import MedicoServiceAsync, EspecialidadeServiceAsync
 
 router = APIRouter(prefix="/medicos", tags=["medicos"])
 
 
 @router.post("", response_model=Medico, status_code=status.HTTP_201_CREATED)
-async def criar_medico(medico: MedicoCreate, db: Session = Depends(get_db)):
+async def criar_medico(medico: MedicoCreate, db: SessaoBanco = Depends(get_db_async)):
     """Cria um novo médico."""
     dados = medico.model_dump()
     logger.info(
@@ -25,8 +24,8 @@ async def criar_medico(medico: MedicoCreate, db: Session = Depends(get_db)):
     )
     
     try:
-        service = MedicoService(db)
-        medico_criado = service.criar_medico(dados)
+        service = MedicoServiceAsync(db)
+        medico_criado = await service.criar_medico(dados)
 
         if not medico_criado:
             logger.warning(
@@ -63,7 +62,7 @@ async def listar_medicos(
     limit: int = 100,
     especialidade_id: Optional[int] = None,
     ativo: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    db: SessaoBanco = Depends(get_db_leitura_async),
 ):
     """Lista médicos com filtros opcionais."""
     logger.info(
@@ -72,8 +71,8 @@ async def listar_medicos(
     )
     
     try:
-        service = MedicoService(db)
-        medicos = service.listar_medicos(
+        service = MedicoServiceAsync(db)
+        medicos = await service.listar_medicos(
             skip=skip, limit=limit, especialidade_id=especialidade_id, ativo=ativo
         )
         
@@ -83,6 +82,8 @@ async def listar_medicos(
         )
         return medicos
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(
             f"[MEDICO] Erro ao listar médicos | skip={skip} | limit={limit} | erro={str(e)}"
@@ -94,13 +95,13 @@ async def listar_medicos(
 
 
 @router.get("/{medico_id}", response_model=Medico)
-async def buscar_medico(medico_id: int, db: Session = Depends(get_db)):
+async def buscar_medico(medico_id: int, db: SessaoBanco = Depends(get_db_leitura_async)):
     """Busca um médico por ID."""
     logger.debug(f"[MEDICO] Requisição para buscar médico | medico_id={medico_id}")
     
     try:
-        service = MedicoService(db)
-        medico = service.buscar_medico(medico_id)
+        service = MedicoServiceAsync(db)
+        medico = await service.buscar_medico(medico_id)
 
         if not medico:
             logger.warning(f"[MEDICO] Médico não encontrado | medico_id={medico_id}")
@@ -131,7 +132,7 @@ async def buscar_medico(medico_id: int, db: Session = Depends(get_db)):
 async def atualizar_medico(
     medico_id: int,
     medico_update: MedicoUpdate,
-    db: Session = Depends(get_db),
+    db: SessaoBanco = Depends(get_db_async),
 ):
     """Atualiza um médico."""
     dados_update = medico_update.model_dump(exclude_unset=True)
@@ -142,8 +143,8 @@ async def atualizar_medico(
     )
     
     try:
-        service = MedicoService(db)
-        medico = service.atualizar_medico(medico_id, dados_update)
+        service = MedicoServiceAsync(db)
+        medico = await service.atualizar_medico(medico_id, dados_update)
 
         if not medico:
             logger.warning(
@@ -178,15 +179,15 @@ async def atualizar_medico(
 # ========================================
 @router.post("/especialidades", response_model=Especialidade, status_code=status.HTTP_201_CREATED)
 async def criar_especialidade(
-    especialidade: EspecialidadeCreate, db: Session = Depends(get_db)
+    especialidade: EspecialidadeCreate, db: SessaoBanco = Depends(get_db_async)
 ):
     """Cria uma nova especialidade."""
     dados = especialidade.model_dump()
     logger.info(f"[ESPECIALIDADE] Requisição para criar especialidade | nome={dados.get('nome')}")
     
     try:
-        service = EspecialidadeService(db)
-        especialidade_criada = service.criar_especialidade(dados)
+        service = EspecialidadeServiceAsync(db)
+        especialidade_criada = await service.criar_especialidade(dados)
 
         if not especialidade_criada:
             logger.warning(
@@ -220,7 +221,7 @@ async def listar_especialidades(
     skip: int = 0,
     limit: int = 100,
     ativa: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    db: SessaoBanco = Depends(get_db_leitura_async),
 ):
     """Lista especialidades."""
     logger.info(
@@ -228,8 +229,8 @@ async def listar_especialidades(
     )
     
     try:
-        service = EspecialidadeService(db)
-        especialidades = service.listar_especialidades(
+        service = EspecialidadeServiceAsync(db)
+        especialidades = await service.listar_especialidades(
             skip=skip, limit=limit, ativa=ativa
         )
         
@@ -239,6 +240,8 @@ async def listar_especialidades(
         )
         return especialidades
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(
             f"[ESPECIALIDADE] Erro ao listar especialidades | skip={skip} | limit={limit} | erro={str(e)}"
@@ -250,13 +253,15 @@ async def listar_especialidades(
 
 
 @router.get("/especialidades/{especialidade_id}", response_model=Especialidade)
-async def buscar_especialidade(especialidade_id: int, db: Session = Depends(get_db)):
+async def buscar_especialidade(
+    especialidade_id: int, db: SessaoBanco = Depends(get_db_leitura_async)
+):
     """Busca uma especialidade por ID."""
     logger.debug(f"[ESPECIALIDADE] Requisição para buscar especialidade | especialidade_id={especialidade_id}")
     
     try:
-        service = EspecialidadeService(db)
-        especialidade = service.buscar_especialidade(especialidade_id)
+        service = EspecialidadeServiceAsync(db)
+        especialidade = await service.buscar_especialidade(especialidade_id)
 
         if not especialidade:
             logger.warning(f"[ESPECIALIDADE] Especialidade não encontrada | especialidade_id={especialidade_id}")
@@ -6,17 +6,16 @@ from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from loguru import logger
-from sqlalchemy.orm import Session
 
-from app.database.manager import get_db
+from app.database.manager import SessaoBanco, get_db_async, get_db_leitura_async
 from app.schemas.schemas import Paciente, PacienteCreate, PacienteUpdate
-from app.services.paciente_service import PacienteService
+from app.services.paciente_service import PacienteServiceAsync
 
 router = APIRouter(prefix="/pacientes", tags=["pacientes"])
 
 
 @router.post("", response_model=Paciente, status_code=status.HTTP_201_CREATED)
-async def criar_paciente(paciente: PacienteCreate, db: Session = Depends(get_db)):
+async def criar_paciente(paciente: PacienteCreate, db: SessaoBanco = Depends(get_db_async)):
     """Cria um novo paciente."""
     dados = paciente.model_dump()
     logger.info(
@@ -25,8 +24,8 @@ async def criar_paciente(paciente: PacienteCreate, db: Session = Depends(get_db)
     )
     
     try:
-        service = PacienteService(db)
-        paciente_criado = service.criar_paciente(dados)
+        service = PacienteServiceAsync(db)
+        paciente_criado = await service.criar_paciente(dados)
 
         if not paciente_criado:
             logger.warning(
@@ -58,13 +57,15 @@ async def criar_paciente(paciente: PacienteCreate, db: Session = Depends(get_db)
 
 
 @router.get("", response_model=List[Paciente])
-async def listar_pacientes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def listar_pacientes(
+    skip: int = 0, limit: int = 100, db: SessaoBanco = Depends(get_db_leitura_async)
+):
     """Lista pacientes."""
     logger.info(f"[PACIENTE] Requisição para listar pacientes | skip={skip} | limit={limit}")
     
     try:
-        service = PacienteService(db)
-        pacientes = service.listar_pacientes(skip=skip, limit=limit)
+        service = PacienteServiceAsync(db)
+        pacientes = await service.listar_pacientes(skip=skip, limit=limit)
         
         logger.success(
             f"[PACIENTE] Pacientes listados com sucesso | total_encontrado={len(pacientes)} | "
@@ -72,6 +73,8 @@ async def listar_pacientes(skip: int = 0, limit: int = 100, db: Session = Depend
         )
         return pacientes
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(
             f"[PACIENTE] Erro ao listar pacientes | skip={skip} | limit={limit} | erro={str(e)}"
@@ -83,13 +86,13 @@ async def listar_pacientes(skip: int = 0, limit: int = 100, db: Session = Depend
 
 
 @router.get("/{paciente_id}", response_model=Paciente)
-async def buscar_paciente(paciente_id: int, db: Session = Depends(get_db)):
+async def buscar_paciente(paciente_id: int, db: SessaoBanco = Depends(get_db_leitura_async)):
     """Busca um paciente por ID."""
     logger.debug(f"[PACIENTE] Requisição para buscar paciente | paciente_id={paciente_id}")
     
     try:
-        service = PacienteService(db)
-        paciente = service.buscar_paciente(paciente_id)
+        service = PacienteServiceAsync(db)
+        paciente = await service.buscar_paciente(paciente_id)
 
         if not paciente:
             logger.warning(f"[PACIENTE] Paciente não encontrado | paciente_id={paciente_id}")
@@ -120,7 +123,7 @@ async def buscar_paciente(paciente_id: int, db: Session = Depends(get_db)):
 async def atualizar_paciente(
     paciente_id: int,
     paciente_update: PacienteUpdate,
-    db: Session = Depends(get_db),
+    db: SessaoBanco = Depends(get_db_async),
 ):
     """Atualiza um paciente."""
     dados_update = paciente_update.model_dump(exclude_unset=True)
@@ -132,8 +135,8 @@ async def atualizar_paciente(
     )
     
     try:
-        service = PacienteService(db)
-        paciente = service.atualizar_paciente(paciente_id, dados_update)
+        service = PacienteServiceAsync(db)
+        paciente = await service.atualizar_paciente(paciente_id, dados_update)
 
         if not paciente:
             logger.warning(
@@ -164,13 +167,13 @@ async def atualizar_paciente(
 
 
 @router.delete("/{paciente_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def deletar_paciente(paciente_id: int, db: Session = Depends(get_db)):
+async def deletar_paciente(paciente_id: int, db: SessaoBanco = Depends(get_db_async)):
     """Deleta um paciente."""
     logger.info(f"[PACIENTE] Requisição para deletar paciente | paciente_id={paciente_id}")
     
     try:
-        service = PacienteService(db)
-        sucesso = service.deletar_paciente(paciente_id)
+        service = PacienteServiceAsync(db)
+        sucesso = await service.deletar_paciente(paciente_id)
 
         if not sucesso:
             logger.warning(
@@ -0,0 +1,71 @@
+"""
+Comandos administrativos da aplicação.
+
+Uso:
+    python -m app.cli reconstruir-inventario [--medico-id ID]
+    python -m app.cli reconstruir-bloqueios
+    python -m app.cli limpar-idempotencia
+    python -m app.cli limpar-reservas
+"""
+
+import click
+from loguru import logger
+
+from app.database.manager import (
+    create_tables,
+    initialize_database,
+    reconstruir_bloqueios,
+    reconstruir_inventario,
+    remover_chaves_idempotencia_expiradas,
+    remover_reservas_horario_expiradas,
+)
+
+
+@click.group()
+def cli():
+    """Comandos administrativos do sistema de agendamento."""
+
+
+@cli.command("reconstruir-inventario")
+@click.option("--medico-id", type=int, default=None, help="Reconstrói apenas este médico")
+def reconstruir_inventario_command(medico_id):
+    """Reconstrói o inventário de horários a partir das disponibilidades."""
+    initialize_database()
+    create_tables()
+
+    total = reconstruir_inventario(medico_id=medico_id)
+    logger.info(f"Inventário reconstruído | medico_id={medico_id} | total_slots={total}")
+
+
+@cli.command("reconstruir-bloqueios")
+def reconstruir_bloqueios_command():
+    """Reconstrói os bloqueios de horário a partir dos agendamentos ativos."""
+    initialize_database()
+    create_tables()
+
+    total = reconstruir_bloqueios()
+    logger.info(f"Bloqueios de horário reconstruídos | agendamentos_bloqueados={total}")
+
+
+@cli.command("limpar-idempotencia")
+def limpar_idempotencia_command():
+    """Remove as chaves de idempotência expiradas."""
+    initialize_database()
+    create_tables()
+
+    total = remover_chaves_idempotencia_expiradas()
+    logger.info(f"Chaves de idempotência expiradas removidas | total={total}")
+
+
+@cli.command("limpar-reservas")
+def limpar_reservas_command():
+    """Remove as reservas temporárias de horário expiradas."""
+    initialize_database()
+    create_tables()
+
+    total = remover_reservas_horario_expiradas()
+    logger.info(f"Reservas de horário expiradas removidas | total={total}")
+
+
+if __name__ == "__main__":
+    cli()
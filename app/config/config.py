@@ -12,6 +12,21 @@ class DataBaseType(str, Enum):
     FIREBIRD = "firebird"
 
 
+class EstrategiaTravaAgenda(str, Enum):
+    """Estratégias para serializar escritas na agenda de um médico em um dia."""
+
+    NENHUMA = "nenhuma"
+    LINHA = "linha"
+    ADVISORY = "advisory"
+
+
+class PerfilSqlite(str, Enum):
+    """Perfis de configuração das conexões SQLite."""
+
+    PADRAO = "padrao"
+    PRODUCAO = "producao"
+
+
 class Settings(BaseSettings):
     """
     Configurações da aplicação carregadas de variáveis de ambiente.
@@ -24,17 +39,58 @@ class Settings(BaseSettings):
     database_type: DataBaseType = DataBaseType.SQLITE
     database_url: str | None = None
 
+    # Pool de conexões: tamanho, conexões extras além do tamanho, espera máxima
+    # por uma conexão (segundos), ordem de reutilização (LIFO reaproveita as
+    # conexões mais recentes e deixa as ociosas expirarem) e teste da conexão
+    # antes de cada uso (pre-ping)
+    database_pool_recycle: int = 3600
+
+    # Réplica de leitura (<banco>_replica_url): rotas somente leitura usam a
+    # réplica, exceto durante a janela após uma escrita do mesmo telefone ou médico
+    database_replica_janela_segundos: int = 10
+
     # SQLite specific configuration
     sqlite_url: str = "sqlite:///./agendamento_consultas.db"
+    sqlite_replica_url: str | None = None
+    sqlite_pool_size: int = 5
+    sqlite_max_overflow: int = 10
+    sqlite_pool_timeout: float = 30
+    sqlite_pool_lifo: bool = False
+    sqlite_pool_pre_ping: bool = False
+    # Perfil "producao" (opcional): WAL, synchronous=NORMAL, busy_timeout, mmap
+    # e cache em cada conexão, e escritas serializadas por uma trava do processo
+    sqlite_perfil: PerfilSqlite = PerfilSqlite.PADRAO
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456
+    sqlite_cache_size_kib: int = 65536
+    sqlite_serializar_escritas: bool = True
 
     # Oracle specific configuration
     oracle_url: str | None = None
+    oracle_replica_url: str | None = None
+    oracle_pool_size: int = 5
+    oracle_max_overflow: int = 10
+    oracle_pool_timeout: float = 30
+    oracle_pool_lifo: bool = True
+    oracle_pool_pre_ping: bool = True
 
     # PostgreSQL specific configuration
     postgresql_url: str | None = None
+    postgresql_replica_url: str | None = None
+    postgresql_pool_size: int = 5
+    postgresql_max_overflow: int = 10
+    postgresql_pool_timeout: float = 30
+    postgresql_pool_lifo: bool = True
+    postgresql_pool_pre_ping: bool = True
 
     # Firebird specific configuration
     firebird_url: str | None = None
+    firebird_replica_url: str | None = None
+    firebird_pool_size: int = 5
+    firebird_max_overflow: int = 5
+    firebird_pool_timeout: float = 30
+    firebird_pool_lifo: bool = True
+    firebird_pool_pre_ping: bool = True
 
     # Botconversa API Configuration
     botconversa_api_url: str = "https://backend.botconversa.com.br/api/v1/webhook"
@@ -56,6 +112,10 @@ class Settings(BaseSettings):
     # Performance settings Configuration
     max_workers: int = 4
     worker_timeout: int = 30
+    # Tarefas aguardando uma das max_workers threads do executor do banco;
+    # acima disso a requisição recebe 503 com Retry-After
+    executor_banco_fila_maxima: int = 32
+    executor_banco_retry_after_segundos: int = 1
 
     # Webhook Configuration
     webhook_host: str = "0.0.0.0"
@@ -82,6 +142,37 @@ class Settings(BaseSettings):
     default_consultation_duration_minutes: int = 30
     consultation_interval_minutes: int = 30
 
+    # Slot Inventory Configuration
+    slot_inventario_habilitado: bool = False
+    slot_inventario_reconstruir_na_inicializacao: bool = True
+
+    # Booking Lock Configuration
+    trava_agenda_estrategia: EstrategiaTravaAgenda = EstrategiaTravaAgenda.LINHA
+
+    # Availability Cache Configuration
+    cache_disponibilidade_habilitado: bool = True
+    cache_disponibilidade_tamanho_maximo: int = 50000
+    cache_disponibilidade_ttl_segundos: int = 300
+
+    # Request Coalescing Configuration
+    coalescencia_requisicoes_habilitada: bool = True
+
+    # Idempotency Configuration
+    idempotencia_ttl_horas: int = 24
+    # Prazo da reserva de uma chave em processamento; vencido, uma repetição assume a chave
+    idempotencia_lease_segundos: int = 60
+
+    # Slot Hold Configuration
+    reserva_horario_ttl_minutos: int = 10
+
+    # Async Database Configuration
+    # Cria também um engine assíncrono (aiosqlite, asyncpg, oracledb) usado pelas
+    # rotas de agendamentos, médicos e pacientes; Firebird continua síncrono
+    database_async_habilitado: bool = False
+
+    # Query Budget Configuration (0 desativa o aviso)
+    orcamento_consultas_criar_agendamento_bot: int = 15
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -111,6 +202,35 @@ class Settings(BaseSettings):
                 f"Tipo de banco de dados não suportado: {self.database_type}"
             )
 
+    @property
+    def get_database_replica_url(self) -> str | None:
+        """
+        Retorna a URL da réplica de leitura do banco selecionado.
+
+        Returns:
+            str | None: URL da réplica, ou None se não houver réplica configurada
+        """
+        return getattr(self, f"{self.database_type.value}_replica_url") or None
+
+    @property
+    def get_perfil_pool(self) -> dict:
+        """
+        Retorna os parâmetros do pool de conexões do banco selecionado.
+
+        Returns:
+            dict: pool_size, max_overflow, pool_timeout, pool_use_lifo,
+            pool_pre_ping e pool_recycle, prontos para o create_engine
+        """
+        prefixo = self.database_type.value
+        return {
+            "pool_size": getattr(self, f"{prefixo}_pool_size"),
+            "max_overflow": getattr(self, f"{prefixo}_max_overflow"),
+            "pool_timeout": getattr(self, f"{prefixo}_pool_timeout"),
+            "pool_use_lifo": getattr(self, f"{prefixo}_pool_lifo"),
+            "pool_pre_ping": getattr(self, f"{prefixo}_pool_pre_ping"),
+            "pool_recycle": self.database_pool_recycle,
+        }
+
 
 settings = Settings()
 
@@ -5,5 +5,12 @@ __all__ = [
     "Disponibilidade",
     "Agendamento",
     "StatusAgendamento",
+    "SlotInventario",
+    "StatusSlot",
+    "AcaoAusencia",
+    "BloqueioHorario",
+    "TravaAgenda",
+    "ChaveIdempotencia",
+    "ReservaHorario",
 ]
 
@@ -0,0 +1,69 @@
+"""
+Contagem de comandos SQL por trecho de código.
+
+Um único listener before_cursor_execute é registrado no engine e incrementa o
+contador ativo no contexto atual (ContextVar), então requisições simultâneas
+em outras threads ou tarefas não interferem na contagem umas das outras.
+
+Usado para acompanhar o orçamento de consultas das rotas críticas: ao final
+do trecho, se o número de comandos passar do limite configurado, um aviso é
+registrado no log com o total, o que aponta regressões de N+1 ou idas extras
+ao banco sem depender de profiler.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class ContadorConsultas:
+    """Total de comandos SQL executados dentro de um trecho"""
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.total = 0
+
+
+_contador_atual: ContextVar[Optional[ContadorConsultas]] = ContextVar(
+    "contador_consultas", default=None
+)
+
+
+def _contar(conn, cursor, statement, parameters, context, executemany) -> None:
+    contador = _contador_atual.get()
+    if contador is not None:
+        contador.total += 1
+
+
+def registrar_contador(engine: Engine) -> None:
+    """Registra o listener de contagem no engine (idempotente)."""
+    if not event.contains(engine, "before_cursor_execute", _contar):
+        event.listen(engine, "before_cursor_execute", _contar)
+
+
+@contextmanager
+def orcamento_consultas(nome: str, limite: int) -> Iterator[ContadorConsultas]:
+    """
+    Conta os comandos SQL executados no bloco e avisa se passar do limite.
+
+    Args:
+        nome: Identificação do trecho nos logs
+        limite: Número máximo de comandos esperado (0 desativa o aviso)
+    """
+    contador = ContadorConsultas(nome)
+    token = _contador_atual.set(contador)
+    try:
+        yield contador
+    finally:
+        _contador_atual.reset(token)
+        if limite and contador.total > limite:
+            logger.warning(
+                f"Orçamento de consultas excedido | trecho={nome} | "
+                f"consultas={contador.total} | limite={limite}"
+            )
+        else:
+            logger.debug(f"Consultas executadas | trecho={nome} | consultas={contador.total}")
@@ -0,0 +1,178 @@
+"""
+Pool de threads limitado para o código síncrono de acesso ao banco.
+
+Os serviços síncronos (e os cálculos de disponibilidade) rodam em um
+ThreadPoolExecutor dedicado com MAX_WORKERS threads, e não no pool padrão do
+Starlette, que aceita tarefas sem limite e só as faz esperar. Além das tarefas
+em execução, no máximo EXECUTOR_BANCO_FILA_MAXIMA ficam aguardando uma thread
+livre: a partir daí novas chamadas são recusadas na hora com
+ExecutorBancoSaturado (503 com Retry-After), em vez de acumularem até estourar
+o timeout do cliente e do proxy. Uma tarefa que esperou mais que
+WORKER_TIMEOUT na fila também é descartada sem executar, já que o cliente
+provavelmente desistiu.
+
+O tempo de espera na fila e o tempo de execução de cada tarefa são acumulados
+por processo e ficam disponíveis em GET /health/executor.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, status
+from loguru import logger
+
+from app.config.config import settings
+
+
+class ExecutorBancoSaturado(HTTPException):
+    """
+    Fila do executor cheia (ou tarefa expirada na fila).
+
+    É uma HTTPException para atravessar o tratamento das rotas (que repassam
+    HTTPException e convertem as demais exceções em 500) e chegar ao cliente
+    como 503 com Retry-After.
+    """
+
+    def __init__(self, motivo: str):
+        self.motivo = motivo
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor sobrecarregado. Tente novamente em instantes.",
+            headers={"Retry-After": str(settings.executor_banco_retry_after_segundos)},
+        )
+
+
+class MetricaTempo:
+    """Quantidade, soma e máximo de uma medida de tempo em segundos"""
+
+    def __init__(self):
+        self.quantidade = 0
+        self.total = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, segundos: float) -> None:
+        self.quantidade += 1
+        self.total += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+    def resumo(self) -> Dict[str, float]:
+        media = self.total / self.quantidade if self.quantidade else 0.0
+        return {
+            "quantidade": self.quantidade,
+            "media_ms": round(media * 1000, 3),
+            "maximo_ms": round(self.maximo * 1000, 3),
+            "total_segundos": round(self.total, 3),
+        }
+
+
+class ExecutorBanco:
+    """Executa funções síncronas em um pool limitado, com fila limitada e métricas"""
+
+    def __init__(self, max_threads: int, fila_maxima: int, timeout_fila: float):
+        self.max_threads = max(1, max_threads)
+        self.fila_maxima = max(0, fila_maxima)
+        self.timeout_fila = timeout_fila
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_threads, thread_name_prefix="executor-banco"
+        )
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._em_execucao = 0
+        self.rejeitadas = 0
+        self.expiradas = 0
+        self.espera_fila = MetricaTempo()
+        self.execucao = MetricaTempo()
+
+    async def executar(self, funcao: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Executa a função no pool e aguarda o resultado sem bloquear o event loop.
+
+        O contexto (ContextVars) da requisição é copiado para a thread, então o
+        contador de consultas e afins continuam valendo dentro da função.
+
+        Raises:
+            ExecutorBancoSaturado: Fila cheia, ou a tarefa esperou mais que o timeout da fila
+        """
+        with self._lock:
+            if self._pendentes >= self.max_threads + self.fila_maxima:
+                self.rejeitadas += 1
+                pendentes = self._pendentes
+            else:
+                self._pendentes += 1
+                pendentes = None
+
+        if pendentes is not None:
+            logger.warning(
+                f"Executor do banco saturado, requisição recusada | pendentes={pendentes} | "
+                f"threads={self.max_threads} | fila_maxima={self.fila_maxima}"
+            )
+            raise ExecutorBancoSaturado("fila cheia")
+
+        enfileirada_em = time.perf_counter()
+        contexto = contextvars.copy_context()
+
+        def tarefa() -> Any:
+            inicio = time.perf_counter()
+            espera = inicio - enfileirada_em
+            with self._lock:
+                self.espera_fila.registrar(espera)
+                if self.timeout_fila and espera > self.timeout_fila:
+                    self.expiradas += 1
+                    expirada = True
+                else:
+                    self._em_execucao += 1
+                    expirada = False
+
+            if expirada:
+                logger.warning(
+                    f"Tarefa descartada após esperar na fila do executor | "
+                    f"espera={espera:.3f}s | timeout={self.timeout_fila}s"
+                )
+                raise ExecutorBancoSaturado("tempo de espera na fila esgotado")
+
+            try:
+                return contexto.run(funcao, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._em_execucao -= 1
+                    self.execucao.registrar(time.perf_counter() - inicio)
+
+        futuro = self._pool.submit(tarefa)
+        # Libera a vaga quando a tarefa termina, inclusive se a requisição for
+        # cancelada enquanto a função ainda roda na thread
+        futuro.add_done_callback(self._liberar_vaga)
+        return await asyncio.wrap_future(futuro)
+
+    def _liberar_vaga(self, _: Future) -> None:
+        with self._lock:
+            self._pendentes -= 1
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna o estado atual da fila e as métricas acumuladas deste processo."""
+        with self._lock:
+            return {
+                "threads": self.max_threads,
+                "fila_maxima": self.fila_maxima,
+                "em_execucao": self._em_execucao,
+                "na_fila": self._pendentes - self._em_execucao,
+                "rejeitadas": self.rejeitadas,
+                "expiradas": self.expiradas,
+                "espera_fila": self.espera_fila.resumo(),
+                "execucao": self.execucao.resumo(),
+            }
+
+    def desligar(self) -> None:
+        """Aguarda as tarefas em execução e descarta as que ainda estão na fila."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+executor_banco = ExecutorBanco(
+    settings.max_workers,
+    settings.executor_banco_fila_maxima,
+    settings.worker_timeout,
+)
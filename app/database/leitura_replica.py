@@ -0,0 +1,83 @@
+"""
+Janela de leitura no banco principal após uma escrita (read-your-writes).
+
+Com uma réplica de leitura configurada (<BANCO>_REPLICA_URL), as rotas somente
+leitura usam a réplica, que pode estar alguns segundos atrasada em relação ao
+principal. Para que quem acabou de escrever não leia dados antigos, cada
+escrita abre uma janela de DATABASE_REPLICA_JANELA_SEGUNDOS durante a qual as
+leituras relacionadas vão ao principal:
+- por telefone: criação de agendamento e reservas via Botconversa; a leitura
+  informa o telefone no parâmetro ?telefone=
+- por médico: qualquer commit que invalide o cache de disponibilidade do
+  médico; isso também evita que a réplica atrasada preencha o cache
+  compartilhado com a agenda anterior à escrita
+
+A janela é por processo, como o cache de disponibilidade, e deve ser maior
+que o atraso de replicação esperado.
+"""
+
+import threading
+import time
+from typing import Dict, Hashable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+
+# Acima deste número de entradas, as expiradas são removidas na próxima escrita
+LIMITE_ENTRADAS = 10000
+
+# Chave em Session.info que identifica as sessões da réplica
+CHAVE_SESSAO_REPLICA = "replica"
+
+
+def sessao_da_replica(db: Session) -> bool:
+    """Indica se a sessão lê da réplica de leitura."""
+    return bool(db.info.get(CHAVE_SESSAO_REPLICA))
+
+
+class JanelaLeituraPrincipal:
+    """Telefones e médicos com escrita recente, cujas leituras vão ao banco principal"""
+
+    def __init__(self):
+        self._expiracoes: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ativa(self) -> bool:
+        """Indica se há réplica configurada e janela maior que zero."""
+        return bool(settings.get_database_replica_url) and settings.database_replica_janela_segundos > 0
+
+    def registrar_escrita(
+        self, telefone: Optional[str] = None, medico_ids: Iterable[int] = ()
+    ) -> None:
+        """Abre (ou renova) a janela do telefone e dos médicos informados."""
+        if not self.ativa:
+            return
+        agora = time.monotonic()
+        expira_em = agora + settings.database_replica_janela_segundos
+        with self._lock:
+            if telefone:
+                self._expiracoes[("telefone", telefone)] = expira_em
+            for medico_id in medico_ids:
+                self._expiracoes[("medico", medico_id)] = expira_em
+            if len(self._expiracoes) > LIMITE_ENTRADAS:
+                self._expiracoes = {
+                    chave: expiracao
+                    for chave, expiracao in self._expiracoes.items()
+                    if expiracao > agora
+                }
+
+    def usar_principal(
+        self, telefone: Optional[str] = None, medico_id: Optional[int] = None
+    ) -> bool:
+        """Indica se a leitura do telefone ou do médico deve ir ao banco principal."""
+        agora = time.monotonic()
+        with self._lock:
+            for chave in (("telefone", telefone), ("medico", medico_id)):
+                if chave[1] is not None and self._expiracoes.get(chave, 0) > agora:
+                    return True
+        return False
+
+
+janela_leitura_principal = JanelaLeituraPrincipal()
@@ -1,9 +1,18 @@
+from typing import AsyncIterator, Optional, Union
+
+from fastapi import Query, Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 from loguru import logger
 
 from app.config.config import settings, DataBaseType
 from app.database.base import Base
+from app.database.contador_consultas import registrar_contador
+from app.database.leitura_replica import CHAVE_SESSAO_REPLICA, janela_leitura_principal
+from app.database.pool_conexoes import argumentos_pool, estatisticas_pool
+from app.database.sqlite_desempenho import argumentos_conexao_sqlite, configurar_sqlite
 
 # Importa os modelos para que sejam registrados no Base.metadata
 from app.database.models import (
@@ -13,11 +22,30 @@ from app.database.models import (
     Disponibilidade,
     Agendamento,
     StatusAgendamento,
+    SlotInventario,
+    StatusSlot,
+    BloqueioHorario,
+    TravaAgenda,
+    ChaveIdempotencia,
+    ReservaHorario,
 )
 
 # Variáveis globais para diferentes tipos de banco
 engine = None
 SessionLocal = None
+AsyncSessionLocal = None
+ReplicaSessionLocal = None
+AsyncReplicaSessionLocal = None
+
+# Sessão recebida pelas rotas que usam os serviços assíncronos
+SessaoBanco = Union[AsyncSession, Session]
+
+# Driver assíncrono de cada banco (Firebird não tem driver assíncrono)
+DRIVERS_ASSINCRONOS = {
+    DataBaseType.SQLITE: "sqlite+aiosqlite",
+    DataBaseType.POSTGRESQL: "postgresql+asyncpg",
+    DataBaseType.ORACLE: "oracle+oracledb_async",
+}
 
 
 class DatabaseManager:
@@ -27,6 +55,12 @@ class DatabaseManager:
         self.database_type = settings.database_type
         self.engine = None
         self.session_local = None
+        self.async_engine = None
+        self.async_session_local = None
+        self.replica_engine = None
+        self.replica_session_local = None
+        self.async_replica_engine = None
+        self.async_replica_session_local = None
 
     def _initialize_sqlite(self):
         """Inicializa conexão com SQLite"""
@@ -35,12 +69,13 @@ class DatabaseManager:
             if not database_url:
                 raise ValueError("SQLite URL não configurada")
 
-            # SQLite não precisa de pool, mas precisamos de check_same_thread=False para FastAPI
             self.engine = create_engine(
                 database_url,
-                connect_args={"check_same_thread": False},
-                echo=settings.debug
+                connect_args=argumentos_conexao_sqlite(),
+                echo=settings.debug,
+                **argumentos_pool(database_url),
             )
+            configurar_sqlite(self.engine)
             self.session_local = sessionmaker(
                 autocommit=False, autoflush=False, bind=self.engine
             )
@@ -65,6 +100,103 @@ class DatabaseManager:
                 f"Tipo de banco de dados não suportado: {self.database_type}"
             )
 
+        registrar_contador(self.engine)
+
+        if settings.get_database_replica_url:
+            self._initialize_replica()
+
+        if settings.database_async_habilitado:
+            self._initialize_async()
+
+    def _initialize_replica(self):
+        """
+        Inicializa o engine da réplica de leitura, com o mesmo perfil de pool do principal.
+
+        Usado apenas pelas rotas somente leitura (get_db_leitura); escritas
+        continuam sempre no engine principal.
+        """
+        try:
+            database_url = settings.get_database_replica_url
+
+            if self.database_type == DataBaseType.SQLITE:
+                self.replica_engine = create_engine(
+                    database_url,
+                    connect_args=argumentos_conexao_sqlite(),
+                    echo=settings.debug,
+                    **argumentos_pool(database_url),
+                )
+                configurar_sqlite(self.replica_engine)
+            else:
+                self.replica_engine = create_engine(
+                    database_url, echo=settings.debug, **argumentos_pool(database_url)
+                )
+            self.replica_session_local = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=self.replica_engine,
+                info={CHAVE_SESSAO_REPLICA: True},
+            )
+            registrar_contador(self.replica_engine)
+            logger.info("Conexão com a réplica de leitura inicializada com sucesso")
+
+        except Exception as e:
+            logger.error(f"Erro ao inicializar réplica de leitura: {str(e)}")
+            raise
+
+    def _initialize_async(self):
+        """
+        Inicializa o engine assíncrono, em paralelo ao síncrono.
+
+        O engine síncrono continua sendo usado pela CLI, pela inicialização e
+        pelas rotas que ainda não têm serviço assíncrono.
+        """
+        driver = DRIVERS_ASSINCRONOS.get(self.database_type)
+        if driver is None:
+            logger.warning(
+                f"Banco sem driver assíncrono, mantendo apenas o engine síncrono: "
+                f"{self.database_type.value}"
+            )
+            return
+
+        try:
+            self.async_engine = self._criar_engine_assincrono(settings.get_database_url, driver)
+            self.async_session_local = async_sessionmaker(
+                bind=self.async_engine, autoflush=False, class_=AsyncSession
+            )
+            if settings.get_database_replica_url:
+                self.async_replica_engine = self._criar_engine_assincrono(
+                    settings.get_database_replica_url, driver
+                )
+                self.async_replica_session_local = async_sessionmaker(
+                    bind=self.async_replica_engine,
+                    autoflush=False,
+                    class_=AsyncSession,
+                    info={CHAVE_SESSAO_REPLICA: True},
+                )
+            logger.info(f"Engine assíncrono inicializado com sucesso: {driver}")
+
+        except Exception as e:
+            logger.error(f"Erro ao inicializar engine assíncrono: {str(e)}")
+            raise
+
+    def _criar_engine_assincrono(self, url: str, driver: str):
+        """Cria um engine assíncrono para a URL trocando o driver"""
+        engine = create_async_engine(
+            make_url(url).set(drivername=driver),
+            echo=settings.debug,
+            **argumentos_pool(url, assincrono=True),
+        )
+        if self.database_type == DataBaseType.SQLITE:
+            configurar_sqlite(engine.sync_engine)
+        registrar_contador(engine.sync_engine)
+        return engine
+
+    async def dispose_async(self):
+        """Fecha as conexões dos engines assíncronos"""
+        for engine in (self.async_engine, self.async_replica_engine):
+            if engine is not None:
+                await engine.dispose()
+
     def _initialize_oracle(self):
         """Inicializa conexão com Oracle"""
         try:
@@ -73,7 +205,7 @@ class DatabaseManager:
                 raise ValueError("Oracle URL não configurada")
 
             self.engine = create_engine(
-                database_url, pool_pre_ping=True, pool_recycle=3600, echo=settings.debug
+                database_url, echo=settings.debug, **argumentos_pool(database_url)
             )
             self.session_local = sessionmaker(
                 autocommit=False, autoflush=False, bind=self.engine
@@ -92,7 +224,7 @@ class DatabaseManager:
                 raise ValueError("PostgreSQL URL não configurada")
 
             self.engine = create_engine(
-                database_url, pool_pre_ping=True, pool_recycle=3600, echo=settings.debug
+                database_url, echo=settings.debug, **argumentos_pool(database_url)
             )
             self.session_local = sessionmaker(
                 autocommit=False, autoflush=False, bind=self.engine
@@ -111,7 +243,7 @@ class DatabaseManager:
                 raise ValueError("Firebird URL não configurada")
 
             self.engine = create_engine(
-                database_url, pool_pre_ping=True, pool_recycle=3600, echo=settings.debug
+                database_url, echo=settings.debug, **argumentos_pool(database_url)
             )
             self.session_local = sessionmaker(
                 autocommit=False, autoflush=False, bind=self.engine
@@ -122,6 +254,22 @@ class DatabaseManager:
             logger.error(f"Erro ao inicializar Firebird: {str(e)}")
             raise
 
+    def estatisticas_pool(self) -> dict:
+        """Retorna o estado dos pools de conexões do principal e da réplica"""
+        return {
+            "banco": self.database_type.value,
+            "sincrono": estatisticas_pool(self.engine),
+            "assincrono": estatisticas_pool(
+                self.async_engine.sync_engine if self.async_engine is not None else None
+            ),
+            "replica": estatisticas_pool(self.replica_engine),
+            "replica_assincrono": estatisticas_pool(
+                self.async_replica_engine.sync_engine
+                if self.async_replica_engine is not None
+                else None
+            ),
+        }
+
     def get_session(self):
         """Retorna uma sessão do banco de dados"""
         if self.database_type in [
@@ -161,7 +309,7 @@ db_manager = DatabaseManager()
 
 def initialize_database():
     """Inicializa o banco de dados globalmente"""
-    global engine, SessionLocal
+    global engine, SessionLocal, AsyncSessionLocal, ReplicaSessionLocal, AsyncReplicaSessionLocal
 
     db_manager.initialize_database()
 
@@ -173,6 +321,9 @@ def initialize_database():
     ]:
         engine = db_manager.engine
         SessionLocal = db_manager.session_local
+        AsyncSessionLocal = db_manager.async_session_local
+        ReplicaSessionLocal = db_manager.replica_session_local
+        AsyncReplicaSessionLocal = db_manager.async_replica_session_local
 
 
 def get_db():
@@ -197,7 +348,152 @@ def get_db():
         )
 
 
+async def get_db_async() -> AsyncIterator[SessaoBanco]:
+    """
+    Dependency para FastAPI das rotas com serviços assíncronos.
+
+    Retorna uma AsyncSession quando DATABASE_ASYNC_HABILITADO está ativo e o
+    banco tem driver assíncrono; caso contrário, uma sessão síncrona, que os
+    serviços assíncronos usam em uma thread do pool para não bloquear o event loop.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    if not SessionLocal:
+        raise RuntimeError("Banco de dados não inicializado")
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _ler_da_replica(request: Request, telefone: Optional[str]) -> bool:
+    """
+    Indica se a leitura pode ir à réplica.
+
+    Vai ao principal durante a janela após uma escrita do telefone informado ou
+    do médico da rota (parâmetro medico_id do caminho ou da query).
+    """
+    medico_id = request.path_params.get("medico_id") or request.query_params.get("medico_id")
+    try:
+        medico_id = int(medico_id) if medico_id is not None else None
+    except ValueError:
+        medico_id = None
+    return not janela_leitura_principal.usar_principal(telefone=telefone, medico_id=medico_id)
+
+
+def get_db_leitura(
+    request: Request,
+    telefone: Optional[str] = Query(
+        None, description="Telefone do paciente; logo após uma escrita dele a leitura usa o banco principal"
+    ),
+):
+    """
+    Dependency para FastAPI das rotas somente leitura - retorna sessão da réplica.
+
+    Sem réplica configurada, ou dentro da janela de leitura do telefone ou do
+    médico, retorna uma sessão do banco principal.
+    """
+    if ReplicaSessionLocal is not None and _ler_da_replica(request, telefone):
+        db = ReplicaSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+
+    yield from get_db()
+
+
+async def get_db_leitura_async(
+    request: Request,
+    telefone: Optional[str] = Query(
+        None, description="Telefone do paciente; logo após uma escrita dele a leitura usa o banco principal"
+    ),
+) -> AsyncIterator[SessaoBanco]:
+    """
+    Dependency para FastAPI das rotas somente leitura com serviços assíncronos.
+
+    Mesma escolha de get_db_leitura, retornando uma AsyncSession quando o
+    engine assíncrono da réplica existe.
+    """
+    if ReplicaSessionLocal is not None and _ler_da_replica(request, telefone):
+        if AsyncReplicaSessionLocal is not None:
+            async with AsyncReplicaSessionLocal() as db:
+                yield db
+            return
+
+        db = ReplicaSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+
+    async for db in get_db_async():
+        yield db
+
+
+def abrir_sessao_leitura(replica: bool) -> Session:
+    """
+    Abre uma sessão de leitura própria, fora do ciclo de vida de uma requisição.
+
+    Usa a réplica quando solicitado e configurada; caso contrário, o banco
+    principal. Quem abre a sessão é responsável por fechá-la.
+    """
+    if replica and ReplicaSessionLocal is not None:
+        return ReplicaSessionLocal()
+    return db_manager.get_session()
+
+
 def create_tables():
     """Cria as tabelas no banco de dados"""
     db_manager.create_tables()
 
+
+def reconstruir_inventario(medico_id=None) -> int:
+    """Reconstrói o inventário de horários usando uma sessão própria"""
+    from app.services.slot_inventario_service import SlotInventarioService
+
+    db = db_manager.get_session()
+    try:
+        return SlotInventarioService(db).reconstruir(medico_id=medico_id)
+    finally:
+        db.close()
+
+
+def reconstruir_bloqueios() -> int:
+    """Reconstrói os bloqueios de horário usando uma sessão própria"""
+    from app.services.bloqueio_horario_service import BloqueioHorarioService
+
+    db = db_manager.get_session()
+    try:
+        return BloqueioHorarioService(db).reconstruir()
+    finally:
+        db.close()
+
+
+def remover_chaves_idempotencia_expiradas() -> int:
+    """Remove as chaves de idempotência expiradas usando uma sessão própria"""
+    from app.services.idempotencia_service import IdempotenciaService
+
+    db = db_manager.get_session()
+    try:
+        return IdempotenciaService(db).remover_expiradas()
+    finally:
+        db.close()
+
+
+def remover_reservas_horario_expiradas() -> int:
+    """Remove as reservas de horário expiradas usando uma sessão própria"""
+    from app.services.reserva_horario_service import ReservaHorarioService
+
+    db = db_manager.get_session()
+    try:
+        return ReservaHorarioService(db).remover_expiradas()
+    finally:
+        db.close()
@@ -4,13 +4,16 @@ from datetime import time
 from sqlalchemy import (
     Boolean,
     Column,
+    Date,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     Time,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -39,6 +42,36 @@ class StatusAgendamento(enum.Enum):
     FALTA = "falta"
 
 
+class StatusSlot(enum.Enum):
+    """
+    Enumeração dos possíveis estados de um slot do inventário de horários.
+
+    Attributes:
+        LIVRE: Slot disponível para agendamento
+        RESERVADO: Slot reservado temporariamente durante uma conversa
+        OCUPADO: Slot ocupado por um agendamento
+    """
+
+    LIVRE = "livre"
+    RESERVADO = "reservado"
+    OCUPADO = "ocupado"
+
+
+class AcaoAusencia(str, enum.Enum):
+    """
+    Ações possíveis para os agendamentos de um médico ausente.
+
+    Attributes:
+        CANCELAR: Cancela todos os agendamentos do período
+        REAGENDAR: Move cada agendamento para o próximo horário livre do mesmo médico após o período
+        TRANSFERIR: Move cada agendamento para o primeiro horário livre de outro médico da mesma especialidade
+    """
+
+    CANCELAR = "cancelar"
+    REAGENDAR = "reagendar"
+    TRANSFERIR = "transferir"
+
+
 class Paciente(Base):
     """
     Modelo para representar um paciente no sistema.
@@ -185,6 +218,7 @@ class Agendamento(Base):
         confirmado_em: Data/hora da confirmação
         cancelado_em: Data/hora do cancelamento
         motivo_cancelamento: Motivo do cancelamento
+        versao: Contador de versão para controle de concorrência otimista
         criado_em: Data/hora de criação do registro
         atualizado_em: Data/hora da última atualização
         paciente: Relacionamento com o paciente
@@ -223,9 +257,170 @@ class Agendamento(Base):
     enviado_em = Column(DateTime(timezone=True))
     respondido_em = Column(DateTime(timezone=True))
 
+    # Incrementada a cada UPDATE; o UPDATE só é aplicado se a versão no banco
+    # ainda for a versão carregada (StaleDataError caso contrário)
+    versao = Column(Integer, nullable=False, default=1, server_default="1")
+
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
     atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
 
     paciente = relationship("Paciente", back_populates="agendamentos")
     medico = relationship("Medico", back_populates="agendamentos")
 
+    __mapper_args__ = {"version_id_col": versao}
+
+
+class SlotInventario(Base):
+    """
+    Modelo para o inventário materializado de horários dos médicos.
+
+    Cada linha representa um slot de consulta de um médico, gerado a partir das
+    disponibilidades semanais dentro do horizonte de agendamento. O estado do
+    slot é mantido incrementalmente pelas operações de agendamento, permitindo
+    consultar horários livres com uma única varredura indexada.
+
+    Attributes:
+        id: Identificador único do slot
+        medico_id: ID do médico (chave estrangeira)
+        data_hora: Data e hora de início do slot
+        status: Estado atual do slot (livre, reservado ou ocupado)
+        atualizado_em: Data/hora da última atualização
+        medico: Relacionamento com o médico
+    """
+
+    __tablename__ = "slots_inventario"
+    __table_args__ = (
+        UniqueConstraint("medico_id", "data_hora", name="uq_slots_inventario_medico_data_hora"),
+        Index("ix_slots_inventario_medico_status_data_hora", "medico_id", "status", "data_hora"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    medico_id = Column(Integer, ForeignKey("medicos.id"), nullable=False)
+    data_hora = Column(DateTime, nullable=False)
+    status = Column(Enum(StatusSlot), default=StatusSlot.LIVRE, nullable=False)
+
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    medico = relationship("Medico")
+
+
+class BloqueioHorario(Base):
+    """
+    Modelo para os bloqueios de horário que garantem agendamentos sem sobreposição.
+
+    Cada agendamento ativo ocupa uma linha por célula da grade de horários
+    (consultation_interval_minutes) que toca. A restrição única em
+    (medico_id, inicio) faz o próprio banco rejeitar, na mesma transação do
+    agendamento, qualquer outro agendamento que ocupe a mesma célula.
+
+    Attributes:
+        id: Identificador único do bloqueio
+        medico_id: ID do médico (chave estrangeira)
+        inicio: Início da célula bloqueada
+        agendamento_id: ID do agendamento dono do bloqueio (chave estrangeira)
+        criado_em: Data/hora de criação do registro
+    """
+
+    __tablename__ = "bloqueios_horario"
+    __table_args__ = (
+        UniqueConstraint("medico_id", "inicio", name="uq_bloqueios_horario_medico_inicio"),
+        Index("ix_bloqueios_horario_agendamento_id", "agendamento_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    medico_id = Column(Integer, ForeignKey("medicos.id"), nullable=False)
+    inicio = Column(DateTime, nullable=False)
+    agendamento_id = Column(
+        Integer, ForeignKey("agendamentos.id", ondelete="CASCADE"), nullable=False
+    )
+
+    criado_em = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TravaAgenda(Base):
+    """
+    Modelo para as travas de escrita da agenda de um médico em um dia.
+
+    Criação e reagendamento de agendamentos bloqueiam a linha (SELECT ... FOR
+    UPDATE) do médico e dia afetados antes de validar o horário, serializando
+    apenas as escritas concorrentes na mesma agenda. As linhas são criadas sob
+    demanda na primeira escrita do dia.
+
+    Attributes:
+        medico_id: ID do médico (chave estrangeira)
+        dia: Dia da agenda
+    """
+
+    __tablename__ = "travas_agenda"
+
+    medico_id = Column(Integer, ForeignKey("medicos.id"), primary_key=True)
+    dia = Column(Date, primary_key=True)
+
+
+class ChaveIdempotencia(Base):
+    """
+    Modelo para as chaves de idempotência das requisições de criação.
+
+    A chave é reservada antes do processamento (sem resposta, com prazo em
+    em_andamento_ate) e recebe o status e o corpo da resposta na mesma
+    transação do agendamento; a resposta é devolvida em repetições da mesma
+    requisição até expira_em. Uma reserva sem resposta com o prazo vencido
+    (processo interrompido) pode ser assumida por uma repetição.
+
+    Attributes:
+        chave: Valor do cabeçalho Idempotency-Key
+        rota: Rota que recebeu a requisição
+        hash_requisicao: SHA-256 do corpo da requisição original
+        status_code: Status HTTP da resposta armazenada (vazio enquanto em andamento)
+        resposta: Corpo JSON da resposta armazenada
+        em_andamento_ate: Prazo da reserva enquanto a requisição é processada
+        criado_em: Data/hora de criação do registro
+        expira_em: Data/hora a partir da qual a chave pode ser reutilizada
+    """
+
+    __tablename__ = "chaves_idempotencia"
+
+    chave = Column(String(255), primary_key=True)
+    rota = Column(String(100), nullable=False)
+    hash_requisicao = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    resposta = Column(Text)
+    em_andamento_ate = Column(DateTime)
+
+    criado_em = Column(DateTime(timezone=True), server_default=func.now())
+    expira_em = Column(DateTime, nullable=False, index=True)
+
+
+class ReservaHorario(Base):
+    """
+    Modelo para as reservas temporárias de horário durante a conversa no Botconversa.
+
+    Entre a listagem de horários e a criação do agendamento o paciente pode
+    levar alguns minutos para responder. A reserva retira o horário da
+    disponibilidade dos demais pacientes até expira_em; reservas expiradas são
+    ignoradas nas consultas (filtro indexado por expira_em) e removidas em lote.
+
+    Attributes:
+        id: Identificador único da reserva
+        medico_id: ID do médico (chave estrangeira)
+        data_hora: Início do horário reservado
+        duracao_minutos: Duração do horário reservado
+        telefone: Telefone do paciente dono da reserva
+        criado_em: Data/hora de criação do registro
+        expira_em: Data/hora em que a reserva deixa de valer
+    """
+
+    __tablename__ = "reservas_horario"
+    __table_args__ = (
+        Index("ix_reservas_horario_medico_data_hora", "medico_id", "data_hora"),
+        UniqueConstraint("telefone", name="uq_reservas_horario_telefone"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    medico_id = Column(Integer, ForeignKey("medicos.id"), nullable=False)
+    data_hora = Column(DateTime, nullable=False)
+    duracao_minutos = Column(Integer, nullable=False)
+    telefone = Column(String(20), nullable=False)
+
+    criado_em = Column(DateTime(timezone=True), server_default=func.now())
+    expira_em = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,101 @@
+"""
+Pool de conexões com medição do tempo de espera por conexão.
+
+Os engines usam QueuePool (ou AsyncAdaptedQueuePool no engine assíncrono) com
+o perfil de cada banco definido em Settings (tamanho, overflow, timeout,
+LIFO/FIFO, pre-ping). As subclasses abaixo apenas cronometram a obtenção de
+cada conexão (espera na fila do pool, mais a abertura de uma conexão nova
+quando há overflow) e contam os esgotamentos, quando o pool_timeout estoura
+sem conexão livre. O estado do pool e esses números ficam em GET /health/db.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+from app.config.config import settings, DataBaseType
+from app.database.executor_banco import MetricaTempo
+
+
+class MedicaoPool:
+    """Mixin que cronometra a obtenção de conexões de um QueuePool"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._lock_medicao = threading.Lock()
+        self.espera_conexao = MetricaTempo()
+        self.esgotamentos = 0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._lock_medicao:
+                self.esgotamentos += 1
+            logger.warning(
+                f"Pool de conexões esgotado | tamanho={self.size()} | "
+                f"em_uso={self.checkedout()} | timeout={self._timeout}s"
+            )
+            raise
+        finally:
+            with self._lock_medicao:
+                self.espera_conexao.registrar(time.perf_counter() - inicio)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna a ocupação atual do pool e o tempo de espera por conexão."""
+        with self._lock_medicao:
+            espera = self.espera_conexao.resumo()
+            esgotamentos = self.esgotamentos
+        return {
+            "tamanho": self.size(),
+            "max_overflow": self._max_overflow,
+            "em_uso": self.checkedout(),
+            "ociosas": self.checkedin(),
+            # overflow() é negativo enquanto o pool não atingiu o tamanho
+            "overflow": max(0, self.overflow()),
+            "timeout_segundos": self._timeout,
+            "esgotamentos": esgotamentos,
+            "espera_conexao": espera,
+        }
+
+
+class QueuePoolMedido(MedicaoPool, QueuePool):
+    """QueuePool com medição do tempo de espera por conexão"""
+
+
+class AsyncQueuePoolMedido(MedicaoPool, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool com medição do tempo de espera por conexão"""
+
+
+def argumentos_pool(database_url: str, assincrono: bool = False) -> Dict[str, Any]:
+    """
+    Monta os argumentos de pool do create_engine para o banco configurado.
+
+    SQLite em memória usa uma única conexão compartilhada (StaticPool): cada
+    conexão nova abriria um banco vazio, inclusive nas threads do executor.
+    """
+    if settings.database_type == DataBaseType.SQLITE and make_url(database_url).database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        return {"poolclass": StaticPool}
+
+    perfil = settings.get_perfil_pool
+    perfil["poolclass"] = AsyncQueuePoolMedido if assincrono else QueuePoolMedido
+    return perfil
+
+
+def estatisticas_pool(engine: Optional[Engine]) -> Optional[Dict[str, Any]]:
+    """Retorna as estatísticas do pool do engine, ou None se ele não tiver medição."""
+    if engine is None:
+        return None
+    if not isinstance(engine.pool, MedicaoPool):
+        return {"classe": type(engine.pool).__name__, "estado": engine.pool.status()}
+    return {"classe": type(engine.pool).__name__, **engine.pool.estatisticas()}
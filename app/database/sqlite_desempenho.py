@@ -0,0 +1,123 @@
+"""
+Perfil de produção do SQLite: WAL, pragmas ajustados e serialização de escritas.
+
+No perfil "producao" (SQLITE_PERFIL), cada conexão aberta pelo pool recebe:
+- journal_mode=WAL: leituras não bloqueiam durante uma escrita e vice-versa
+- synchronous=NORMAL: seguro com WAL, sem fsync a cada commit
+- busy_timeout: espera pelo lock do banco em vez de falhar com "database is locked"
+- mmap_size e cache_size: leituras servidas da memória
+
+O SQLite aceita um único escritor por vez. Com SQLITE_SERIALIZAR_ESCRITAS, as
+conexões do engine síncrono são criadas por ConexaoSqlite, que adquire uma
+trava do processo no primeiro comando de escrita da transação e a libera após
+o commit ou rollback. As threads passam a aguardar em fila pela vez de
+escrever, em vez de disputarem o lock do arquivo pelo busy handler do SQLite
+(que tenta em intervalos e pode estourar o timeout sob concorrência). Entre
+processos (vários workers do uvicorn) continua valendo o busy_timeout.
+"""
+
+import sqlite3
+import threading
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config.config import settings, PerfilSqlite
+
+# Comandos que pegam o lock de escrita do SQLite
+COMANDOS_ESCRITA = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+_trava_escrita = threading.Lock()
+
+
+class CursorSqlite(sqlite3.Cursor):
+    """Cursor que adquire a trava de escrita antes do primeiro comando de escrita"""
+
+    def execute(self, sql, parameters=()):
+        self.connection.adquirir_trava_escrita(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection.adquirir_trava_escrita(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+class ConexaoSqlite(sqlite3.Connection):
+    """Conexão sqlite3 que serializa as transações de escrita do processo"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.com_trava_escrita = False
+
+    def cursor(self, factory=CursorSqlite):
+        return super().cursor(factory)
+
+    def adquirir_trava_escrita(self, sql: str) -> None:
+        if self.com_trava_escrita or not sql.lstrip()[:7].upper().startswith(COMANDOS_ESCRITA):
+            return
+        if _trava_escrita.acquire(timeout=settings.sqlite_busy_timeout_ms / 1000):
+            self.com_trava_escrita = True
+        else:
+            # Segue sem a trava: o busy_timeout do SQLite decide
+            logger.warning(
+                f"Tempo esgotado aguardando a trava de escrita do SQLite | "
+                f"timeout={settings.sqlite_busy_timeout_ms}ms"
+            )
+
+    def _liberar_trava_escrita(self) -> None:
+        if self.com_trava_escrita:
+            self.com_trava_escrita = False
+            _trava_escrita.release()
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self._liberar_trava_escrita()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._liberar_trava_escrita()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._liberar_trava_escrita()
+
+
+def perfil_producao() -> bool:
+    """Indica se o perfil de produção do SQLite está ativo."""
+    return settings.sqlite_perfil == PerfilSqlite.PRODUCAO
+
+
+def argumentos_conexao_sqlite() -> dict:
+    """Retorna os connect_args do engine síncrono do SQLite."""
+    argumentos = {"check_same_thread": False}
+    if perfil_producao() and settings.sqlite_serializar_escritas:
+        argumentos["factory"] = ConexaoSqlite
+    return argumentos
+
+
+def _aplicar_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        # Valor negativo: tamanho em KiB, e não em páginas
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+    finally:
+        cursor.close()
+
+
+def configurar_sqlite(engine: Engine) -> None:
+    """Aplica os pragmas do perfil de produção em cada conexão nova do engine (idempotente)."""
+    if not perfil_producao():
+        return
+    if not event.contains(engine, "connect", _aplicar_pragmas):
+        event.listen(engine, "connect", _aplicar_pragmas)
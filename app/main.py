@@ -7,7 +7,15 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 
 from app.config.config import settings
-from app.database.manager import create_tables, initialize_database
+from app.database.executor_banco import executor_banco
+from app.database.manager import (
+    create_tables,
+    db_manager,
+    initialize_database,
+    reconstruir_inventario,
+    remover_chaves_idempotencia_expiradas,
+    remover_reservas_horario_expiradas,
+)
 
 # Configuração de logs
 logger.remove()
@@ -50,6 +58,17 @@ async def startup_event():
         create_tables()
         logger.info("Tabelas criadas/verificadas")
 
+        # Avança o horizonte do inventário de horários
+        if (
+            settings.slot_inventario_habilitado
+            and settings.slot_inventario_reconstruir_na_inicializacao
+        ):
+            reconstruir_inventario()
+            logger.info("Inventário de horários reconstruído")
+
+        remover_chaves_idempotencia_expiradas()
+        remover_reservas_horario_expiradas()
+
         logger.info("Aplicação inicializada com sucesso!")
 
     except Exception as e:
@@ -61,6 +80,8 @@ async def startup_event():
 async def shutdown_event():
     """Evento executado no encerramento da aplicação"""
     logger.info("Encerrando aplicação...")
+    await db_manager.dispose_async()
+    executor_banco.desligar()
 
 
 # Middleware para logging de requisições
@@ -111,6 +132,18 @@ async def health_check():
     }
 
 
+@app.get("/health/db")
+async def health_db():
+    """Conexões em uso, ociosas e em overflow dos pools e tempo de espera por conexão"""
+    return db_manager.estatisticas_pool()
+
+
+@app.get("/health/executor")
+async def health_executor():
+    """Ocupação da fila do executor do banco e tempos de espera e execução deste processo"""
+    return executor_banco.estatisticas()
+
+
 # Inclusão dos routers
 from app.api.routes import agendamento, paciente, medico, disponibilidade, botconversa
 
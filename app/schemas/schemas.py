@@ -1,9 +1,9 @@
 from datetime import datetime, date, time
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
-from app.database.models import StatusAgendamento
+from app.database.models import AcaoAusencia, StatusAgendamento
 
 
 # ========================================
@@ -132,19 +132,27 @@ class AgendamentoCreate(AgendamentoBase):
     pass
 
 
+class AgendamentoLoteCreate(BaseModel):
+    agendamentos: list[AgendamentoCreate] = Field(..., min_length=1, max_length=500)
+    tudo_ou_nada: bool = False  # Se True, nada é criado quando algum item é rejeitado
+
+
 class AgendamentoUpdate(BaseModel):
     data_hora: Optional[datetime] = None
     observacoes: Optional[str] = None
     status: Optional[StatusAgendamento] = None
+    versao: Optional[int] = None  # Versão esperada; 409 se o agendamento mudou
 
 
 class AgendamentoReagendar(BaseModel):
     nova_data_hora: datetime
     motivo: Optional[str] = None
+    versao: Optional[int] = None  # Versão esperada; 409 se o agendamento mudou
 
 
 class AgendamentoCancelar(BaseModel):
     motivo: str
+    versao: Optional[int] = None  # Versão esperada; 409 se o agendamento mudou
 
 
 class Agendamento(AgendamentoBase):
@@ -154,6 +162,7 @@ class Agendamento(AgendamentoBase):
     medico: Optional[Medico] = None
     confirmado_em: Optional[datetime] = None
     cancelado_em: Optional[datetime] = None
+    versao: int
     criado_em: datetime
     atualizado_em: Optional[datetime] = None
 
@@ -161,6 +170,60 @@ class Agendamento(AgendamentoBase):
         from_attributes = True
 
 
+class ResultadoItemLote(BaseModel):
+    """Resultado da criação de um item do lote"""
+
+    indice: int  # Posição do item na requisição
+    sucesso: bool
+    agendamento: Optional[Agendamento] = None
+    motivo: Optional[str] = None  # Motivo da rejeição
+
+
+class AgendamentoLoteResponse(BaseModel):
+    """Resposta da criação de agendamentos em lote"""
+
+    resultados: list[ResultadoItemLote]
+    total: int
+    criados: int
+    rejeitados: int
+
+
+class AusenciaMedicoRequest(BaseModel):
+    """Dados da ausência de um médico"""
+
+    medico_id: int
+    data_inicio: date
+    data_fim: date  # Inclusive
+    acao: AcaoAusencia
+    motivo: Optional[str] = None
+
+
+class ItemAusenciaMedico(BaseModel):
+    """Situação de um agendamento após o tratamento da ausência"""
+
+    agendamento_id: int
+    paciente_id: int
+    situacao: str  # cancelado, reagendado ou sem_horario
+    medico_id_anterior: int
+    data_hora_anterior: datetime
+    medico_id: int
+    data_hora: datetime
+
+
+class ResumoAusenciaMedico(BaseModel):
+    """Resumo do tratamento da ausência de um médico"""
+
+    medico_id: int
+    data_inicio: date
+    data_fim: date
+    acao: AcaoAusencia
+    total: int
+    cancelados: int
+    reagendados: int
+    sem_horario: int
+    itens: list[ItemAusenciaMedico]
+
+
 # ========================================
 # Schemas de Disponibilidade de Horários
 # ========================================
@@ -187,6 +250,47 @@ class DisponibilidadeResponse(BaseModel):
 
     horarios_disponiveis: list[HorarioDisponivel]
     total: int
+    proximo_cursor: Optional[str] = None
+
+
+class ResumoDiaMedico(BaseModel):
+    """Schema para o resumo da agenda de um médico em um dia"""
+
+    medico_id: int
+    medico_nome: str
+    data: date
+    total_horarios: int
+    horarios_ocupados: int
+    horarios_livres: int
+    total_agendamentos: int
+
+
+class ResumoDisponibilidadeResponse(BaseModel):
+    """Schema para resposta do resumo de disponibilidade"""
+
+    resumo: list[ResumoDiaMedico]
+    total: int
+    data_inicio: date
+    data_fim: date
+
+
+class ReconstrucaoInventarioResponse(BaseModel):
+    """Schema para resposta da reconstrução do inventário de horários"""
+
+    medico_id: Optional[int] = None
+    total_slots: int
+
+
+class CacheDisponibilidadeEstatisticas(BaseModel):
+    """Schema para estatísticas do cache de disponibilidade"""
+
+    habilitado: bool
+    entradas: int
+    tamanho_maximo: int
+    acertos: int
+    falhas: int
+    remocoes: int
+    taxa_acerto: float
 
 
 # ========================================
@@ -244,6 +348,7 @@ class DataDisponivelBotconversa(BaseModel):
     data: date  # Formato: YYYY-MM-DD
     data_formatada: str  # Formato legível: "19/12/2024"
     dia_semana: str  # Ex: "Quinta-feira"
+    total_horarios_livres: int  # Quantidade de horários livres na data
 
 
 class HorarioDisponivelBotconversa(BaseModel):
@@ -300,6 +405,32 @@ class AgendamentoBotconversaCreate(BaseModel):
     nome_paciente: Optional[str] = None  # Se fornecido, atualiza ou cria paciente
 
 
+class ReservaHorarioBotconversaCreate(BaseModel):
+    """Schema para reservar temporariamente um horário via Botconversa"""
+
+    telefone: str  # Telefone do paciente dono da reserva
+    medico_id: int
+    data_hora: datetime  # Horário escolhido
+    duracao_minutos: Optional[int] = None  # Padrão: duração padrão da consulta
+
+
+class ReservaHorarioLiberar(BaseModel):
+    """Schema para liberar a reserva temporária de um telefone"""
+
+    telefone: str
+
+
+class ReservaHorarioResponse(BaseModel):
+    """Resposta com os dados da reserva temporária"""
+
+    reserva_id: int
+    telefone: str
+    medico_id: int
+    data_hora: datetime
+    duracao_minutos: int
+    expira_em: datetime  # Após este momento o horário volta a ficar disponível
+
+
 class AgendamentoConfirmacaoResponse(BaseModel):
     """Resposta com mensagem de confirmação do agendamento"""
 
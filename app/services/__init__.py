@@ -1,2 +1,8 @@
-__all__ = ["PacienteService", "AgendamentoService", "MedicoService", "EspecialidadeService"]
+__all__ = [
+    "PacienteService",
+    "AgendamentoService",
+    "MedicoService",
+    "EspecialidadeService",
+    "DisponibilidadeService",
+]
 
@@ -3,25 +3,156 @@ Serviço para gestão de agendamentos.
 
 Este serviço gerencia:
 - CRUD de agendamentos
+- Criação em lote com validação única
 - Validação de disponibilidade
 - Verificação de conflitos de horário
 - Reagendamento e cancelamento
 """
 
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta, date
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, List, Optional, Dict, Any, Set, Tuple
+from datetime import datetime, timedelta, date, time
 from loguru import logger
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, delete, insert, or_, select, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.database.models import (
     Agendamento,
     Medico,
+    Paciente,
     Disponibilidade,
+    ReservaHorario,
     StatusAgendamento,
 )
 from app.config.config import settings
+from app.services.disponibilidade_service import (
+    DisponibilidadeService,
+    MARGEM_BUSCA_AGENDAMENTOS,
+    STATUS_OCUPANTES,
+)
+from app.services.mapa_ocupacao import MapaOcupacao
+from app.services.cache_disponibilidade import marcar_para_invalidacao
+from app.services.slot_inventario_service import SlotInventarioService
+from app.services.bloqueio_horario_service import BloqueioHorarioService
+from app.services.trava_agenda_service import TravaAgendaService
+from app.services.servico_assincrono import ServicoAssincrono
+
+
+class ConflitoVersaoAgendamento(Exception):
+    """O agendamento foi alterado por outra requisição desde a versão informada"""
+
+    def __init__(self, agendamento_id: int, versao_esperada: Optional[int] = None):
+        self.agendamento_id = agendamento_id
+        self.versao_esperada = versao_esperada
+        super().__init__(
+            f"Agendamento {agendamento_id} alterado por outra requisição "
+            f"(versão esperada: {versao_esperada})"
+        )
+
+
+class TransicaoStatusInvalida(Exception):
+    """O status atual do agendamento não permite a transição pedida"""
+
+    def __init__(
+        self,
+        agendamento_id: int,
+        status_atual: StatusAgendamento,
+        status_novo: StatusAgendamento,
+    ):
+        self.agendamento_id = agendamento_id
+        self.status_atual = status_atual
+        self.status_novo = status_novo
+        super().__init__(
+            f"Agendamento {agendamento_id} não pode passar de "
+            f"{status_atual.value} para {status_novo.value}"
+        )
+
+
+# Status de origem permitidos para cada transição de status
+TRANSICOES_PERMITIDAS = {
+    StatusAgendamento.CONFIRMADO: {StatusAgendamento.AGENDADO, StatusAgendamento.REAGENDADO},
+    StatusAgendamento.CANCELADO: set(STATUS_OCUPANTES),
+    StatusAgendamento.CONCLUIDA: set(STATUS_OCUPANTES),
+    StatusAgendamento.FALTA: set(STATUS_OCUPANTES),
+}
+
+
+class MotivoIndisponibilidade(str, Enum):
+    """Motivo pelo qual um horário não pode ser agendado"""
+
+    MEDICO_NAO_ENCONTRADO = "medico_nao_encontrado"
+    MEDICO_INATIVO = "medico_inativo"
+    DATA_PASSADA = "data_passada"
+    ANTECEDENCIA_MINIMA = "antecedencia_minima"
+    ANTECEDENCIA_MAXIMA = "antecedencia_maxima"
+    DIA_SEM_ATENDIMENTO = "dia_sem_atendimento"
+    FORA_DO_PERIODO = "fora_do_periodo"
+    CONFLITO_AGENDAMENTO = "conflito_agendamento"
+    RESERVA_TEMPORARIA = "reserva_temporaria"
+    CONFLITO_CONCORRENTE = "conflito_concorrente"
+    ERRO_INTERNO = "erro_interno"
+
+
+DESCRICOES_MOTIVO = {
+    MotivoIndisponibilidade.MEDICO_NAO_ENCONTRADO: "Médico não encontrado",
+    MotivoIndisponibilidade.MEDICO_INATIVO: "Médico inativo",
+    MotivoIndisponibilidade.DATA_PASSADA: "Data/hora no passado",
+    MotivoIndisponibilidade.ANTECEDENCIA_MINIMA: "Antecedência mínima não respeitada",
+    MotivoIndisponibilidade.ANTECEDENCIA_MAXIMA: "Antecedência máxima excedida",
+    MotivoIndisponibilidade.DIA_SEM_ATENDIMENTO: "Médico não atende neste dia da semana",
+    MotivoIndisponibilidade.FORA_DO_PERIODO: "Horário fora do período de disponibilidade do médico",
+    MotivoIndisponibilidade.CONFLITO_AGENDAMENTO: "Horário já ocupado",
+    MotivoIndisponibilidade.RESERVA_TEMPORARIA: "Horário reservado temporariamente por outro paciente",
+    MotivoIndisponibilidade.CONFLITO_CONCORRENTE: "Horário ocupado por outra requisição concorrente",
+    MotivoIndisponibilidade.ERRO_INTERNO: "Erro ao validar disponibilidade",
+}
+
+# Motivos em que o horário existe mas está ocupado (HTTP 409); os demais são 400
+MOTIVOS_CONFLITO = {
+    MotivoIndisponibilidade.CONFLITO_AGENDAMENTO,
+    MotivoIndisponibilidade.RESERVA_TEMPORARIA,
+    MotivoIndisponibilidade.CONFLITO_CONCORRENTE,
+}
+
+
+@dataclass
+class ResultadoDisponibilidade:
+    """
+    Resultado da validação de um horário.
+
+    Avaliado como booleano, vale True apenas quando o horário está disponível,
+    então `if not self._validar_disponibilidade(...)` continua funcionando.
+    Os detalhes são preenchidos na mesma passada da validação, sem consultas extras.
+    """
+
+    disponivel: bool
+    motivo: Optional[MotivoIndisponibilidade] = None
+    agendamento_conflitante_id: Optional[int] = None
+    reserva_expira_em: Optional[datetime] = None
+    limite: Optional[datetime] = None  # Data mínima/máxima permitida pela antecedência
+    periodos: List[Tuple[time, time]] = field(default_factory=list)  # Períodos de atendimento do dia
+
+    def __bool__(self) -> bool:
+        return self.disponivel
+
+    @classmethod
+    def indisponivel(
+        cls, motivo: MotivoIndisponibilidade, **detalhes: Any
+    ) -> "ResultadoDisponibilidade":
+        return cls(disponivel=False, motivo=motivo, **detalhes)
+
+    @property
+    def conflito(self) -> bool:
+        """Indica se o horário está ocupado por outro agendamento ou reserva."""
+        return self.motivo in MOTIVOS_CONFLITO
+
+    @property
+    def descricao(self) -> Optional[str]:
+        """Descrição do motivo para mensagens de erro."""
+        return DESCRICOES_MOTIVO.get(self.motivo) if self.motivo else None
 
 
 class AgendamentoService:
@@ -29,21 +160,37 @@ class AgendamentoService:
 
     def __init__(self, db: Session):
         self.db = db
+        # Resultado da última validação de horário feita por criar_agendamento/reagendar
+        self.ultima_validacao: Optional[ResultadoDisponibilidade] = None
 
-    def criar_agendamento(self, dados: Dict[str, Any]) -> Optional[Agendamento]:
+    def criar_agendamento(
+        self,
+        dados: Dict[str, Any],
+        medico: Optional[Medico] = None,
+        antes_do_commit: Optional[Callable[[Agendamento], None]] = None,
+    ) -> Optional[Agendamento]:
         """
         Cria um novo agendamento.
         
+        O agendamento é devolvido com paciente e médico (e especialidade)
+        carregados em uma única consulta.
+        
         Args:
             dados: Dicionário com dados do agendamento (paciente_id, medico_id, data_hora, etc.)
+            medico: Médico já carregado pelo chamador, reaproveitado na validação
+            antes_do_commit: Chamada com o agendamento (já com as relações)
+                antes do commit, para gravar outros dados na mesma transação
             
         Returns:
-            Agendamento criado ou None em caso de erro
+            Agendamento criado ou None em caso de erro (o motivo da recusa do
+            horário fica em self.ultima_validacao)
         """
+        self.ultima_validacao = None
         paciente_id = dados.get("paciente_id")
         medico_id = dados.get("medico_id")
         data_hora = dados.get("data_hora")
         duracao_minutos = dados.get("duracao_minutos", 30)
+        telefone_reserva = dados.get("telefone_reserva")
         
         logger.info(
             f"Iniciando criação de agendamento | paciente_id={paciente_id} | "
@@ -51,13 +198,27 @@ class AgendamentoService:
         )
         
         try:
+            # Serializa escritas concorrentes na agenda do médico nos dias afetados
+            TravaAgendaService(self.db).travar(
+                medico_id, self._dias_do_intervalo(data_hora, duracao_minutos)
+            )
+
             # Valida disponibilidade
             logger.debug(f"Validando disponibilidade para médico {medico_id} em {data_hora}")
-            if not self._validar_disponibilidade(medico_id, data_hora, duracao_minutos):
+            self.ultima_validacao = self._validar_disponibilidade(
+                medico_id,
+                data_hora,
+                duracao_minutos,
+                telefone_reserva=telefone_reserva,
+                medico=medico,
+            )
+            if not self.ultima_validacao:
                 logger.warning(
                     f"Validação de disponibilidade falhou | paciente_id={paciente_id} | "
                     f"medico_id={medico_id} | data_hora={data_hora}"
                 )
+                # Libera a trava da agenda
+                self.db.rollback()
                 return None
 
             logger.debug("Disponibilidade validada com sucesso, criando agendamento")
@@ -75,21 +236,23 @@ class AgendamentoService:
             self.db.add(agendamento)
             
             try:
-                self.db.commit()
-                self.db.refresh(agendamento)
-                
-                # Revalida após commit para detectar race conditions
-                # (caso outro agendamento tenha sido criado entre a validação e o commit)
-                if not self._validar_disponibilidade(medico_id, data_hora, duracao_minutos, excluir_agendamento_id=agendamento.id):
-                    # Se após criar ainda há conflito, significa que criamos um duplicado
-                    logger.warning(
-                        f"Conflito detectado após criação - possível race condition | "
-                        f"agendamento_id={agendamento.id} | medico_id={medico_id} | data_hora={data_hora}"
+                # Os bloqueios de horário garantem no banco, na mesma transação,
+                # que nenhum outro agendamento ocupe as mesmas células
+                self.db.flush()
+                BloqueioHorarioService(self.db).bloquear(agendamento)
+                if telefone_reserva:
+                    # A reserva temporária do paciente é consumida pelo agendamento
+                    self.db.execute(
+                        delete(ReservaHorario).where(ReservaHorario.telefone == telefone_reserva)
                     )
-                    # Remove o agendamento duplicado
-                    self.db.delete(agendamento)
-                    self.db.commit()
-                    return None
+                self._registrar_alteracao_agenda(medico_id, data_hora, duracao_minutos)
+                agendamento_id = agendamento.id
+                if antes_do_commit is not None:
+                    antes_do_commit(self._carregar_com_relacoes(agendamento_id))
+                self.db.commit()
+
+                # Recarrega com as relações usadas na resposta em uma única consulta
+                agendamento = self._carregar_com_relacoes(agendamento_id)
 
                 logger.success(
                     f"Agendamento criado com sucesso | agendamento_id={agendamento.id} | "
@@ -99,18 +262,15 @@ class AgendamentoService:
                 return agendamento
                 
             except IntegrityError as e:
-                # Erro de constraint única (Oracle/PostgreSQL) - horário já ocupado
+                # Outro agendamento concorrente bloqueou o horário primeiro
                 self.db.rollback()
+                self.ultima_validacao = ResultadoDisponibilidade.indisponivel(
+                    MotivoIndisponibilidade.CONFLITO_CONCORRENTE
+                )
                 logger.warning(
                     f"Conflito de integridade detectado - horário já ocupado | "
                     f"medico_id={medico_id} | data_hora={data_hora} | erro={str(e)}"
                 )
-                # Revalida para confirmar que realmente está ocupado
-                if not self._validar_disponibilidade(medico_id, data_hora, duracao_minutos):
-                    logger.info(
-                        f"Confirmação: horário realmente está ocupado | "
-                        f"medico_id={medico_id} | data_hora={data_hora}"
-                    )
                 return None
 
         except KeyError as e:
@@ -128,6 +288,254 @@ class AgendamentoService:
             self.db.rollback()
             return None
 
+    def criar_agendamentos_lote(
+        self, itens: List[Dict[str, Any]], tudo_ou_nada: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Cria vários agendamentos em uma única transação.
+
+        Médicos, pacientes, disponibilidades, agendamentos ativos e reservas
+        temporárias do período são carregados uma vez para todo o lote, e cada
+        item é validado em memória com as mesmas regras de criar_agendamento
+        (incluindo conflitos com os itens anteriores do próprio lote). Os itens
+        válidos e seus bloqueios de horário são inseridos com um executemany
+        cada, seguidos de um único commit.
+
+        Args:
+            itens: Dados de cada agendamento (paciente_id, medico_id, data_hora, etc.)
+            tudo_ou_nada: Se True, nenhum agendamento é criado quando algum item é rejeitado
+
+        Returns:
+            Lista, na ordem dos itens, de dicionários com indice, sucesso,
+            agendamento (quando criado) e motivo (quando rejeitado)
+        """
+        logger.info(
+            f"Iniciando criação de agendamentos em lote | itens={len(itens)} | "
+            f"tudo_ou_nada={tudo_ou_nada}"
+        )
+
+        resultados: List[Dict[str, Any]] = [
+            {"indice": indice, "sucesso": False, "agendamento": None, "motivo": None}
+            for indice in range(len(itens))
+        ]
+        if not itens:
+            return resultados
+
+        for item in itens:
+            item.setdefault("duracao_minutos", 30)
+            if item["duracao_minutos"] is None:
+                item["duracao_minutos"] = 30
+
+        try:
+            # Trava as agendas afetadas, sempre na mesma ordem (médico, dia)
+            dias_por_medico: Dict[int, Set[date]] = {}
+            for item in itens:
+                dias_por_medico.setdefault(item["medico_id"], set()).update(
+                    self._dias_do_intervalo(item["data_hora"], item["duracao_minutos"])
+                )
+            trava = TravaAgendaService(self.db)
+            for medico_id in sorted(dias_por_medico):
+                trava.travar(medico_id, dias_por_medico[medico_id])
+
+            # Carga em lote de tudo o que a validação precisa
+            medico_ids = sorted(dias_por_medico)
+            medicos = {
+                medico.id: medico
+                for medico in self.db.query(Medico).filter(Medico.id.in_(medico_ids)).all()
+            }
+            pacientes_existentes = {
+                paciente_id
+                for (paciente_id,) in self.db.query(Paciente.id)
+                .filter(Paciente.id.in_({item["paciente_id"] for item in itens}))
+                .all()
+            }
+
+            disponibilidade_service = DisponibilidadeService(self.db)
+            disponibilidades = disponibilidade_service.carregar_disponibilidades(medico_ids)
+            inicio_periodo = min(item["data_hora"] for item in itens)
+            fim_periodo = max(
+                item["data_hora"] + timedelta(minutes=item["duracao_minutos"]) for item in itens
+            )
+            ocupacoes = disponibilidade_service.carregar_ocupacoes(
+                medico_ids, inicio_periodo, fim_periodo
+            )
+            reservas = disponibilidade_service.carregar_reservas(
+                medico_ids, inicio_periodo, fim_periodo
+            )
+
+            # Células da grade já ocupadas (as mesmas dos bloqueios de horário)
+            celulas_ocupadas: Dict[int, Set[datetime]] = {medico_id: set() for medico_id in medico_ids}
+            for medico_id in medico_ids:
+                intervalos = list(ocupacoes[medico_id])
+                intervalos.extend((inicio, fim) for inicio, fim, _ in reservas[medico_id])
+                for inicio, fim in intervalos:
+                    duracao = int((fim - inicio).total_seconds() // 60)
+                    celulas_ocupadas[medico_id].update(BloqueioHorarioService.celulas(inicio, duracao))
+
+            agora = datetime.now()
+            data_minima = agora + timedelta(hours=settings.min_advance_booking_hours)
+            data_maxima = agora + timedelta(days=settings.max_advance_booking_days)
+
+            aceitos: List[Tuple[int, Agendamento]] = []
+            for indice, item in enumerate(itens):
+                medico_id = item["medico_id"]
+                data_hora = item["data_hora"]
+                duracao_minutos = item["duracao_minutos"]
+                medico = medicos.get(medico_id)
+                celulas = BloqueioHorarioService.celulas(data_hora, duracao_minutos)
+
+                if not medico:
+                    motivo = "Médico não encontrado"
+                elif not medico.ativo:
+                    motivo = "Médico inativo"
+                elif item["paciente_id"] not in pacientes_existentes:
+                    motivo = "Paciente não encontrado"
+                elif data_hora < agora:
+                    motivo = "Data/hora no passado"
+                elif data_hora < data_minima:
+                    motivo = "Antecedência mínima não respeitada"
+                elif data_hora > data_maxima:
+                    motivo = "Antecedência máxima excedida"
+                elif not any(
+                    d.hora_inicio <= data_hora.time() < d.hora_fim
+                    for d in disponibilidades[medico_id].get(data_hora.weekday(), [])
+                ):
+                    motivo = "Horário fora do período de disponibilidade do médico"
+                elif celulas_ocupadas[medico_id].intersection(celulas):
+                    motivo = "Horário já ocupado"
+                else:
+                    motivo = None
+
+                if motivo:
+                    resultados[indice]["motivo"] = motivo
+                    logger.debug(
+                        f"Item do lote rejeitado | indice={indice} | medico_id={medico_id} | "
+                        f"data_hora={data_hora} | motivo={motivo}"
+                    )
+                    continue
+
+                celulas_ocupadas[medico_id].update(celulas)
+                aceitos.append(
+                    (
+                        indice,
+                        Agendamento(
+                            paciente_id=item["paciente_id"],
+                            medico_id=medico_id,
+                            data_hora=data_hora,
+                            duracao_minutos=duracao_minutos,
+                            observacoes=item.get("observacoes"),
+                            status=StatusAgendamento.AGENDADO,
+                        ),
+                    )
+                )
+
+            rejeitados = len(itens) - len(aceitos)
+            if not aceitos or (tudo_ou_nada and rejeitados):
+                # Libera as travas sem gravar nada
+                self.db.rollback()
+                if tudo_ou_nada and aceitos:
+                    for indice, _ in aceitos:
+                        resultados[indice]["motivo"] = "Lote rejeitado: outro item é inválido"
+                logger.warning(
+                    f"Nenhum agendamento do lote criado | itens={len(itens)} | rejeitados={rejeitados}"
+                )
+                return resultados
+
+            agendamentos = [agendamento for _, agendamento in aceitos]
+            ids_criados = self._inserir_lote(agendamentos)
+            BloqueioHorarioService(self.db).bloquear_lote(agendamentos)
+
+            marcar_para_invalidacao(self.db, medico_ids)
+            if settings.slot_inventario_habilitado:
+                inventario = SlotInventarioService(self.db)
+                for medico_id in medico_ids:
+                    dias = set()
+                    for agendamento in agendamentos:
+                        if agendamento.medico_id == medico_id:
+                            dias.update(
+                                self._dias_do_intervalo(agendamento.data_hora, agendamento.duracao_minutos)
+                            )
+                    if dias:
+                        inventario.atualizar_dias(medico_id, dias)
+
+            self.db.commit()
+
+            # Recarrega os criados (expirados pelo commit) em uma única consulta
+            criados = {
+                agendamento.id: agendamento
+                for agendamento in self.db.query(Agendamento)
+                .options(joinedload(Agendamento.paciente), joinedload(Agendamento.medico))
+                .filter(Agendamento.id.in_(ids_criados))
+                .all()
+            }
+            for (indice, _), agendamento_id in zip(aceitos, ids_criados):
+                resultados[indice]["sucesso"] = True
+                resultados[indice]["agendamento"] = criados[agendamento_id]
+
+            logger.success(
+                f"Agendamentos em lote criados | itens={len(itens)} | criados={len(aceitos)} | "
+                f"rejeitados={rejeitados}"
+            )
+            return resultados
+
+        except IntegrityError as e:
+            # Outra escrita concorrente ocupou um dos horários (estratégia de trava "nenhuma")
+            self.db.rollback()
+            logger.warning(f"Conflito de integridade ao criar agendamentos em lote | erro={str(e)}")
+            for resultado in resultados:
+                if resultado["motivo"] is None:
+                    resultado["motivo"] = "Horário ocupado por outra requisição concorrente"
+            return resultados
+        except Exception as e:
+            logger.exception(
+                f"Erro inesperado ao criar agendamentos em lote | itens={len(itens)} | erro={str(e)}"
+            )
+            self.db.rollback()
+            raise
+
+    def _inserir_lote(self, agendamentos: List[Agendamento]) -> List[int]:
+        """
+        Insere os agendamentos com um único executemany e preenche seus ids.
+
+        Nos bancos com RETURNING em executemany (SQLite, PostgreSQL, Oracle) o
+        lote é enviado como INSERT em massa; os ids são associados pelo par
+        (médico, data/hora), único dentro de um lote validado. Nos demais, usa
+        o flush da sessão. Não faz commit.
+
+        Returns:
+            IDs na ordem dos agendamentos
+        """
+        if not self.db.get_bind().dialect.insert_executemany_returning:
+            self.db.add_all(agendamentos)
+            self.db.flush()
+            return [agendamento.id for agendamento in agendamentos]
+
+        linhas = [
+            {
+                "paciente_id": agendamento.paciente_id,
+                "medico_id": agendamento.medico_id,
+                "data_hora": agendamento.data_hora,
+                "duracao_minutos": agendamento.duracao_minutos,
+                "observacoes": agendamento.observacoes,
+                "status": agendamento.status,
+            }
+            for agendamento in agendamentos
+        ]
+        retornados = self.db.execute(
+            insert(Agendamento).returning(
+                Agendamento.id, Agendamento.medico_id, Agendamento.data_hora
+            ),
+            linhas,
+        ).all()
+        ids = {
+            (medico_id, data_hora): agendamento_id
+            for agendamento_id, medico_id, data_hora in retornados
+        }
+
+        for agendamento in agendamentos:
+            agendamento.id = ids[(agendamento.medico_id, agendamento.data_hora)]
+        return [agendamento.id for agendamento in agendamentos]
+
     def buscar_agendamento(self, agendamento_id: int) -> Optional[Agendamento]:
         """
         Busca um agendamento por ID.
@@ -215,9 +623,30 @@ class AgendamentoService:
             )
             return []
 
+    @staticmethod
+    def verificar_versao(agendamento: Agendamento, versao_esperada: Optional[int]) -> None:
+        """
+        Compara a versão informada pelo cliente com a versão atual do agendamento.
+
+        Raises:
+            ConflitoVersaoAgendamento: Se a versão informada estiver desatualizada
+        """
+        if versao_esperada is not None and agendamento.versao != versao_esperada:
+            logger.warning(
+                f"Versão do agendamento desatualizada | agendamento_id={agendamento.id} | "
+                f"versao_esperada={versao_esperada} | versao_atual={agendamento.versao}"
+            )
+            raise ConflitoVersaoAgendamento(agendamento.id, versao_esperada)
+
     def _validar_disponibilidade(
-        self, medico_id: int, data_hora: datetime, duracao_minutos: int, excluir_agendamento_id: Optional[int] = None
-    ) -> bool:
+        self,
+        medico_id: int,
+        data_hora: datetime,
+        duracao_minutos: int,
+        excluir_agendamento_id: Optional[int] = None,
+        telefone_reserva: Optional[str] = None,
+        medico: Optional[Medico] = None,
+    ) -> ResultadoDisponibilidade:
         """
         Valida se um horário está disponível para agendamento.
         
@@ -228,14 +657,19 @@ class AgendamentoService:
         - Médico atende no dia da semana
         - Horário está dentro do período de disponibilidade
         - Não há conflitos com outros agendamentos
+        - Não há reservas temporárias válidas de outros pacientes
         
         Args:
             medico_id: ID do médico
             data_hora: Data e hora do agendamento
             duracao_minutos: Duração da consulta em minutos
+            excluir_agendamento_id: Agendamento ignorado na verificação de conflitos
+            telefone_reserva: Telefone cuja reserva temporária não conta como conflito
+            medico: Médico já carregado (evita uma nova consulta)
             
         Returns:
-            True se disponível, False caso contrário
+            ResultadoDisponibilidade (verdadeiro se disponível; senão com o motivo,
+            o agendamento conflitante e os limites que levaram à recusa)
         """
         logger.debug(
             f"Iniciando validação de disponibilidade | medico_id={medico_id} | "
@@ -244,15 +678,18 @@ class AgendamentoService:
         
         try:
             # Verifica se o médico existe e está ativo
-            medico = self.db.query(Medico).filter(Medico.id == medico_id).first()
+            if medico is None or medico.id != medico_id:
+                medico = self.db.query(Medico).filter(Medico.id == medico_id).first()
             if not medico:
                 logger.warning(f"Médico não encontrado | medico_id={medico_id}")
-                return False
+                return ResultadoDisponibilidade.indisponivel(
+                    MotivoIndisponibilidade.MEDICO_NAO_ENCONTRADO
+                )
             if not medico.ativo:
                 logger.warning(
                     f"Médico inativo | medico_id={medico_id} | nome={medico.nome}"
                 )
-                return False
+                return ResultadoDisponibilidade.indisponivel(MotivoIndisponibilidade.MEDICO_INATIVO)
 
             logger.debug(f"Médico validado | medico_id={medico_id} | nome={medico.nome}")
 
@@ -263,7 +700,9 @@ class AgendamentoService:
                     f"Tentativa de agendar em data passada | medico_id={medico_id} | "
                     f"data_hora={data_hora} | agora={agora}"
                 )
-                return False
+                return ResultadoDisponibilidade.indisponivel(
+                    MotivoIndisponibilidade.DATA_PASSADA, limite=agora
+                )
 
             # Verifica antecedência mínima
             min_advance = timedelta(hours=settings.min_advance_booking_hours)
@@ -274,7 +713,9 @@ class AgendamentoService:
                     f"data_hora={data_hora} | data_minima={data_minima} | "
                     f"horas_minimas={settings.min_advance_booking_hours}"
                 )
-                return False
+                return ResultadoDisponibilidade.indisponivel(
+                    MotivoIndisponibilidade.ANTECEDENCIA_MINIMA, limite=data_minima
+                )
 
             # Verifica antecedência máxima
             max_advance = timedelta(days=settings.max_advance_booking_days)
@@ -285,11 +726,14 @@ class AgendamentoService:
                     f"data_hora={data_hora} | data_maxima={data_maxima} | "
                     f"dias_maximos={settings.max_advance_booking_days}"
                 )
-                return False
+                return ResultadoDisponibilidade.indisponivel(
+                    MotivoIndisponibilidade.ANTECEDENCIA_MAXIMA, limite=data_maxima
+                )
 
             # Verifica disponibilidade do médico no dia da semana
+            # (um médico pode ter mais de um período no mesmo dia, ex: manhã e tarde)
             dia_semana = data_hora.weekday()
-            disponibilidade = (
+            disponibilidades = (
                 self.db.query(Disponibilidade)
                 .filter(
                     and_(
@@ -298,15 +742,38 @@ class AgendamentoService:
                         Disponibilidade.ativa == True,
                     )
                 )
-                .first()
+                .all()
             )
 
-            if not disponibilidade:
+            if not disponibilidades:
                 logger.warning(
                     f"Médico não atende neste dia da semana | medico_id={medico_id} | "
                     f"dia_semana={dia_semana} | data_hora={data_hora}"
                 )
-                return False
+                return ResultadoDisponibilidade.indisponivel(
+                    MotivoIndisponibilidade.DIA_SEM_ATENDIMENTO
+                )
+
+            # Verifica se o horário está dentro de algum período de disponibilidade
+            hora_consulta = data_hora.time()
+            disponibilidade = next(
+                (
+                    d
+                    for d in disponibilidades
+                    if d.hora_inicio <= hora_consulta < d.hora_fim
+                ),
+                None,
+            )
+            if not disponibilidade:
+                logger.warning(
+                    f"Horário fora do período de disponibilidade | medico_id={medico_id} | "
+                    f"hora_consulta={hora_consulta} | periodos="
+                    f"{[(str(d.hora_inicio), str(d.hora_fim)) for d in disponibilidades]}"
+                )
+                return ResultadoDisponibilidade.indisponivel(
+                    MotivoIndisponibilidade.FORA_DO_PERIODO,
+                    periodos=[(d.hora_inicio, d.hora_fim) for d in disponibilidades],
+                )
 
             logger.debug(
                 f"Disponibilidade encontrada | medico_id={medico_id} | "
@@ -314,31 +781,14 @@ class AgendamentoService:
                 f"hora_fim={disponibilidade.hora_fim}"
             )
 
-            # Verifica se o horário está dentro do período de disponibilidade
-            hora_consulta = data_hora.time()
-            if (
-                hora_consulta < disponibilidade.hora_inicio
-                or hora_consulta >= disponibilidade.hora_fim
-            ):
-                logger.warning(
-                    f"Horário fora do período de disponibilidade | medico_id={medico_id} | "
-                    f"hora_consulta={hora_consulta} | hora_inicio={disponibilidade.hora_inicio} | "
-                    f"hora_fim={disponibilidade.hora_fim}"
-                )
-                return False
-
             # Verifica conflitos com outros agendamentos
             fim_consulta = data_hora + timedelta(minutes=duracao_minutos)
             
             # Busca agendamentos que podem conflitar
             filtros = [
                 Agendamento.medico_id == medico_id,
-                Agendamento.status.in_(
-                    [
-                        StatusAgendamento.AGENDADO,
-                        StatusAgendamento.CONFIRMADO,
-                    ]
-                ),
+                Agendamento.status.in_(STATUS_OCUPANTES),
+                Agendamento.data_hora >= data_hora - MARGEM_BUSCA_AGENDAMENTOS,
                 Agendamento.data_hora < fim_consulta,
             ]
             
@@ -347,25 +797,38 @@ class AgendamentoService:
                 filtros.append(Agendamento.id != excluir_agendamento_id)
             
             agendamentos_existentes = (
-                self.db.query(Agendamento)
+                self.db.query(
+                    Agendamento.id,
+                    Agendamento.data_hora,
+                    Agendamento.duracao_minutos,
+                )
                 .filter(and_(*filtros))
                 .all()
             )
             
-            # Verifica conflitos manualmente para cada agendamento
+            # Marca os agendamentos no mapa de ocupação do dia e testa a consulta
+            # com uma operação bit a bit
+            mapa = MapaOcupacao(medico_id, data_hora.date())
+            for _, inicio_existente, duracao_existente in agendamentos_existentes:
+                mapa.marcar_ocupado(
+                    inicio_existente,
+                    inicio_existente + timedelta(minutes=duracao_existente),
+                )
+
             conflitos = None
-            for agendamento in agendamentos_existentes:
-                fim_agendamento = agendamento.data_hora + timedelta(
-                    minutes=agendamento.duracao_minutos
+            if mapa.conflita(data_hora, duracao_minutos):
+                # Identifica o agendamento conflitante (o mapa é conservador para
+                # horários fora da grade, então a sobreposição é confirmada aqui)
+                conflitos = next(
+                    (
+                        agendamento
+                        for agendamento in agendamentos_existentes
+                        if agendamento.data_hora < fim_consulta
+                        and data_hora
+                        < agendamento.data_hora + timedelta(minutes=agendamento.duracao_minutos)
+                    ),
+                    None,
                 )
-                # Verifica se há sobreposição de horários
-                if (
-                    (agendamento.data_hora <= data_hora < fim_agendamento)
-                    or (agendamento.data_hora < fim_consulta <= fim_agendamento)
-                    or (data_hora <= agendamento.data_hora < fim_consulta)
-                ):
-                    conflitos = agendamento
-                    break
 
             if conflitos:
                 logger.warning(
@@ -373,23 +836,89 @@ class AgendamentoService:
                     f"data_hora={data_hora} | conflito_com_agendamento_id={conflitos.id} | "
                     f"conflito_data_hora={conflitos.data_hora}"
                 )
-                return False
+                return ResultadoDisponibilidade.indisponivel(
+                    MotivoIndisponibilidade.CONFLITO_AGENDAMENTO,
+                    agendamento_conflitante_id=conflitos.id,
+                )
+
+            # Verifica reservas temporárias ainda válidas de outros pacientes
+            filtros_reserva = [
+                ReservaHorario.medico_id == medico_id,
+                ReservaHorario.expira_em > agora,
+                ReservaHorario.data_hora >= data_hora - MARGEM_BUSCA_AGENDAMENTOS,
+                ReservaHorario.data_hora < fim_consulta,
+            ]
+            if telefone_reserva:
+                filtros_reserva.append(ReservaHorario.telefone != telefone_reserva)
+
+            reserva_conflitante = next(
+                (
+                    reserva
+                    for reserva in self.db.query(ReservaHorario).filter(and_(*filtros_reserva)).all()
+                    if data_hora < reserva.data_hora + timedelta(minutes=reserva.duracao_minutos)
+                ),
+                None,
+            )
+            if reserva_conflitante:
+                logger.warning(
+                    f"Horário reservado temporariamente por outro paciente | medico_id={medico_id} | "
+                    f"data_hora={data_hora} | reserva_id={reserva_conflitante.id} | "
+                    f"expira_em={reserva_conflitante.expira_em}"
+                )
+                return ResultadoDisponibilidade.indisponivel(
+                    MotivoIndisponibilidade.RESERVA_TEMPORARIA,
+                    reserva_expira_em=reserva_conflitante.expira_em,
+                )
 
             logger.debug(
                 f"Validação de disponibilidade concluída com sucesso | medico_id={medico_id} | "
                 f"data_hora={data_hora}"
             )
-            return True
+            return ResultadoDisponibilidade(disponivel=True)
 
         except Exception as e:
             logger.exception(
                 f"Erro ao validar disponibilidade | medico_id={medico_id} | "
                 f"data_hora={data_hora} | erro={str(e)}"
             )
-            return False
+            return ResultadoDisponibilidade.indisponivel(MotivoIndisponibilidade.ERRO_INTERNO)
+
+    def _registrar_alteracao_agenda(
+        self, medico_id: int, data_hora: datetime, duracao_minutos: int
+    ) -> None:
+        """
+        Propaga uma escrita de agendamento para o cache e o inventário de horários.
+        
+        Chamado após o flush da escrita e antes do commit: a versão do médico no
+        cache de disponibilidade é incrementada após o commit e o inventário é
+        gravado na mesma transação do agendamento.
+        
+        Args:
+            medico_id: ID do médico
+            data_hora: Início do agendamento
+            duracao_minutos: Duração do agendamento em minutos
+        """
+        marcar_para_invalidacao(self.db, [medico_id])
+
+        if not settings.slot_inventario_habilitado:
+            return
+
+        SlotInventarioService(self.db).atualizar_dias(
+            medico_id, self._dias_do_intervalo(data_hora, duracao_minutos)
+        )
+
+    @staticmethod
+    def _dias_do_intervalo(data_hora: datetime, duracao_minutos: int) -> Set[date]:
+        """Dias tocados por um agendamento que começa em data_hora."""
+        fim = data_hora + timedelta(minutes=duracao_minutos)
+        return {data_hora.date(), (fim - timedelta(microseconds=1)).date()}
 
     def reagendar(
-        self, agendamento_id: int, nova_data_hora: datetime, motivo: Optional[str] = None
+        self,
+        agendamento_id: int,
+        nova_data_hora: datetime,
+        motivo: Optional[str] = None,
+        versao_esperada: Optional[int] = None,
     ) -> Optional[Agendamento]:
         """
         Reagenda um agendamento para uma nova data/hora.
@@ -398,10 +927,16 @@ class AgendamentoService:
             agendamento_id: ID do agendamento a ser reagendado
             nova_data_hora: Nova data e hora para o agendamento
             motivo: Motivo do reagendamento (opcional)
+            versao_esperada: Versão do agendamento conhecida pelo cliente (opcional)
             
         Returns:
-            Agendamento reagendado ou None em caso de erro
+            Agendamento reagendado ou None em caso de erro (o motivo da recusa do
+            novo horário fica em self.ultima_validacao)
+
+        Raises:
+            ConflitoVersaoAgendamento: Se o agendamento foi alterado por outra requisição
         """
+        self.ultima_validacao = None
         logger.info(
             f"Iniciando reagendamento | agendamento_id={agendamento_id} | "
             f"nova_data_hora={nova_data_hora} | motivo={motivo or 'Não informado'}"
@@ -412,6 +947,7 @@ class AgendamentoService:
             if not agendamento:
                 logger.warning(f"Agendamento não encontrado para reagendamento | agendamento_id={agendamento_id}")
                 return None
+            self.verificar_versao(agendamento, versao_esperada)
 
             data_hora_anterior = agendamento.data_hora
             logger.debug(
@@ -419,15 +955,28 @@ class AgendamentoService:
                 f"data_hora_anterior={data_hora_anterior} | medico_id={agendamento.medico_id}"
             )
 
+            # Trava os dias antigo e novo (em ordem) antes de validar
+            TravaAgendaService(self.db).travar(
+                agendamento.medico_id,
+                self._dias_do_intervalo(data_hora_anterior, agendamento.duracao_minutos)
+                | self._dias_do_intervalo(nova_data_hora, agendamento.duracao_minutos),
+            )
+
             # Valida nova disponibilidade
             logger.debug(f"Validando nova disponibilidade para reagendamento | medico_id={agendamento.medico_id}")
-            if not self._validar_disponibilidade(
-                agendamento.medico_id, nova_data_hora, agendamento.duracao_minutos
-            ):
+            self.ultima_validacao = self._validar_disponibilidade(
+                agendamento.medico_id,
+                nova_data_hora,
+                agendamento.duracao_minutos,
+                excluir_agendamento_id=agendamento.id,
+            )
+            if not self.ultima_validacao:
                 logger.warning(
                     f"Nova data/hora não está disponível para reagendamento | agendamento_id={agendamento_id} | "
                     f"nova_data_hora={nova_data_hora} | medico_id={agendamento.medico_id}"
                 )
+                # Libera a trava da agenda
+                self.db.rollback()
                 return None
 
             # Atualiza agendamento
@@ -439,6 +988,14 @@ class AgendamentoService:
                 )
             agendamento.atualizado_em = datetime.now()
 
+            self.db.flush()
+            BloqueioHorarioService(self.db).sincronizar(agendamento)
+            self._registrar_alteracao_agenda(
+                agendamento.medico_id, data_hora_anterior, agendamento.duracao_minutos
+            )
+            self._registrar_alteracao_agenda(
+                agendamento.medico_id, nova_data_hora, agendamento.duracao_minutos
+            )
             self.db.commit()
             self.db.refresh(agendamento)
 
@@ -449,6 +1006,26 @@ class AgendamentoService:
             )
             return agendamento
 
+        except ConflitoVersaoAgendamento:
+            self.db.rollback()
+            raise
+        except StaleDataError:
+            self.db.rollback()
+            logger.warning(
+                f"Agendamento alterado por outra requisição durante a atualização | "
+                f"agendamento_id={agendamento_id}"
+            )
+            raise ConflitoVersaoAgendamento(agendamento_id, versao_esperada)
+        except IntegrityError as e:
+            self.ultima_validacao = ResultadoDisponibilidade.indisponivel(
+                MotivoIndisponibilidade.CONFLITO_CONCORRENTE
+            )
+            logger.warning(
+                f"Nova data/hora ocupada por agendamento concorrente | agendamento_id={agendamento_id} | "
+                f"nova_data_hora={nova_data_hora} | erro={str(e)}"
+            )
+            self.db.rollback()
+            return None
         except Exception as e:
             logger.exception(
                 f"Erro ao reagendar agendamento | agendamento_id={agendamento_id} | "
@@ -458,7 +1035,7 @@ class AgendamentoService:
             return None
 
     def cancelar(
-        self, agendamento_id: int, motivo: str
+        self, agendamento_id: int, motivo: str, versao_esperada: Optional[int] = None
     ) -> Optional[Agendamento]:
         """
         Cancela um agendamento.
@@ -466,96 +1043,271 @@ class AgendamentoService:
         Args:
             agendamento_id: ID do agendamento a ser cancelado
             motivo: Motivo do cancelamento
+            versao_esperada: Versão do agendamento conhecida pelo cliente (opcional)
             
         Returns:
-            Agendamento cancelado ou None em caso de erro
+            Agendamento cancelado ou None se não encontrado ou em caso de erro
+
+        Raises:
+            ConflitoVersaoAgendamento: Se o agendamento foi alterado por outra requisição
+            TransicaoStatusInvalida: Se o status atual não permite o cancelamento
         """
         logger.info(
             f"Iniciando cancelamento de agendamento | agendamento_id={agendamento_id} | "
             f"motivo={motivo[:50]}..."  # Limita tamanho do motivo no log
         )
+        agora = datetime.now()
+        return self._transicionar(
+            agendamento_id,
+            StatusAgendamento.CANCELADO,
+            {"motivo_cancelamento": motivo, "cancelado_em": agora},
+            versao_esperada,
+        )
+
+    def confirmar(
+        self, agendamento_id: int, versao_esperada: Optional[int] = None
+    ) -> Optional[Agendamento]:
+        """
+        Confirma um agendamento.
         
-        try:
-            agendamento = self.buscar_agendamento(agendamento_id)
-            if not agendamento:
-                logger.warning(f"Agendamento não encontrado para cancelamento | agendamento_id={agendamento_id}")
-                return None
+        Args:
+            agendamento_id: ID do agendamento a ser confirmado
+            versao_esperada: Versão do agendamento conhecida pelo cliente (opcional)
+            
+        Returns:
+            Agendamento confirmado ou None se não encontrado ou em caso de erro
 
-            status_anterior = agendamento.status
-            logger.debug(
-                f"Agendamento encontrado | agendamento_id={agendamento_id} | "
-                f"status_anterior={status_anterior.value} | paciente_id={agendamento.paciente_id} | "
-                f"medico_id={agendamento.medico_id} | data_hora={agendamento.data_hora}"
-            )
+        Raises:
+            ConflitoVersaoAgendamento: Se o agendamento foi alterado por outra requisição
+            TransicaoStatusInvalida: Se o status atual não permite a confirmação
+        """
+        logger.info(f"Iniciando confirmação de agendamento | agendamento_id={agendamento_id}")
+        return self._transicionar(
+            agendamento_id,
+            StatusAgendamento.CONFIRMADO,
+            {"confirmado_em": datetime.now()},
+            versao_esperada,
+        )
 
-            agendamento.status = StatusAgendamento.CANCELADO
-            agendamento.motivo_cancelamento = motivo
-            agendamento.cancelado_em = datetime.now()
-            agendamento.atualizado_em = datetime.now()
+    def concluir(
+        self, agendamento_id: int, versao_esperada: Optional[int] = None
+    ) -> Optional[Agendamento]:
+        """
+        Marca um agendamento como concluído (consulta realizada).
+        
+        Args:
+            agendamento_id: ID do agendamento
+            versao_esperada: Versão do agendamento conhecida pelo cliente (opcional)
+            
+        Returns:
+            Agendamento concluído ou None se não encontrado ou em caso de erro
 
-            self.db.commit()
-            self.db.refresh(agendamento)
+        Raises:
+            ConflitoVersaoAgendamento: Se o agendamento foi alterado por outra requisição
+            TransicaoStatusInvalida: Se o status atual não permite a conclusão
+        """
+        logger.info(f"Iniciando conclusão de agendamento | agendamento_id={agendamento_id}")
+        return self._transicionar(
+            agendamento_id, StatusAgendamento.CONCLUIDA, {}, versao_esperada
+        )
 
-            logger.success(
-                f"Agendamento cancelado com sucesso | agendamento_id={agendamento_id} | "
-                f"status_anterior={status_anterior.value} | status_novo={agendamento.status.value} | "
-                f"paciente_id={agendamento.paciente_id}"
-            )
-            return agendamento
+    def registrar_falta(
+        self, agendamento_id: int, versao_esperada: Optional[int] = None
+    ) -> Optional[Agendamento]:
+        """
+        Registra que o paciente faltou à consulta.
+        
+        Args:
+            agendamento_id: ID do agendamento
+            versao_esperada: Versão do agendamento conhecida pelo cliente (opcional)
+            
+        Returns:
+            Agendamento com falta registrada ou None se não encontrado ou em caso de erro
 
-        except Exception as e:
-            logger.exception(
-                f"Erro ao cancelar agendamento | agendamento_id={agendamento_id} | erro={str(e)}"
-            )
-            self.db.rollback()
-            return None
+        Raises:
+            ConflitoVersaoAgendamento: Se o agendamento foi alterado por outra requisição
+            TransicaoStatusInvalida: Se o status atual não permite registrar a falta
+        """
+        logger.info(f"Iniciando registro de falta | agendamento_id={agendamento_id}")
+        return self._transicionar(
+            agendamento_id, StatusAgendamento.FALTA, {}, versao_esperada
+        )
 
-    def confirmar(self, agendamento_id: int) -> Optional[Agendamento]:
+    def alterar_status(
+        self,
+        agendamento_id: int,
+        novo_status: StatusAgendamento,
+        versao_esperada: Optional[int] = None,
+        valores: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Agendamento]:
         """
-        Confirma um agendamento.
+        Aplica uma mudança de status pedida pela atualização genérica (PUT).
+        
+        Segue as mesmas regras de confirmar, cancelar, concluir e registrar_falta:
+        o status de origem precisa estar em TRANSICOES_PERMITIDAS. Agendado e
+        reagendado não são destinos válidos (criação e reagendamento têm rotas
+        próprias).
         
         Args:
-            agendamento_id: ID do agendamento a ser confirmado
+            agendamento_id: ID do agendamento
+            novo_status: Status de destino
+            versao_esperada: Versão do agendamento conhecida pelo cliente (opcional)
+            valores: Colunas sem efeito na agenda gravadas no mesmo UPDATE (ex.: observacoes)
             
         Returns:
-            Agendamento confirmado ou None em caso de erro
+            Agendamento atualizado ou None se não encontrado ou em caso de erro
+
+        Raises:
+            ConflitoVersaoAgendamento: Se o agendamento foi alterado por outra requisição
+            TransicaoStatusInvalida: Se o status atual não permite a transição
         """
-        logger.info(f"Iniciando confirmação de agendamento | agendamento_id={agendamento_id}")
-        
-        try:
-            agendamento = self.buscar_agendamento(agendamento_id)
-            if not agendamento:
-                logger.warning(f"Agendamento não encontrado para confirmação | agendamento_id={agendamento_id}")
-                return None
+        logger.info(
+            f"Iniciando alteração de status | agendamento_id={agendamento_id} | "
+            f"status_novo={novo_status.value}"
+        )
+        if novo_status not in TRANSICOES_PERMITIDAS:
+            return self._recusar_transicao(agendamento_id, novo_status, versao_esperada)
 
-            status_anterior = agendamento.status
-            logger.debug(
-                f"Agendamento encontrado | agendamento_id={agendamento_id} | "
-                f"status_anterior={status_anterior.value} | paciente_id={agendamento.paciente_id} | "
-                f"medico_id={agendamento.medico_id} | data_hora={agendamento.data_hora}"
+        valores = dict(valores or {})
+        if novo_status == StatusAgendamento.CONFIRMADO:
+            valores["confirmado_em"] = datetime.now()
+        elif novo_status == StatusAgendamento.CANCELADO:
+            valores["cancelado_em"] = datetime.now()
+        return self._transicionar(agendamento_id, novo_status, valores, versao_esperada)
+
+    def _transicionar(
+        self,
+        agendamento_id: int,
+        novo_status: StatusAgendamento,
+        valores: Dict[str, Any],
+        versao_esperada: Optional[int],
+    ) -> Optional[Agendamento]:
+        """
+        Aplica uma transição de status com um único UPDATE condicional.
+        
+        O WHERE exige um dos status de origem permitidos (e a versão esperada,
+        se informada), então duas transições concorrentes nunca passam ambas:
+        a segunda não encontra a linha no status de origem. Com RETURNING, o
+        mesmo comando devolve os dados usados para liberar bloqueios, cache e
+        inventário; sem RETURNING, uma consulta complementar os busca. Como o
+        UPDATE em conjunto não passa pelo version_id_col, a versão é
+        incrementada no próprio comando.
+        
+        Args:
+            agendamento_id: ID do agendamento
+            novo_status: Status de destino
+            valores: Colunas adicionais a gravar (ex.: cancelado_em)
+            versao_esperada: Versão do agendamento conhecida pelo cliente (opcional)
+            
+        Returns:
+            Agendamento atualizado (com paciente e médico) ou None se não encontrado
+        """
+        status_origem = TRANSICOES_PERMITIDAS[novo_status]
+        filtros = [Agendamento.id == agendamento_id, Agendamento.status.in_(status_origem)]
+        if versao_esperada is not None:
+            filtros.append(Agendamento.versao == versao_esperada)
+
+        comando = (
+            update(Agendamento)
+            .where(*filtros)
+            .values(
+                status=novo_status,
+                atualizado_em=datetime.now(),
+                versao=Agendamento.versao + 1,
+                **valores,
             )
+            .execution_options(synchronize_session=False)
+        )
+        colunas = (Agendamento.medico_id, Agendamento.data_hora, Agendamento.duracao_minutos)
 
-            agendamento.status = StatusAgendamento.CONFIRMADO
-            agendamento.confirmado_em = datetime.now()
-            agendamento.atualizado_em = datetime.now()
+        try:
+            if self.db.get_bind().dialect.update_returning:
+                linha = self.db.execute(comando.returning(*colunas)).first()
+            else:
+                linha = None
+                if self.db.execute(comando).rowcount:
+                    linha = self.db.execute(
+                        select(*colunas).where(Agendamento.id == agendamento_id)
+                    ).first()
 
+            if linha is None:
+                self.db.rollback()
+                return self._recusar_transicao(agendamento_id, novo_status, versao_esperada)
+
+            medico_id, data_hora, duracao_minutos = linha
+            if novo_status not in STATUS_OCUPANTES:
+                BloqueioHorarioService(self.db).liberar(agendamento_id)
+                self._registrar_alteracao_agenda(medico_id, data_hora, duracao_minutos)
             self.db.commit()
-            self.db.refresh(agendamento)
 
+            agendamento = self._carregar_com_relacoes(agendamento_id)
             logger.success(
-                f"Agendamento confirmado com sucesso | agendamento_id={agendamento_id} | "
-                f"status_anterior={status_anterior.value} | status_novo={agendamento.status.value} | "
-                f"paciente_id={agendamento.paciente_id} | confirmado_em={agendamento.confirmado_em}"
+                f"Status do agendamento atualizado | agendamento_id={agendamento_id} | "
+                f"status_novo={novo_status.value} | versao={agendamento.versao} | "
+                f"medico_id={medico_id} | data_hora={data_hora}"
             )
             return agendamento
 
+        except (ConflitoVersaoAgendamento, TransicaoStatusInvalida):
+            raise
         except Exception as e:
             logger.exception(
-                f"Erro ao confirmar agendamento | agendamento_id={agendamento_id} | erro={str(e)}"
+                f"Erro ao atualizar status do agendamento | agendamento_id={agendamento_id} | "
+                f"status_novo={novo_status.value} | erro={str(e)}"
             )
             self.db.rollback()
             return None
 
+    def _recusar_transicao(
+        self,
+        agendamento_id: int,
+        novo_status: StatusAgendamento,
+        versao_esperada: Optional[int],
+    ) -> None:
+        """
+        Identifica por que o UPDATE condicional não alterou nenhuma linha.
+        
+        Só é executado no caminho de erro.
+        
+        Returns:
+            None se o agendamento não existe
+
+        Raises:
+            ConflitoVersaoAgendamento: Se a versão informada não é a atual
+            TransicaoStatusInvalida: Se o status atual não permite a transição
+        """
+        atual = self.db.execute(
+            select(Agendamento.status, Agendamento.versao).where(Agendamento.id == agendamento_id)
+        ).first()
+        if atual is None:
+            logger.warning(f"Agendamento não encontrado | agendamento_id={agendamento_id}")
+            return None
+
+        if versao_esperada is not None and atual.versao != versao_esperada:
+            logger.warning(
+                f"Versão do agendamento desatualizada | agendamento_id={agendamento_id} | "
+                f"versao_esperada={versao_esperada} | versao_atual={atual.versao}"
+            )
+            raise ConflitoVersaoAgendamento(agendamento_id, versao_esperada)
+
+        logger.warning(
+            f"Transição de status não permitida | agendamento_id={agendamento_id} | "
+            f"status_atual={atual.status.value} | status_novo={novo_status.value}"
+        )
+        raise TransicaoStatusInvalida(agendamento_id, atual.status, novo_status)
+
+    def _carregar_com_relacoes(self, agendamento_id: int) -> Agendamento:
+        """Carrega o agendamento com paciente, médico e especialidade em uma única consulta."""
+        return (
+            self.db.query(Agendamento)
+            .options(
+                joinedload(Agendamento.paciente),
+                joinedload(Agendamento.medico).joinedload(Medico.especialidade),
+            )
+            .filter(Agendamento.id == agendamento_id)
+            .one()
+        )
+
     def buscar_horarios_disponiveis(
         self,
         medico_id: Optional[int] = None,
@@ -584,100 +1336,15 @@ class AgendamentoService:
         )
         
         try:
-            from app.database.models import Medico, Especialidade
-
-            horarios_disponiveis = []
-
-            # Define período padrão se não fornecido
-            if not data_inicio:
-                data_inicio = datetime.now()
-            if not data_fim:
-                data_fim = data_inicio + timedelta(days=30)
-
-            logger.debug(
-                f"Período de busca definido | data_inicio={data_inicio} | data_fim={data_fim} | "
-                f"dias={(data_fim - data_inicio).days}"
+            # Carrega médicos, disponibilidades e agendamentos em lote e calcula
+            # os horários livres em memória
+            horarios_disponiveis = DisponibilidadeService(self.db).gerar_horarios(
+                medico_id=medico_id,
+                especialidade_id=especialidade_id,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
             )
 
-            # Busca médicos baseado nos filtros
-            query = self.db.query(Medico).filter(Medico.ativo == True)
-
-            if medico_id:
-                query = query.filter(Medico.id == medico_id)
-            if especialidade_id:
-                query = query.filter(Medico.especialidade_id == especialidade_id)
-
-            medicos = query.all()
-            logger.debug(f"Médicos encontrados para busca de horários | total={len(medicos)}")
-
-            for medico in medicos:
-                logger.debug(f"Processando médico | medico_id={medico.id} | nome={medico.nome}")
-                
-                # Busca disponibilidades do médico
-                disponibilidades = (
-                    self.db.query(Disponibilidade)
-                    .filter(
-                        and_(
-                            Disponibilidade.medico_id == medico.id,
-                            Disponibilidade.ativa == True,
-                        )
-                    )
-                    .all()
-                )
-
-                logger.debug(
-                    f"Disponibilidades encontradas para médico | medico_id={medico.id} | "
-                    f"total_disponibilidades={len(disponibilidades)}"
-                )
-
-                # Gera horários disponíveis para cada dia no período
-                data_atual = data_inicio
-                horarios_medico = 0
-                
-                while data_atual <= data_fim:
-                    dia_semana = data_atual.weekday()
-
-                    # Encontra disponibilidade para este dia da semana
-                    disp = next(
-                        (d for d in disponibilidades if d.dia_semana == dia_semana),
-                        None,
-                    )
-
-                    if disp:
-                        # Gera slots de horário dentro da disponibilidade
-                        hora_atual = disp.hora_inicio
-                        while hora_atual < disp.hora_fim:
-                            data_hora = datetime.combine(data_atual.date(), hora_atual)
-
-                            # Verifica se está disponível (sem conflitos)
-                            if self._validar_disponibilidade(
-                                medico.id, data_hora, settings.default_consultation_duration_minutes
-                            ):
-                                horarios_disponiveis.append(
-                                    {
-                                        "data_hora": data_hora,
-                                        "medico_id": medico.id,
-                                        "medico_nome": medico.nome,
-                                        "especialidade": medico.especialidade.nome
-                                        if medico.especialidade
-                                        else "",
-                                    }
-                                )
-                                horarios_medico += 1
-
-                            # Avança para próximo slot
-                            hora_atual = (
-                                datetime.combine(date.today(), hora_atual)
-                                + timedelta(minutes=settings.consultation_interval_minutes)
-                            ).time()
-
-                    data_atual += timedelta(days=1)
-                
-                logger.debug(
-                    f"Horários gerados para médico | medico_id={medico.id} | "
-                    f"total_horarios={horarios_medico}"
-                )
-
             logger.info(
                 f"Busca de horários disponíveis concluída | total_horarios={len(horarios_disponiveis)} | "
                 f"medico_id={medico_id} | especialidade_id={especialidade_id}"
@@ -693,3 +1360,72 @@ class AgendamentoService:
             return []
 
 
+class AgendamentoServiceAsync(ServicoAssincrono):
+    """Versão assíncrona do AgendamentoService (mesma lógica, sem bloquear o event loop)"""
+
+    servico_sincrono = AgendamentoService
+
+    @property
+    def ultima_validacao(self) -> Optional[ResultadoDisponibilidade]:
+        return self.sincrono.ultima_validacao
+
+    async def criar_agendamento(
+        self, dados: Dict[str, Any], medico: Optional[Medico] = None
+    ) -> Optional[Agendamento]:
+        return await self.executar(self.sincrono.criar_agendamento, dados, medico)
+
+    async def criar_agendamentos_lote(
+        self, itens: List[Dict[str, Any]], tudo_ou_nada: bool = False
+    ) -> List[Dict[str, Any]]:
+        return await self.executar(self.sincrono.criar_agendamentos_lote, itens, tudo_ou_nada)
+
+    async def buscar_agendamento(self, agendamento_id: int) -> Optional[Agendamento]:
+        return await self.executar(self.sincrono.buscar_agendamento, agendamento_id)
+
+    async def listar_agendamentos(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        medico_id: Optional[int] = None,
+        paciente_id: Optional[int] = None,
+        status: Optional[StatusAgendamento] = None,
+    ) -> List[Agendamento]:
+        return await self.executar(
+            self.sincrono.listar_agendamentos,
+            skip=skip,
+            limit=limit,
+            medico_id=medico_id,
+            paciente_id=paciente_id,
+            status=status,
+        )
+
+    async def reagendar(
+        self,
+        agendamento_id: int,
+        nova_data_hora: datetime,
+        motivo: Optional[str] = None,
+        versao_esperada: Optional[int] = None,
+    ) -> Optional[Agendamento]:
+        return await self.executar(
+            self.sincrono.reagendar, agendamento_id, nova_data_hora, motivo, versao_esperada
+        )
+
+    async def cancelar(
+        self, agendamento_id: int, motivo: str, versao_esperada: Optional[int] = None
+    ) -> Optional[Agendamento]:
+        return await self.executar(self.sincrono.cancelar, agendamento_id, motivo, versao_esperada)
+
+    async def confirmar(
+        self, agendamento_id: int, versao_esperada: Optional[int] = None
+    ) -> Optional[Agendamento]:
+        return await self.executar(self.sincrono.confirmar, agendamento_id, versao_esperada)
+
+    async def concluir(
+        self, agendamento_id: int, versao_esperada: Optional[int] = None
+    ) -> Optional[Agendamento]:
+        return await self.executar(self.sincrono.concluir, agendamento_id, versao_esperada)
+
+    async def registrar_falta(
+        self, agendamento_id: int, versao_esperada: Optional[int] = None
+    ) -> Optional[Agendamento]:
+        return await self.executar(self.sincrono.registrar_falta, agendamento_id, versao_esperada)
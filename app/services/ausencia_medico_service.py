@@ -0,0 +1,445 @@
+"""
+Serviço para tratamento em massa dos agendamentos de um médico ausente.
+
+Este serviço gerencia:
+- Cancelamento de todos os agendamentos do período com UPDATEs em conjunto
+- Reagendamento para os próximos horários livres do mesmo médico
+- Transferência para outros médicos da mesma especialidade
+
+Todo o período é processado em uma única transação e cada agendamento recebe
+o primeiro horário livre disponível, em ordem cronológica. Os destinos são
+primeiro escolhidos com as agendas lidas sem trava; então são travados, em
+ordem, apenas os dias do médico ausente e os (médico, dia) escolhidos, e a
+escolha é refeita sob a trava com os mapas de ocupação relidos (sem cache).
+Se outra escrita ocupou nesse meio tempo um horário planejado e a nova escolha
+cai em um dia ainda não travado, a transação é desfeita (liberando todas as
+travas) e a operação recomeça travando, de uma vez e na mesma ordem, o
+conjunto ampliado; nenhuma trava é tomada fora dessa ordem. As demais agendas
+da especialidade continuam livres para novos agendamentos durante a operação.
+Agendamentos sem horário livre no horizonte de agendamento não são alterados e
+aparecem no resumo para tratamento manual.
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta, date, time
+from loguru import logger
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, update
+
+from app.config.config import settings
+from app.database.models import (
+    AcaoAusencia,
+    Agendamento,
+    BloqueioHorario,
+    Medico,
+    StatusAgendamento,
+)
+from app.services.agendamento_service import AgendamentoService
+from app.services.bloqueio_horario_service import BloqueioHorarioService
+from app.services.cache_disponibilidade import marcar_para_invalidacao
+from app.services.disponibilidade_service import DisponibilidadeService, STATUS_OCUPANTES
+from app.services.mapa_ocupacao import MapaOcupacao
+from app.services.slot_inventario_service import SlotInventarioService
+from app.services.trava_agenda_service import TravaAgendaService
+
+
+class AusenciaMedicoService:
+    """Serviço para tratamento dos agendamentos de um médico ausente"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def processar(
+        self,
+        medico_id: int,
+        data_inicio: date,
+        data_fim: date,
+        acao: AcaoAusencia,
+        motivo: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cancela ou redistribui os agendamentos ativos futuros do médico no período.
+
+        Args:
+            medico_id: ID do médico ausente
+            data_inicio: Primeiro dia da ausência
+            data_fim: Último dia da ausência (inclusive)
+            acao: Ação aplicada aos agendamentos
+            motivo: Motivo registrado nos agendamentos
+
+        Returns:
+            Resumo da operação ou None se o médico não existir
+        """
+        motivo = motivo or "Ausência do médico"
+        logger.info(
+            f"Iniciando tratamento de ausência | medico_id={medico_id} | "
+            f"periodo={data_inicio} a {data_fim} | acao={acao.value}"
+        )
+
+        try:
+            medico = self.db.query(Medico).filter(Medico.id == medico_id).first()
+            if not medico:
+                logger.warning(f"Médico não encontrado | medico_id={medico_id}")
+                return None
+
+            inicio = max(datetime.combine(data_inicio, time.min), datetime.now())
+            fim = datetime.combine(data_fim, time.min) + timedelta(days=1)
+
+            # Médicos que podem receber os agendamentos e janela de busca
+            agora = datetime.now()
+            limite_minimo = agora + timedelta(hours=settings.min_advance_booking_hours)
+            limite_maximo = agora + timedelta(days=settings.max_advance_booking_days)
+            destinos: List[int] = []
+            inicio_busca = inicio
+            if acao == AcaoAusencia.REAGENDAR:
+                destinos = [medico_id]
+                inicio_busca = max(fim, limite_minimo)
+            elif acao == AcaoAusencia.TRANSFERIR:
+                destinos = [
+                    outro.id
+                    for outro in DisponibilidadeService(self.db).carregar_medicos(
+                        especialidade_id=medico.especialidade_id
+                    )
+                    if outro.id != medico_id
+                ]
+                inicio_busca = max(inicio, limite_minimo)
+
+            # Planeja os destinos com as agendas lidas sem trava
+            travados: Set[Tuple[int, date]] = {
+                (medico_id, dia) for dia in self._dias(inicio, fim)
+            }
+            if acao != AcaoAusencia.CANCELAR:
+                planejados = self._carregar_agendamentos(medico_id, inicio, fim)
+                travados.update(
+                    self._pares_destinos(
+                        planejados,
+                        self._escolher_destinos(
+                            planejados, destinos, inicio_busca, limite_maximo, acao
+                        ),
+                    )
+                )
+
+            while True:
+                # Trava, em ordem, os dias do médico ausente e os (médico, dia) de destino
+                self._travar(travados)
+
+                agendamentos = self._carregar_agendamentos(medico_id, inicio, fim)
+
+                resumo: Dict[str, Any] = {
+                    "medico_id": medico_id,
+                    "data_inicio": data_inicio,
+                    "data_fim": data_fim,
+                    "acao": acao,
+                    "total": len(agendamentos),
+                    "cancelados": 0,
+                    "reagendados": 0,
+                    "sem_horario": 0,
+                    "itens": [],
+                }
+                if not agendamentos:
+                    self.db.rollback()
+                    logger.info(f"Nenhum agendamento afetado pela ausência | medico_id={medico_id}")
+                    return resumo
+
+                if acao == AcaoAusencia.CANCELAR:
+                    self._cancelar(agendamentos, motivo, resumo)
+                    break
+
+                # Refaz a escolha sob a trava; um destino em dia não travado exige
+                # recomeçar com todas as travas na ordem global. O conjunto travado
+                # só cresce, então as tentativas terminam
+                escolhidos = self._escolher_destinos(
+                    agendamentos, destinos, inicio_busca, limite_maximo, acao
+                )
+                faltantes = self._pares_destinos(agendamentos, escolhidos) - travados
+                if not faltantes:
+                    self._redistribuir(agendamentos, escolhidos, motivo, resumo)
+                    break
+
+                logger.debug(
+                    f"Destino fora dos dias travados, recomeçando com as travas ampliadas | "
+                    f"medico_id={medico_id} | faltantes={len(faltantes)}"
+                )
+                self.db.rollback()
+                travados.update(faltantes)
+
+            self.db.commit()
+
+            logger.success(
+                f"Ausência tratada | medico_id={medico_id} | periodo={data_inicio} a {data_fim} | "
+                f"acao={acao.value} | total={resumo['total']} | cancelados={resumo['cancelados']} | "
+                f"reagendados={resumo['reagendados']} | sem_horario={resumo['sem_horario']}"
+            )
+            return resumo
+
+        except Exception as e:
+            logger.exception(
+                f"Erro ao tratar ausência | medico_id={medico_id} | acao={acao.value} | erro={str(e)}"
+            )
+            self.db.rollback()
+            raise
+
+    def _carregar_agendamentos(
+        self, medico_id: int, inicio: datetime, fim: datetime
+    ) -> List[Agendamento]:
+        """Agendamentos ativos do médico no período, em ordem cronológica."""
+        return (
+            self.db.query(Agendamento)
+            .filter(
+                and_(
+                    Agendamento.medico_id == medico_id,
+                    Agendamento.status.in_(STATUS_OCUPANTES),
+                    Agendamento.data_hora >= inicio,
+                    Agendamento.data_hora < fim,
+                )
+            )
+            .order_by(Agendamento.data_hora.asc(), Agendamento.id.asc())
+            .all()
+        )
+
+    def _escolher_destinos(
+        self,
+        agendamentos: List[Agendamento],
+        destinos: List[int],
+        inicio_busca: datetime,
+        limite_maximo: datetime,
+        acao: AcaoAusencia,
+    ) -> List[Optional[Tuple[int, datetime]]]:
+        """
+        Primeiro (médico, data/hora) livre de cada agendamento, na ordem dos agendamentos.
+
+        Os mapas são lidos do banco (sem cache) e cada escolha ocupa o horário
+        para os agendamentos seguintes. None quando não há horário livre.
+        """
+        if not agendamentos or not destinos or inicio_busca >= limite_maximo:
+            return [None] * len(agendamentos)
+        mapas = DisponibilidadeService(self.db).construir_mapas(
+            destinos, inicio_busca.date(), limite_maximo.date(), usar_cache=False
+        )
+        escolhidos: List[Optional[Tuple[int, datetime]]] = []
+        for agendamento in agendamentos:
+            destino = self._primeiro_horario_livre(
+                mapas,
+                self._minimo(agendamento, inicio_busca, acao),
+                limite_maximo,
+                agendamento.duracao_minutos,
+            )
+            if destino is not None:
+                novo_medico_id, nova_data_hora = destino
+                mapas[novo_medico_id][nova_data_hora.date()].marcar_ocupado(
+                    nova_data_hora, nova_data_hora + timedelta(minutes=agendamento.duracao_minutos)
+                )
+            escolhidos.append(destino)
+        return escolhidos
+
+    def _pares_destinos(
+        self,
+        agendamentos: List[Agendamento],
+        escolhidos: List[Optional[Tuple[int, datetime]]],
+    ) -> Set[Tuple[int, date]]:
+        """(Médico, dia) ocupados pelos destinos escolhidos."""
+        pares: Set[Tuple[int, date]] = set()
+        for agendamento, destino in zip(agendamentos, escolhidos):
+            if destino is not None:
+                pares.update(self._pares(destino[0], destino[1], agendamento.duracao_minutos))
+        return pares
+
+    def _travar(self, pares: Set[Tuple[int, date]]) -> None:
+        """Trava os (médico, dia) informados, em ordem de médico e dia."""
+        dias_por_medico: Dict[int, Set[date]] = {}
+        for medico_id, dia in pares:
+            dias_por_medico.setdefault(medico_id, set()).add(dia)
+        trava = TravaAgendaService(self.db)
+        for medico_id in sorted(dias_por_medico):
+            trava.travar(medico_id, dias_por_medico[medico_id])
+
+    def _cancelar(
+        self, agendamentos: List[Agendamento], motivo: str, resumo: Dict[str, Any]
+    ) -> None:
+        """Cancela os agendamentos com UPDATE e DELETE em conjunto. Não faz commit."""
+        ids = [agendamento.id for agendamento in agendamentos]
+        agora = datetime.now()
+
+        # UPDATE em conjunto não passa pelo version_id_col: a versão é incrementada aqui
+        self.db.execute(
+            update(Agendamento)
+            .where(Agendamento.id.in_(ids))
+            .values(
+                status=StatusAgendamento.CANCELADO,
+                motivo_cancelamento=motivo,
+                cancelado_em=agora,
+                atualizado_em=agora,
+                versao=Agendamento.versao + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self.db.execute(delete(BloqueioHorario).where(BloqueioHorario.agendamento_id.in_(ids)))
+
+        self._registrar_alteracoes(
+            {
+                (agendamento.medico_id, dia)
+                for agendamento in agendamentos
+                for dia in AgendamentoService._dias_do_intervalo(
+                    agendamento.data_hora, agendamento.duracao_minutos
+                )
+            }
+        )
+
+        resumo["cancelados"] = len(ids)
+        resumo["itens"] = [
+            self._item(agendamento, "cancelado", agendamento.medico_id, agendamento.data_hora)
+            for agendamento in agendamentos
+        ]
+
+    def _redistribuir(
+        self,
+        agendamentos: List[Agendamento],
+        escolhidos: List[Optional[Tuple[int, datetime]]],
+        motivo: str,
+        resumo: Dict[str, Any],
+    ) -> None:
+        """Move cada agendamento para o destino escolhido sob a trava. Não faz commit."""
+        movidos: List[Agendamento] = []
+        alterados: Set[Tuple[int, date]] = set()
+        for agendamento, destino in zip(agendamentos, escolhidos):
+            medico_anterior = agendamento.medico_id
+            data_hora_anterior = agendamento.data_hora
+
+            if destino is None:
+                resumo["sem_horario"] += 1
+                resumo["itens"].append(
+                    self._item(agendamento, "sem_horario", medico_anterior, data_hora_anterior)
+                )
+                logger.warning(
+                    f"Nenhum horário livre para redistribuir | agendamento_id={agendamento.id} | "
+                    f"medico_id={medico_anterior} | data_hora={data_hora_anterior}"
+                )
+                continue
+
+            novo_medico_id, nova_data_hora = destino
+            alterados.update(
+                (medico_anterior, dia)
+                for dia in AgendamentoService._dias_do_intervalo(
+                    data_hora_anterior, agendamento.duracao_minutos
+                )
+            )
+            alterados.update(
+                (novo_medico_id, dia)
+                for dia in AgendamentoService._dias_do_intervalo(
+                    nova_data_hora, agendamento.duracao_minutos
+                )
+            )
+
+            anotacao = (
+                f"Reagendado: {motivo}"
+                if novo_medico_id == medico_anterior
+                else f"Transferido do médico {medico_anterior}: {motivo}"
+            )
+            agendamento.medico_id = novo_medico_id
+            agendamento.data_hora = nova_data_hora
+            agendamento.status = StatusAgendamento.REAGENDADO
+            agendamento.observacoes = f"{agendamento.observacoes or ''}\n{anotacao}"
+            agendamento.atualizado_em = datetime.now()
+            movidos.append(agendamento)
+
+            resumo["reagendados"] += 1
+            resumo["itens"].append(
+                self._item(agendamento, "reagendado", medico_anterior, data_hora_anterior)
+            )
+
+        if not movidos:
+            return
+
+        self.db.flush()
+        self.db.execute(
+            delete(BloqueioHorario).where(
+                BloqueioHorario.agendamento_id.in_([agendamento.id for agendamento in movidos])
+            )
+        )
+        BloqueioHorarioService(self.db).bloquear_lote(movidos)
+        self._registrar_alteracoes(alterados)
+
+    @staticmethod
+    def _minimo(agendamento: Agendamento, inicio_busca: datetime, acao: AcaoAusencia) -> datetime:
+        """Início da busca de horário para o agendamento."""
+        # Na transferência o paciente mantém o horário original sempre que possível
+        if acao == AcaoAusencia.TRANSFERIR:
+            return max(inicio_busca, agendamento.data_hora)
+        return inicio_busca
+
+    @staticmethod
+    def _pares(medico_id: int, data_hora: datetime, duracao_minutos: int) -> Set[Tuple[int, date]]:
+        """(Médico, dia) ocupados por um agendamento."""
+        return {
+            (medico_id, dia)
+            for dia in AgendamentoService._dias_do_intervalo(data_hora, duracao_minutos)
+        }
+
+    @staticmethod
+    def _primeiro_horario_livre(
+        mapas: Dict[int, Dict[date, MapaOcupacao]],
+        minimo: datetime,
+        limite_maximo: datetime,
+        duracao_minutos: int,
+    ) -> Optional[Tuple[int, datetime]]:
+        """Primeiro (médico, data/hora) livre a partir de minimo entre os mapas informados."""
+        dia = minimo.date()
+        while dia <= limite_maximo.date():
+            melhor: Optional[Tuple[datetime, int]] = None
+            for medico_id, mapas_medico in mapas.items():
+                mapa = mapas_medico.get(dia)
+                if mapa is None:
+                    continue
+                for horario in mapa.horarios_livres(duracao_minutos):
+                    if horario < minimo or horario > limite_maximo:
+                        continue
+                    if melhor is None or (horario, medico_id) < melhor:
+                        melhor = (horario, medico_id)
+                    break
+            if melhor is not None:
+                return melhor[1], melhor[0]
+            dia += timedelta(days=1)
+        return None
+
+    def _registrar_alteracoes(self, medico_dias: Set[Tuple[int, date]]) -> None:
+        """Propaga as alterações para o cache e o inventário de horários. Não faz commit."""
+        dias_por_medico: Dict[int, Set[date]] = {}
+        for medico_id, dia in medico_dias:
+            dias_por_medico.setdefault(medico_id, set()).add(dia)
+
+        marcar_para_invalidacao(self.db, dias_por_medico.keys())
+
+        if not settings.slot_inventario_habilitado:
+            return
+
+        inventario = SlotInventarioService(self.db)
+        for medico_id, dias in dias_por_medico.items():
+            inventario.atualizar_dias(medico_id, dias)
+
+    @staticmethod
+    def _dias(inicio: datetime, fim: datetime) -> Set[date]:
+        """Dias do intervalo [inicio, fim)."""
+        dias: Set[date] = set()
+        dia = inicio.date()
+        while datetime.combine(dia, time.min) < fim:
+            dias.add(dia)
+            dia += timedelta(days=1)
+        return dias
+
+    @staticmethod
+    def _item(
+        agendamento: Agendamento,
+        situacao: str,
+        medico_id_anterior: int,
+        data_hora_anterior: datetime,
+    ) -> Dict[str, Any]:
+        """Linha do resumo para um agendamento."""
+        return {
+            "agendamento_id": agendamento.id,
+            "paciente_id": agendamento.paciente_id,
+            "situacao": situacao,
+            "medico_id_anterior": medico_id_anterior,
+            "data_hora_anterior": data_hora_anterior,
+            "medico_id": agendamento.medico_id,
+            "data_hora": agendamento.data_hora,
+        }
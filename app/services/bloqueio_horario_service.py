@@ -0,0 +1,159 @@
+"""
+Serviço para gestão dos bloqueios de horário dos agendamentos.
+
+Este serviço gerencia:
+- Bloqueio das células da grade ocupadas por um agendamento ativo
+- Liberação dos bloqueios em cancelamentos e mudanças de status
+- Reconstrução dos bloqueios a partir dos agendamentos existentes
+
+Os bloqueios são gravados na mesma transação do agendamento. A restrição
+única (medico_id, inicio) da tabela bloqueios_horario garante no banco que dois
+agendamentos ativos nunca ocupem a mesma célula: o segundo recebe
+IntegrityError, em qualquer um dos bancos suportados, sem precisar de
+revalidação após o commit.
+"""
+
+from typing import List
+from datetime import datetime, timedelta, time
+from loguru import logger
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, insert
+from sqlalchemy.exc import IntegrityError
+
+from app.database.models import Agendamento, BloqueioHorario
+from app.services.disponibilidade_service import STATUS_OCUPANTES
+from app.services.mapa_ocupacao import MapaOcupacao
+
+
+class BloqueioHorarioService:
+    """Serviço para gestão dos bloqueios de horário"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def celulas(data_hora: datetime, duracao_minutos: int) -> List[datetime]:
+        """
+        Lista o início das células da grade tocadas por [data_hora, data_hora + duracao).
+
+        A grade é a mesma dos mapas de ocupação: células de
+        consultation_interval_minutes minutos a partir da meia-noite.
+        """
+        resolucao = timedelta(minutes=MapaOcupacao.resolucao_minutos())
+        inicio_dia = datetime.combine(data_hora.date(), time.min)
+        celula = inicio_dia + ((data_hora - inicio_dia) // resolucao) * resolucao
+        fim = data_hora + timedelta(minutes=max(duracao_minutos, 1))
+
+        celulas: List[datetime] = []
+        while celula < fim:
+            celulas.append(celula)
+            celula += resolucao
+        return celulas
+
+    def bloquear(self, agendamento: Agendamento) -> None:
+        """
+        Grava os bloqueios das células ocupadas pelo agendamento.
+
+        O agendamento já deve ter id (após flush). Não faz commit.
+
+        Raises:
+            IntegrityError: Se alguma célula já estiver bloqueada por outro agendamento
+        """
+        self.bloquear_lote([agendamento])
+
+    def bloquear_lote(self, agendamentos: List[Agendamento]) -> None:
+        """
+        Grava os bloqueios de vários agendamentos em um único executemany.
+
+        Os agendamentos já devem ter id (após flush). Não faz commit.
+
+        Raises:
+            IntegrityError: Se alguma célula já estiver bloqueada por outro agendamento
+        """
+        linhas = [
+            {
+                "medico_id": agendamento.medico_id,
+                "inicio": celula,
+                "agendamento_id": agendamento.id,
+            }
+            for agendamento in agendamentos
+            for celula in self.celulas(agendamento.data_hora, agendamento.duracao_minutos)
+        ]
+        if linhas:
+            self.db.execute(insert(BloqueioHorario), linhas)
+
+    def liberar(self, agendamento_id: int) -> None:
+        """Remove os bloqueios do agendamento. Não faz commit."""
+        self.db.execute(
+            delete(BloqueioHorario).where(BloqueioHorario.agendamento_id == agendamento_id)
+        )
+
+    def sincronizar(self, agendamento: Agendamento) -> None:
+        """
+        Ajusta os bloqueios ao estado atual do agendamento.
+
+        Os bloqueios antigos são removidos e, se o status ainda ocupa o horário,
+        as células da data/hora atual são bloqueadas. Não faz commit.
+
+        Raises:
+            IntegrityError: Se o novo horário já estiver bloqueado por outro agendamento
+        """
+        self.liberar(agendamento.id)
+        if agendamento.status in STATUS_OCUPANTES:
+            self.bloquear(agendamento)
+
+    def reconstruir(self) -> int:
+        """
+        Reconstrói os bloqueios a partir dos agendamentos ativos futuros.
+
+        Deve ser executado na implantação da tabela e sempre que
+        consultation_interval_minutes mudar. Agendamentos que já se sobrepõem no
+        banco não podem ser bloqueados: são registrados no log e contados à
+        parte para tratamento manual.
+
+        Returns:
+            Número de agendamentos bloqueados
+        """
+        logger.info("Iniciando reconstrução dos bloqueios de horário")
+
+        try:
+            self.db.execute(delete(BloqueioHorario))
+
+            agendamentos = (
+                self.db.query(Agendamento)
+                .filter(
+                    and_(
+                        Agendamento.status.in_(STATUS_OCUPANTES),
+                        Agendamento.data_hora >= datetime.combine(datetime.now().date(), time.min),
+                    )
+                )
+                .order_by(Agendamento.data_hora.asc(), Agendamento.id.asc())
+                .all()
+            )
+
+            bloqueados = 0
+            conflitos = 0
+            for agendamento in agendamentos:
+                try:
+                    with self.db.begin_nested():
+                        self.bloquear(agendamento)
+                    bloqueados += 1
+                except IntegrityError:
+                    conflitos += 1
+                    logger.warning(
+                        f"Agendamento sobreposto a outro já bloqueado | agendamento_id={agendamento.id} | "
+                        f"medico_id={agendamento.medico_id} | data_hora={agendamento.data_hora}"
+                    )
+
+            self.db.commit()
+
+            logger.success(
+                f"Bloqueios de horário reconstruídos | agendamentos={len(agendamentos)} | "
+                f"bloqueados={bloqueados} | conflitos={conflitos}"
+            )
+            return bloqueados
+
+        except Exception as e:
+            logger.exception(f"Erro ao reconstruir bloqueios de horário | erro={str(e)}")
+            self.db.rollback()
+            raise
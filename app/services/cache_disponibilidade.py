@@ -0,0 +1,194 @@
+"""
+Cache em memória dos mapas de ocupação usados no cálculo de disponibilidade.
+
+As entradas são indexadas por (medico_id, dia) e guardam os bits do
+MapaOcupacao junto com a versão do médico no momento do cálculo. Cada médico
+tem um contador de versão que é incrementado a cada escrita que pode alterar
+sua agenda:
+- criação, reagendamento, cancelamento, confirmação e atualização de agendamentos
+- criação e liberação de reservas temporárias de horário
+- qualquer inclusão, alteração ou exclusão de Disponibilidade (eventos do SQLAlchemy)
+
+Uma entrada só é devolvida se a versão gravada for a versão atual do médico,
+então nenhuma entrada precisa ser removida na invalidação. A versão é lida
+antes de carregar os dados do banco e os incrementos ocorrem após o commit,
+de modo que um cálculo concorrente com uma escrita nunca fica válido.
+
+O cache é por processo. Com vários workers, escritas feitas em um worker não
+invalidam os demais; o tempo de vida das entradas (cache_disponibilidade_ttl_segundos)
+limita por quanto tempo um worker pode servir um mapa desatualizado. A
+validação de conflitos na criação de agendamentos nunca usa o cache.
+"""
+
+import threading
+import time as relogio
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+from datetime import date
+
+from loguru import logger
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.database.leitura_replica import janela_leitura_principal
+from app.database.models import Disponibilidade
+
+# Chave da sessão onde ficam os médicos a invalidar no próximo commit
+CHAVE_INVALIDACAO_SESSAO = "cache_disponibilidade_medicos"
+
+
+class CacheDisponibilidade:
+    """Cache LRU versionado de mapas de ocupação por (medico_id, dia)"""
+
+    def __init__(self, tamanho_maximo: int, ttl_segundos: int):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_segundos = ttl_segundos
+        self._entradas: "OrderedDict[Tuple[int, date], Tuple[int, float, int, int]]" = OrderedDict()
+        self._versoes: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    @property
+    def habilitado(self) -> bool:
+        """Indica se o cache está ativo."""
+        return settings.cache_disponibilidade_habilitado and self.tamanho_maximo > 0
+
+    def versao(self, medico_id: int) -> int:
+        """Versão atual da agenda do médico."""
+        with self._lock:
+            return self._versoes.get(medico_id, 0)
+
+    def obter(self, medico_id: int, dia: date) -> Optional[Tuple[int, int]]:
+        """
+        Busca os bits (disponivel, ocupado) do mapa do médico no dia.
+
+        Returns:
+            Tupla (disponivel, ocupado) ou None se não houver entrada válida
+        """
+        chave = (medico_id, dia)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                versao, expira_em, disponivel, ocupado = entrada
+                if versao == self._versoes.get(medico_id, 0) and expira_em > relogio.monotonic():
+                    self._entradas.move_to_end(chave)
+                    self.acertos += 1
+                    return disponivel, ocupado
+                del self._entradas[chave]
+            self.falhas += 1
+            return None
+
+    def armazenar(
+        self,
+        medico_id: int,
+        dia: date,
+        versao: int,
+        disponivel: int,
+        ocupado: int,
+        validade_segundos: Optional[float] = None,
+    ) -> None:
+        """
+        Grava o mapa do médico no dia calculado com a versão informada.
+
+        A versão deve ter sido lida antes de carregar os dados do banco. Se a
+        agenda do médico mudou durante o cálculo, a entrada não é gravada.
+        validade_segundos encurta o tempo de vida da entrada (por exemplo, até
+        a expiração de uma reserva temporária marcada no mapa).
+        """
+        ttl = self.ttl_segundos
+        if validade_segundos is not None:
+            ttl = min(ttl, validade_segundos)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if versao != self._versoes.get(medico_id, 0):
+                return
+            chave = (medico_id, dia)
+            self._entradas[chave] = (
+                versao,
+                relogio.monotonic() + ttl,
+                disponivel,
+                ocupado,
+            )
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self.remocoes += 1
+
+    def invalidar_medico(self, medico_id: int) -> None:
+        """Invalida todas as entradas do médico incrementando sua versão."""
+        with self._lock:
+            self._versoes[medico_id] = self._versoes.get(medico_id, 0) + 1
+        logger.debug(f"Cache de disponibilidade invalidado | medico_id={medico_id}")
+
+    def limpar(self) -> None:
+        """Remove todas as entradas e zera os contadores."""
+        with self._lock:
+            self._entradas.clear()
+            self.acertos = 0
+            self.falhas = 0
+            self.remocoes = 0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores de uso do cache."""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "habilitado": self.habilitado,
+                "entradas": len(self._entradas),
+                "tamanho_maximo": self.tamanho_maximo,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "remocoes": self.remocoes,
+                "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+            }
+
+
+cache_disponibilidade = CacheDisponibilidade(
+    tamanho_maximo=settings.cache_disponibilidade_tamanho_maximo,
+    ttl_segundos=settings.cache_disponibilidade_ttl_segundos,
+)
+
+
+def marcar_para_invalidacao(db: Session, medico_ids: Iterable[int]) -> None:
+    """
+    Agenda a invalidação do cache dos médicos para o commit da sessão.
+
+    Se a transação for desfeita, nada é invalidado.
+    """
+    db.info.setdefault(CHAVE_INVALIDACAO_SESSAO, set()).update(
+        medico_id for medico_id in medico_ids if medico_id is not None
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(session: Session) -> None:
+    medico_ids = session.info.pop(CHAVE_INVALIDACAO_SESSAO, ())
+    for medico_id in medico_ids:
+        cache_disponibilidade.invalidar_medico(medico_id)
+    if medico_ids:
+        # Leituras destes médicos vão ao banco principal enquanto a réplica alcança a escrita
+        janela_leitura_principal.registrar_escrita(medico_ids=medico_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_invalidacoes(session: Session) -> None:
+    session.info.pop(CHAVE_INVALIDACAO_SESSAO, None)
+
+
+@event.listens_for(Disponibilidade, "after_insert")
+@event.listens_for(Disponibilidade, "after_update")
+@event.listens_for(Disponibilidade, "after_delete")
+def _disponibilidade_alterada(mapper, connection, disponibilidade: Disponibilidade) -> None:
+    sessao = inspect(disponibilidade).session
+    if sessao is None:
+        return
+    # Se o médico da disponibilidade mudou, invalida o anterior também
+    historico = inspect(disponibilidade).attrs.medico_id.history
+    marcar_para_invalidacao(
+        sessao, [disponibilidade.medico_id, *(historico.deleted or ())]
+    )
@@ -0,0 +1,92 @@
+"""
+Coalescência de requisições idênticas em andamento (single-flight).
+
+Quando várias requisições iguais chegam ao mesmo tempo (ex: dezenas de
+pacientes consultando o mesmo médico e data logo após uma campanha de
+WhatsApp), apenas a primeira executa o cálculo. As demais aguardam o mesmo
+resultado em vez de repetir as consultas ao banco.
+
+O cálculo roda no executor limitado do banco, liberando o event loop para
+receber as requisições concorrentes, e em uma tarefa separada protegida com
+asyncio.shield: se o cliente que iniciou o cálculo desconectar, as demais
+requisições continuam recebendo o resultado. Por isso a função recebe uma
+sessão aberta e fechada pelo próprio cálculo, e não a sessão da requisição,
+que é fechada quando o handler que iniciou o cálculo é cancelado. Exceções
+(inclusive HTTPException) são repassadas a todas as requisições que
+compartilham o cálculo.
+
+O resultado é compartilhado entre requisições e não deve ser alterado pelos
+chamadores. A coalescência é por processo e vale apenas para cálculos em
+andamento: nada é guardado após a conclusão.
+"""
+
+import asyncio
+from functools import partial
+from typing import Any, Callable, Dict, Hashable
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.database.executor_banco import executor_banco
+from app.database.manager import abrir_sessao_leitura
+
+
+class CoalescedorRequisicoes:
+    """Compartilha um único cálculo entre requisições idênticas simultâneas"""
+
+    def __init__(self):
+        self._em_andamento: Dict[Hashable, asyncio.Future] = {}
+        self.executadas = 0
+        self.coalescidas = 0
+
+    async def executar(
+        self, chave: Hashable, funcao: Callable[[Session], Any], replica: bool = False
+    ) -> Any:
+        """
+        Executa a função no executor do banco, ou aguarda a execução em andamento com a mesma chave.
+
+        Args:
+            chave: Identifica a consulta (deve incluir todos os parâmetros que afetam o resultado)
+            funcao: Função síncrona que recebe a sessão do cálculo e retorna o resultado
+            replica: Se o cálculo lê da réplica; cálculos na réplica e no principal
+                não são compartilhados (janela de leitura após escrita)
+
+        Returns:
+            Resultado da função, compartilhado entre as requisições coalescidas
+        """
+        calcular = partial(self._calcular, funcao, replica)
+        if not settings.coalescencia_requisicoes_habilitada:
+            return await executor_banco.executar(calcular)
+
+        chave = (replica, chave)
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is not None:
+            self.coalescidas += 1
+            logger.debug(f"Requisição coalescida com cálculo em andamento | chave={chave}")
+            return await asyncio.shield(tarefa)
+
+        tarefa = asyncio.ensure_future(executor_banco.executar(calcular))
+        self._em_andamento[chave] = tarefa
+        self.executadas += 1
+        tarefa.add_done_callback(lambda concluida: self._finalizar(chave, concluida))
+        return await asyncio.shield(tarefa)
+
+    @staticmethod
+    def _calcular(funcao: Callable[[Session], Any], replica: bool) -> Any:
+        """Executa a função com uma sessão própria, independente da requisição que iniciou o cálculo."""
+        db = abrir_sessao_leitura(replica)
+        try:
+            return funcao(db)
+        finally:
+            db.close()
+
+    def _finalizar(self, chave: Hashable, tarefa: asyncio.Future) -> None:
+        """Libera a chave e marca a exceção como tratada caso ninguém mais aguarde a tarefa."""
+        if self._em_andamento.get(chave) is tarefa:
+            del self._em_andamento[chave]
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+
+coalescedor = CoalescedorRequisicoes()
@@ -0,0 +1,807 @@
+"""
+Serviço para cálculo de horários disponíveis.
+
+Este serviço gerencia:
+- Carga em lote de médicos, disponibilidades, agendamentos e reservas do período
+- Construção dos mapas de ocupação por médico e dia
+- Geração sob demanda dos horários livres, com paginação por cursor
+- Busca dos próximos horários livres de uma especialidade
+- Resumo da agenda por médico e dia, agregado no banco
+
+Em vez de validar cada horário individualmente contra o banco, todos os dados
+necessários são carregados com uma consulta por tabela e os horários livres são
+calculados sobre os mapas de ocupação (ver app.services.mapa_ocupacao).
+"""
+
+import base64
+import enum
+import heapq
+from itertools import islice
+from typing import List, Optional, Dict, Any, Tuple, Iterator
+from datetime import datetime, timedelta, date, time
+from loguru import logger
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, cast, func, Date
+
+from app.database.models import (
+    Agendamento,
+    Medico,
+    Disponibilidade,
+    ReservaHorario,
+    StatusAgendamento,
+)
+from app.config.config import settings
+from app.database.leitura_replica import janela_leitura_principal, sessao_da_replica
+from app.services.mapa_ocupacao import MapaOcupacao
+from app.services.cache_disponibilidade import cache_disponibilidade
+
+# Status de agendamento que ocupam o horário do médico (um agendamento
+# reagendado continua ativo na nova data/hora)
+STATUS_OCUPANTES = [
+    StatusAgendamento.AGENDADO,
+    StatusAgendamento.CONFIRMADO,
+    StatusAgendamento.REAGENDADO,
+]
+
+# Margem para encontrar agendamentos iniciados antes do período que ainda o ocupam
+MARGEM_BUSCA_AGENDAMENTOS = timedelta(days=1)
+
+# Quantidade de dias do primeiro bloco carregado na geração sob demanda
+DIAS_PRIMEIRO_BLOCO = 7
+
+
+class PeriodoDia(str, enum.Enum):
+    """
+    Períodos do dia para filtrar horários.
+
+    Attributes:
+        MANHA: Antes das 12:00
+        TARDE: Das 12:00 às 18:00
+        NOITE: A partir das 18:00
+    """
+
+    MANHA = "manha"
+    TARDE = "tarde"
+    NOITE = "noite"
+
+    @property
+    def limites(self) -> Tuple[time, Optional[time]]:
+        """Hora inicial e final (exclusiva) do período."""
+        return {
+            PeriodoDia.MANHA: (time(0, 0), time(12, 0)),
+            PeriodoDia.TARDE: (time(12, 0), time(18, 0)),
+            PeriodoDia.NOITE: (time(18, 0), None),
+        }[self]
+
+
+class DisponibilidadeService:
+    """Serviço para cálculo de horários disponíveis"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def carregar_medicos(
+        self,
+        medico_id: Optional[int] = None,
+        especialidade_id: Optional[int] = None,
+        medico_ids: Optional[List[int]] = None,
+    ) -> List[Medico]:
+        """
+        Carrega os médicos ativos com a especialidade em uma única consulta.
+
+        Args:
+            medico_id: Filtrar por médico específico
+            especialidade_id: Filtrar por especialidade
+            medico_ids: Filtrar por lista de médicos
+
+        Returns:
+            Lista de médicos ativos
+        """
+        query = (
+            self.db.query(Medico)
+            .options(joinedload(Medico.especialidade))
+            .filter(Medico.ativo == True)
+        )
+
+        if medico_id:
+            query = query.filter(Medico.id == medico_id)
+        if especialidade_id:
+            query = query.filter(Medico.especialidade_id == especialidade_id)
+        if medico_ids:
+            query = query.filter(Medico.id.in_(medico_ids))
+
+        return query.order_by(Medico.id.asc()).all()
+
+    def carregar_disponibilidades(
+        self, medico_ids: List[int]
+    ) -> Dict[int, Dict[int, List[Disponibilidade]]]:
+        """
+        Carrega as disponibilidades ativas de vários médicos em uma única consulta.
+
+        Args:
+            medico_ids: IDs dos médicos
+
+        Returns:
+            Dicionário medico_id -> dia_semana -> disponibilidades ordenadas por hora_inicio
+        """
+        resultado: Dict[int, Dict[int, List[Disponibilidade]]] = {
+            medico_id: {} for medico_id in medico_ids
+        }
+        if not medico_ids:
+            return resultado
+
+        disponibilidades = (
+            self.db.query(Disponibilidade)
+            .filter(
+                and_(
+                    Disponibilidade.medico_id.in_(medico_ids),
+                    Disponibilidade.ativa == True,
+                )
+            )
+            .order_by(Disponibilidade.hora_inicio.asc())
+            .all()
+        )
+
+        for disp in disponibilidades:
+            resultado[disp.medico_id].setdefault(disp.dia_semana, []).append(disp)
+
+        return resultado
+
+    def carregar_ocupacoes(
+        self, medico_ids: List[int], data_inicio: datetime, data_fim: datetime
+    ) -> Dict[int, List[Tuple[datetime, datetime]]]:
+        """
+        Carrega os agendamentos ativos do período em uma única consulta.
+
+        Args:
+            medico_ids: IDs dos médicos
+            data_inicio: Início do período
+            data_fim: Fim do período
+
+        Returns:
+            Dicionário medico_id -> intervalos ocupados (mesclados e ordenados)
+        """
+        resultado: Dict[int, List[Tuple[datetime, datetime]]] = {
+            medico_id: [] for medico_id in medico_ids
+        }
+        if not medico_ids:
+            return resultado
+
+        linhas = (
+            self.db.query(
+                Agendamento.medico_id,
+                Agendamento.data_hora,
+                Agendamento.duracao_minutos,
+            )
+            .filter(
+                and_(
+                    Agendamento.medico_id.in_(medico_ids),
+                    Agendamento.status.in_(STATUS_OCUPANTES),
+                    Agendamento.data_hora >= data_inicio - MARGEM_BUSCA_AGENDAMENTOS,
+                    Agendamento.data_hora < data_fim,
+                )
+            )
+            .order_by(Agendamento.data_hora.asc())
+            .all()
+        )
+
+        for medico_id, data_hora, duracao_minutos in linhas:
+            resultado[medico_id].append(
+                (data_hora, data_hora + timedelta(minutes=duracao_minutos))
+            )
+
+        return {
+            medico_id: self._mesclar_intervalos(intervalos)
+            for medico_id, intervalos in resultado.items()
+        }
+
+    def carregar_reservas(
+        self, medico_ids: List[int], data_inicio: datetime, data_fim: datetime
+    ) -> Dict[int, List[Tuple[datetime, datetime, datetime]]]:
+        """
+        Carrega as reservas temporárias ainda válidas do período em uma única consulta.
+
+        Reservas expiradas são descartadas pelo filtro em expira_em, sem
+        depender da remoção periódica.
+
+        Args:
+            medico_ids: IDs dos médicos
+            data_inicio: Início do período
+            data_fim: Fim do período
+
+        Returns:
+            Dicionário medico_id -> lista de (início, fim, expira_em) das reservas
+        """
+        resultado: Dict[int, List[Tuple[datetime, datetime, datetime]]] = {
+            medico_id: [] for medico_id in medico_ids
+        }
+        if not medico_ids:
+            return resultado
+
+        linhas = (
+            self.db.query(
+                ReservaHorario.medico_id,
+                ReservaHorario.data_hora,
+                ReservaHorario.duracao_minutos,
+                ReservaHorario.expira_em,
+            )
+            .filter(
+                and_(
+                    ReservaHorario.medico_id.in_(medico_ids),
+                    ReservaHorario.expira_em > datetime.now(),
+                    ReservaHorario.data_hora >= data_inicio - MARGEM_BUSCA_AGENDAMENTOS,
+                    ReservaHorario.data_hora < data_fim,
+                )
+            )
+            .all()
+        )
+
+        for medico_id, data_hora, duracao_minutos, expira_em in linhas:
+            resultado[medico_id].append(
+                (data_hora, data_hora + timedelta(minutes=duracao_minutos), expira_em)
+            )
+
+        return resultado
+
+    @staticmethod
+    def _mesclar_intervalos(
+        intervalos: List[Tuple[datetime, datetime]]
+    ) -> List[Tuple[datetime, datetime]]:
+        """Mescla intervalos ordenados por início que se sobrepõem."""
+        mesclados: List[Tuple[datetime, datetime]] = []
+        for inicio, fim in intervalos:
+            if mesclados and inicio < mesclados[-1][1]:
+                if fim > mesclados[-1][1]:
+                    mesclados[-1] = (mesclados[-1][0], fim)
+            else:
+                mesclados.append((inicio, fim))
+        return mesclados
+
+    def construir_mapas(
+        self,
+        medico_ids: List[int],
+        dia_inicio: date,
+        dia_fim: date,
+        disponibilidades: Optional[Dict[int, Dict[int, List[Disponibilidade]]]] = None,
+        usar_cache: bool = True,
+    ) -> Dict[int, Dict[date, MapaOcupacao]]:
+        """
+        Constrói os mapas de ocupação dos médicos para cada dia de atendimento.
+
+        Com o cache de disponibilidade habilitado, médicos com todos os dias do
+        período em cache são atendidos sem consultas ao banco; os demais são
+        calculados e gravados no cache.
+
+        Args:
+            medico_ids: IDs dos médicos
+            dia_inicio: Primeiro dia do período
+            dia_fim: Último dia do período (inclusive)
+            disponibilidades: Disponibilidades já carregadas (evita nova consulta)
+            usar_cache: Se False, lê sempre do banco e não grava no cache (escritas
+                que dependem dos mapas, feitas sob a trava da agenda)
+
+        Returns:
+            Dicionário medico_id -> dia -> mapa de ocupação (apenas dias com atendimento)
+        """
+        mapas: Dict[int, Dict[date, MapaOcupacao]] = {}
+
+        # Médicos com todos os dias do período em cache não consultam o banco
+        medicos_calcular: List[int] = []
+        versoes: Dict[int, int] = {}
+        for medico_id in medico_ids:
+            mapas_cache = (
+                self._mapas_em_cache(medico_id, dia_inicio, dia_fim) if usar_cache else None
+            )
+            if mapas_cache is None:
+                versoes[medico_id] = cache_disponibilidade.versao(medico_id)
+                medicos_calcular.append(medico_id)
+            else:
+                mapas[medico_id] = mapas_cache
+
+        if not medicos_calcular:
+            return mapas
+
+        if disponibilidades is None:
+            disponibilidades = self.carregar_disponibilidades(medicos_calcular)
+
+        inicio = datetime.combine(dia_inicio, time.min)
+        fim = datetime.combine(dia_fim, time.min) + timedelta(days=1)
+        ocupacoes = self.carregar_ocupacoes(medicos_calcular, inicio, fim)
+        reservas = self.carregar_reservas(medicos_calcular, inicio, fim)
+        agora = datetime.now()
+
+        for medico_id in medicos_calcular:
+            disponibilidades_medico = disponibilidades[medico_id]
+            mapas_medico: Dict[date, MapaOcupacao] = {}
+            # Expiração mais próxima das reservas de cada dia (limita o cache)
+            expiracoes: Dict[date, datetime] = {}
+
+            dia = dia_inicio
+            while dia <= dia_fim:
+                disponibilidades_dia = disponibilidades_medico.get(dia.weekday())
+                if disponibilidades_dia:
+                    mapa = MapaOcupacao(medico_id, dia)
+                    for disp in disponibilidades_dia:
+                        mapa.marcar_disponivel(disp.hora_inicio, disp.hora_fim)
+                    mapas_medico[dia] = mapa
+                dia += timedelta(days=1)
+
+            # Cada intervalo ocupado (agendamento ou reserva) é marcado em todos
+            # os dias que toca
+            intervalos = [
+                (inicio_ocupado, fim_ocupado, None)
+                for inicio_ocupado, fim_ocupado in ocupacoes[medico_id]
+            ]
+            intervalos.extend(reservas[medico_id])
+            for inicio_ocupado, fim_ocupado, expira_em in intervalos:
+                dia = inicio_ocupado.date()
+                while dia <= (fim_ocupado - timedelta(microseconds=1)).date():
+                    if dia in mapas_medico:
+                        mapas_medico[dia].marcar_ocupado(inicio_ocupado, fim_ocupado)
+                    if expira_em is not None and (dia not in expiracoes or expira_em < expiracoes[dia]):
+                        expiracoes[dia] = expira_em
+                    dia += timedelta(days=1)
+
+            mapas[medico_id] = mapas_medico
+
+            # Mapas lidos da réplica logo após uma escrita no médico podem estar
+            # atrasados e não vão para o cache compartilhado
+            replica_atrasada = sessao_da_replica(self.db) and (
+                janela_leitura_principal.usar_principal(medico_id=medico_id)
+            )
+            if usar_cache and cache_disponibilidade.habilitado and not replica_atrasada:
+                # Dias sem atendimento também são gravados, com disponivel=0
+                dia = dia_inicio
+                while dia <= dia_fim:
+                    mapa = mapas_medico.get(dia)
+                    cache_disponibilidade.armazenar(
+                        medico_id,
+                        dia,
+                        versoes[medico_id],
+                        mapa.disponivel if mapa else 0,
+                        mapa.ocupado if mapa else 0,
+                        validade_segundos=(
+                            (expiracoes[dia] - agora).total_seconds() if dia in expiracoes else None
+                        ),
+                    )
+                    dia += timedelta(days=1)
+
+        return mapas
+
+    @staticmethod
+    def _mapas_em_cache(
+        medico_id: int, dia_inicio: date, dia_fim: date
+    ) -> Optional[Dict[date, MapaOcupacao]]:
+        """Mapas do médico no período, se todos os dias estiverem em cache."""
+        if not cache_disponibilidade.habilitado:
+            return None
+
+        mapas_medico: Dict[date, MapaOcupacao] = {}
+        dia = dia_inicio
+        while dia <= dia_fim:
+            bits = cache_disponibilidade.obter(medico_id, dia)
+            if bits is None:
+                return None
+            disponivel, ocupado = bits
+            if disponivel:
+                mapas_medico[dia] = MapaOcupacao(medico_id, dia, disponivel, ocupado)
+            dia += timedelta(days=1)
+        return mapas_medico
+
+    def contar_horarios_livres_por_data(
+        self,
+        medico_id: int,
+        data_inicio: date,
+        data_fim: date,
+        disponibilidades: Optional[Dict[int, Dict[int, List[Disponibilidade]]]] = None,
+    ) -> Dict[date, int]:
+        """
+        Conta os horários livres de um médico em cada data do período.
+
+        Os agendamentos do período inteiro são carregados em uma única consulta
+        e a contagem é feita sobre os mapas de ocupação, respeitando as
+        antecedências mínima e máxima. Datas sem horário livre não são
+        retornadas.
+
+        Args:
+            medico_id: ID do médico
+            data_inicio: Primeira data do período
+            data_fim: Última data do período (inclusive)
+            disponibilidades: Disponibilidades já carregadas (evita nova consulta)
+
+        Returns:
+            Dicionário ordenado data -> quantidade de horários livres
+        """
+        agora = datetime.now()
+        limite_inicial = max(
+            datetime.combine(data_inicio, time.min),
+            agora + timedelta(hours=settings.min_advance_booking_hours),
+        )
+        limite_final = min(
+            datetime.combine(data_fim, time.max),
+            agora + timedelta(days=settings.max_advance_booking_days),
+        )
+        if limite_inicial > limite_final:
+            return {}
+
+        mapas_medico = self.construir_mapas(
+            [medico_id],
+            limite_inicial.date(),
+            limite_final.date(),
+            disponibilidades=disponibilidades,
+        )[medico_id]
+
+        datas: Dict[date, int] = {}
+        for dia in sorted(mapas_medico):
+            livres = mapas_medico[dia].livres()
+            if dia in (limite_inicial.date(), limite_final.date()):
+                # Dias de fronteira: descarta horários fora das antecedências
+                total = sum(
+                    1
+                    for slot in mapas_medico[dia].horarios(livres)
+                    if limite_inicial <= slot <= limite_final
+                )
+            else:
+                total = livres.bit_count()
+            if total:
+                datas[dia] = total
+
+        logger.debug(
+            f"Horários livres contados por data | medico_id={medico_id} | "
+            f"periodo={data_inicio} a {data_fim} | datas_com_horarios={len(datas)}"
+        )
+        return datas
+
+    def _expressao_data(self, coluna):
+        """Expressão SQL que extrai a data de uma coluna DateTime no dialeto da sessão."""
+        dialeto = self.db.get_bind().dialect.name
+        if dialeto == "sqlite":
+            return func.date(coluna)
+        if dialeto == "oracle":
+            return func.trunc(coluna)
+        return cast(coluna, Date)
+
+    @staticmethod
+    def _normalizar_data(valor: Any) -> date:
+        """Converte o valor retornado por _expressao_data (str, date ou datetime) em date."""
+        if isinstance(valor, str):
+            return date.fromisoformat(valor[:10])
+        if isinstance(valor, datetime):
+            return valor.date()
+        return valor
+
+    def resumir_periodo(
+        self,
+        data_inicio: date,
+        data_fim: date,
+        especialidade_id: Optional[int] = None,
+        medico_ids: Optional[List[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Resume a agenda por médico e por dia sem gerar horários individuais.
+
+        Os agendamentos ativos são agregados no banco com GROUP BY (médico, data),
+        retornando a quantidade e a soma das durações; as reservas temporárias
+        válidas são agregadas da mesma forma e somadas aos horários ocupados.
+        A capacidade de cada dia vem das disponibilidades semanais, calculada
+        uma vez por dia da semana. Os horários ocupados são estimados pela soma
+        das durações dividida pelo intervalo entre consultas (limitada à
+        capacidade do dia), o que coincide com a grade quando os agendamentos
+        estão alinhados a ela. O resumo considera o dia inteiro, sem aplicar as
+        antecedências mínima e máxima de agendamento.
+
+        Args:
+            data_inicio: Primeira data do período
+            data_fim: Última data do período (inclusive)
+            especialidade_id: Filtrar por especialidade
+            medico_ids: Filtrar por lista de médicos
+
+        Returns:
+            Lista de dicionários por médico e data, ordenada por médico e data
+        """
+        medicos = self.carregar_medicos(especialidade_id=especialidade_id, medico_ids=medico_ids)
+        if not medicos or data_inicio > data_fim:
+            return []
+
+        ids = [medico.id for medico in medicos]
+        disponibilidades = self.carregar_disponibilidades(ids)
+
+        # Capacidade (em horários) de cada médico por dia da semana
+        capacidade: Dict[int, Dict[int, int]] = {}
+        for medico_id in ids:
+            capacidade[medico_id] = {}
+            for dia_semana, disponibilidades_dia in disponibilidades[medico_id].items():
+                mascara = 0
+                for disp in disponibilidades_dia:
+                    mascara |= MapaOcupacao.mascara_horario(disp.hora_inicio, disp.hora_fim)
+                capacidade[medico_id][dia_semana] = mascara.bit_count()
+
+        data_agendamento = self._expressao_data(Agendamento.data_hora)
+        linhas = (
+            self.db.query(
+                Agendamento.medico_id,
+                data_agendamento,
+                func.count(Agendamento.id),
+                func.sum(Agendamento.duracao_minutos),
+            )
+            .filter(
+                and_(
+                    Agendamento.medico_id.in_(ids),
+                    Agendamento.status.in_(STATUS_OCUPANTES),
+                    Agendamento.data_hora >= datetime.combine(data_inicio, time.min),
+                    Agendamento.data_hora
+                    < datetime.combine(data_fim, time.min) + timedelta(days=1),
+                )
+            )
+            .group_by(Agendamento.medico_id, data_agendamento)
+            .all()
+        )
+
+        ocupacao: Dict[Tuple[int, date], Tuple[int, int]] = {}
+        for medico_id, data_valor, quantidade, soma_duracao in linhas:
+            ocupacao[(medico_id, self._normalizar_data(data_valor))] = (
+                quantidade,
+                soma_duracao or 0,
+            )
+
+        # Reservas temporárias válidas também ocupam horários
+        data_reserva = self._expressao_data(ReservaHorario.data_hora)
+        linhas_reservas = (
+            self.db.query(
+                ReservaHorario.medico_id,
+                data_reserva,
+                func.sum(ReservaHorario.duracao_minutos),
+            )
+            .filter(
+                and_(
+                    ReservaHorario.medico_id.in_(ids),
+                    ReservaHorario.expira_em > datetime.now(),
+                    ReservaHorario.data_hora >= datetime.combine(data_inicio, time.min),
+                    ReservaHorario.data_hora
+                    < datetime.combine(data_fim, time.min) + timedelta(days=1),
+                )
+            )
+            .group_by(ReservaHorario.medico_id, data_reserva)
+            .all()
+        )
+        duracao_reservas: Dict[Tuple[int, date], int] = {
+            (medico_id, self._normalizar_data(data_valor)): soma_duracao or 0
+            for medico_id, data_valor, soma_duracao in linhas_reservas
+        }
+
+        resolucao = MapaOcupacao.resolucao_minutos()
+        resumo: List[Dict[str, Any]] = []
+        for medico in medicos:
+            dia = data_inicio
+            while dia <= data_fim:
+                total = capacidade[medico.id].get(dia.weekday(), 0)
+                agendamentos, soma_duracao = ocupacao.get((medico.id, dia), (0, 0))
+                soma_duracao += duracao_reservas.get((medico.id, dia), 0)
+                if total or agendamentos:
+                    ocupados = min(total, -(-soma_duracao // resolucao))
+                    resumo.append(
+                        {
+                            "medico_id": medico.id,
+                            "medico_nome": medico.nome,
+                            "data": dia,
+                            "total_horarios": total,
+                            "horarios_ocupados": ocupados,
+                            "horarios_livres": total - ocupados,
+                            "total_agendamentos": agendamentos,
+                        }
+                    )
+                dia += timedelta(days=1)
+
+        logger.debug(
+            f"Resumo de disponibilidade calculado | especialidade_id={especialidade_id} | "
+            f"medicos={len(medicos)} | periodo={data_inicio} a {data_fim} | linhas={len(resumo)}"
+        )
+        return resumo
+
+    @staticmethod
+    def codificar_cursor(horario: Dict[str, Any]) -> str:
+        """Gera o cursor opaco que aponta para depois do horário informado."""
+        valor = f"{horario['data_hora'].isoformat()}|{horario['medico_id']}"
+        return base64.urlsafe_b64encode(valor.encode()).decode()
+
+    @staticmethod
+    def decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+        """
+        Lê um cursor gerado por codificar_cursor.
+
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        try:
+            data_hora, medico_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(data_hora), int(medico_id)
+        except Exception as e:
+            raise ValueError(f"Cursor inválido: {cursor}") from e
+
+    @staticmethod
+    def _fluxo_horarios_medico(
+        medico: Medico,
+        mapas_medico: Dict[date, MapaOcupacao],
+        limite_inicial: datetime,
+        limite_final: datetime,
+        mascara_periodo: int,
+    ) -> Iterator[Dict[str, Any]]:
+        """Gera sob demanda, em ordem crescente, os horários livres de um médico."""
+        especialidade_nome = medico.especialidade.nome if medico.especialidade else ""
+        for dia in sorted(mapas_medico):
+            mapa = mapas_medico[dia]
+            for slot in mapa.horarios(mapa.livres() & mascara_periodo):
+                if slot < limite_inicial or slot > limite_final:
+                    continue
+                yield {
+                    "data_hora": slot,
+                    "medico_id": medico.id,
+                    "medico_nome": medico.nome,
+                    "especialidade": especialidade_nome,
+                }
+
+    def iterar_horarios(
+        self,
+        medico_id: Optional[int] = None,
+        especialidade_id: Optional[int] = None,
+        data_inicio: datetime = None,
+        data_fim: datetime = None,
+        periodo: Optional[PeriodoDia] = None,
+        apos: Optional[Tuple[datetime, int]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Gera sob demanda os horários disponíveis em ordem (data_hora, medico_id).
+
+        Médicos e disponibilidades são carregados uma única vez. Os dias são
+        processados em blocos que dobram de tamanho a cada iteração (7, 14,
+        28... dias); em cada bloco os mapas de ocupação são construídos com uma
+        consulta de agendamentos e os fluxos ordenados de cada médico são
+        intercalados com um merge de k vias. Se o consumidor parar de iterar, os
+        blocos seguintes não são carregados.
+
+        Args:
+            medico_id: Filtrar por médico específico
+            especialidade_id: Filtrar por especialidade
+            data_inicio: Data inicial da busca (padrão: agora)
+            data_fim: Data final da busca (padrão: 30 dias à frente)
+            periodo: Período do dia preferido (manhã, tarde ou noite)
+            apos: Retoma a busca após este (data_hora, medico_id), vindo de um cursor
+
+        Yields:
+            Dicionários com horários disponíveis
+        """
+        if not data_inicio:
+            data_inicio = datetime.now()
+        if not data_fim:
+            data_fim = data_inicio + timedelta(days=30)
+
+        # Limites de antecedência aplicados uma única vez para todo o período
+        agora = datetime.now()
+        limite_inicial = max(
+            data_inicio, agora + timedelta(hours=settings.min_advance_booking_hours)
+        )
+        limite_final = min(
+            data_fim, agora + timedelta(days=settings.max_advance_booking_days)
+        )
+        if apos:
+            limite_inicial = max(limite_inicial, apos[0])
+
+        medicos = self.carregar_medicos(medico_id, especialidade_id)
+        logger.debug(f"Médicos carregados para cálculo de horários | total={len(medicos)}")
+        if not medicos or limite_inicial > limite_final:
+            return
+
+        medico_ids = [medico.id for medico in medicos]
+        # Com o cache habilitado, as disponibilidades só são carregadas nos blocos com falhas
+        disponibilidades = (
+            None if cache_disponibilidade.habilitado else self.carregar_disponibilidades(medico_ids)
+        )
+
+        # Sem período preferido, a máscara -1 mantém todos os bits
+        mascara_periodo = (
+            MapaOcupacao.mascara_horario(*periodo.limites) if periodo else -1
+        )
+
+        dias_bloco = DIAS_PRIMEIRO_BLOCO
+        dia_bloco = limite_inicial.date()
+        while dia_bloco <= limite_final.date():
+            fim_bloco = min(
+                dia_bloco + timedelta(days=dias_bloco - 1), limite_final.date()
+            )
+            mapas = self.construir_mapas(
+                medico_ids, dia_bloco, fim_bloco, disponibilidades=disponibilidades
+            )
+
+            fluxos = [
+                self._fluxo_horarios_medico(
+                    medico, mapas[medico.id], limite_inicial, limite_final, mascara_periodo
+                )
+                for medico in medicos
+            ]
+            for horario in heapq.merge(
+                *fluxos, key=lambda h: (h["data_hora"], h["medico_id"])
+            ):
+                if apos and (horario["data_hora"], horario["medico_id"]) <= apos:
+                    continue
+                yield horario
+
+            dia_bloco = fim_bloco + timedelta(days=1)
+            dias_bloco *= 2
+
+    def gerar_horarios(
+        self,
+        medico_id: Optional[int] = None,
+        especialidade_id: Optional[int] = None,
+        data_inicio: datetime = None,
+        data_fim: datetime = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Gera a lista completa de horários disponíveis do período.
+
+        Args:
+            medico_id: Filtrar por médico específico
+            especialidade_id: Filtrar por especialidade
+            data_inicio: Data inicial da busca (padrão: agora)
+            data_fim: Data final da busca (padrão: 30 dias à frente)
+
+        Returns:
+            Lista de dicionários com horários disponíveis, em ordem cronológica
+        """
+        horarios_disponiveis = list(
+            self.iterar_horarios(
+                medico_id=medico_id,
+                especialidade_id=especialidade_id,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+            )
+        )
+
+        logger.debug(
+            f"Horários calculados em lote | medico_id={medico_id} | "
+            f"especialidade_id={especialidade_id} | total_horarios={len(horarios_disponiveis)}"
+        )
+        return horarios_disponiveis
+
+    def buscar_proximos_horarios(
+        self,
+        especialidade_id: int,
+        quantidade: int = 5,
+        periodo: Optional[PeriodoDia] = None,
+        data_inicio: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca os próximos horários livres entre todos os médicos de uma especialidade.
+
+        Percorre o horizonte de agendamento com iterar_horarios e para assim que
+        a quantidade pedida é atingida, sem carregar o restante do horizonte.
+
+        Args:
+            especialidade_id: ID da especialidade
+            quantidade: Número de horários desejados
+            periodo: Período do dia preferido (manhã, tarde ou noite)
+            data_inicio: Data inicial da busca (padrão: agora)
+
+        Returns:
+            Lista com até `quantidade` horários, em ordem cronológica
+        """
+        if quantidade <= 0:
+            return []
+
+        agora = datetime.now()
+        horarios = list(
+            islice(
+                self.iterar_horarios(
+                    especialidade_id=especialidade_id,
+                    data_inicio=data_inicio or agora,
+                    data_fim=agora + timedelta(days=settings.max_advance_booking_days),
+                    periodo=periodo,
+                ),
+                quantidade,
+            )
+        )
+
+        logger.debug(
+            f"Próximos horários calculados | especialidade_id={especialidade_id} | "
+            f"periodo={periodo.value if periodo else None} | total={len(horarios)}"
+        )
+        return horarios
@@ -0,0 +1,180 @@
+"""
+Serviço para chaves de idempotência das requisições de criação.
+
+Este serviço gerencia:
+- Reserva da chave antes do processamento da requisição, com prazo (lease)
+- Armazenamento da resposta final para repetições
+- Remoção das chaves expiradas
+
+Integrações como N8N e Make repetem a chamada quando ela demora. Com o
+cabeçalho Idempotency-Key, a primeira requisição reserva a chave e grava a
+resposta; as repetições recebem a resposta gravada sem buscar paciente,
+validar horário nem criar outro agendamento.
+
+A resposta é gravada na mesma transação do agendamento (concluir não faz
+commit), então não existe agendamento criado sem resposta para repetir. Se o
+processo cair entre a reserva e o commit, a chave fica sem resposta até
+em_andamento_ate (IDEMPOTENCIA_LEASE_SEGUNDOS) e depois é assumida pela
+próxima repetição, em vez de responder 409 até expirar.
+"""
+
+import hashlib
+import json
+from typing import Any, Optional
+from datetime import datetime, timedelta
+from loguru import logger
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config.config import settings
+from app.database.models import ChaveIdempotencia
+
+
+class IdempotenciaService:
+    """Serviço para chaves de idempotência"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def calcular_hash(corpo: str) -> str:
+        """Calcula o hash do corpo da requisição, usado para detectar reuso indevido da chave."""
+        return hashlib.sha256(corpo.encode("utf-8")).hexdigest()
+
+    def reservar(
+        self, chave: str, rota: str, hash_requisicao: str
+    ) -> Optional[ChaveIdempotencia]:
+        """
+        Reserva a chave para a requisição atual.
+
+        Uma reserva sem resposta cujo prazo venceu, feita pela mesma rota com o
+        mesmo corpo, é assumida pela requisição atual.
+
+        Args:
+            chave: Valor do cabeçalho Idempotency-Key
+            rota: Rota que recebeu a requisição
+            hash_requisicao: Hash do corpo da requisição
+
+        Returns:
+            None se a chave foi reservada agora (a requisição deve ser processada),
+            ou o registro existente e ainda válido da chave
+        """
+        agora = datetime.now()
+        registro = self.db.get(ChaveIdempotencia, chave)
+
+        if registro is not None:
+            if registro.expira_em > agora:
+                if (
+                    registro.resposta is None
+                    and registro.rota == rota
+                    and registro.hash_requisicao == hash_requisicao
+                    and (registro.em_andamento_ate is None or registro.em_andamento_ate <= agora)
+                ):
+                    if self._assumir(chave, agora):
+                        return None
+                    # Outra repetição assumiu primeiro
+                    self.db.refresh(registro)
+                return registro
+            # Chave expirada: pode ser reutilizada
+            self.db.delete(registro)
+            self.db.flush()
+
+        try:
+            self.db.add(
+                ChaveIdempotencia(
+                    chave=chave,
+                    rota=rota,
+                    hash_requisicao=hash_requisicao,
+                    em_andamento_ate=agora + timedelta(seconds=settings.idempotencia_lease_segundos),
+                    expira_em=agora + timedelta(hours=settings.idempotencia_ttl_horas),
+                )
+            )
+            self.db.commit()
+        except IntegrityError:
+            # Outra requisição com a mesma chave reservou primeiro
+            self.db.rollback()
+            return self.db.get(ChaveIdempotencia, chave)
+
+        logger.debug(f"Chave de idempotência reservada | chave={chave} | rota={rota}")
+        return None
+
+    def _assumir(self, chave: str, agora: datetime) -> bool:
+        """Renova o prazo de uma reserva vencida; False se outra requisição a assumiu ou concluiu."""
+        resultado = self.db.execute(
+            update(ChaveIdempotencia)
+            .where(
+                ChaveIdempotencia.chave == chave,
+                ChaveIdempotencia.resposta.is_(None),
+                or_(
+                    ChaveIdempotencia.em_andamento_ate.is_(None),
+                    ChaveIdempotencia.em_andamento_ate <= agora,
+                ),
+            )
+            .values(em_andamento_ate=agora + timedelta(seconds=settings.idempotencia_lease_segundos))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        if resultado.rowcount != 1:
+            return False
+        logger.warning(
+            f"Chave de idempotência com prazo vencido assumida | chave={chave}"
+        )
+        return True
+
+    def concluir(self, chave: str, status_code: int, resposta: Any) -> None:
+        """
+        Grava a resposta da requisição na chave reservada, sem commit.
+
+        Deve ser chamado dentro da transação do agendamento, para que a
+        resposta seja gravada no mesmo commit.
+
+        Args:
+            chave: Valor do cabeçalho Idempotency-Key
+            status_code: Status HTTP da resposta
+            resposta: Corpo da resposta já convertido para tipos JSON
+        """
+        self.db.execute(
+            update(ChaveIdempotencia)
+            .where(ChaveIdempotencia.chave == chave)
+            .values(
+                status_code=status_code,
+                resposta=json.dumps(resposta),
+                em_andamento_ate=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def descartar(self, chave: str) -> None:
+        """Remove a reserva da chave (ainda sem resposta) para que a requisição possa ser repetida."""
+        try:
+            self.db.rollback()
+            self.db.execute(
+                delete(ChaveIdempotencia).where(
+                    ChaveIdempotencia.chave == chave,
+                    ChaveIdempotencia.resposta.is_(None),
+                )
+            )
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Erro ao descartar chave de idempotência | chave={chave} | erro={str(e)}")
+            self.db.rollback()
+
+    def remover_expiradas(self) -> int:
+        """
+        Remove as chaves expiradas.
+
+        Returns:
+            Número de chaves removidas
+        """
+        try:
+            resultado = self.db.execute(
+                delete(ChaveIdempotencia).where(ChaveIdempotencia.expira_em <= datetime.now())
+            )
+            self.db.commit()
+            logger.info(f"Chaves de idempotência expiradas removidas | total={resultado.rowcount}")
+            return resultado.rowcount
+        except Exception as e:
+            logger.error(f"Erro ao remover chaves de idempotência expiradas | erro={str(e)}")
+            self.db.rollback()
+            return 0
@@ -0,0 +1,134 @@
+"""
+Mapa compacto de ocupação da agenda de um médico em um dia.
+
+Cada dia é dividido em uma grade fixa de células de
+consultation_interval_minutes minutos, a partir da meia-noite. O mapa guarda
+dois inteiros usados como conjuntos de bits:
+- disponivel: células em que uma consulta pode começar (períodos de atendimento)
+- ocupado: células cobertas por agendamentos ativos
+
+Com isso, busca de horários livres, verificação de conflito e "existe horário
+livre neste dia" viram operações bit a bit. Com intervalos de 30 minutos, cada
+mapa usa dois inteiros de 48 bits, o que permite manter o horizonte completo de
+agendamento de centenas de médicos em poucos megabytes.
+
+Os períodos de atendimento devem estar alinhados à grade (ex: 08:00 com
+intervalos de 30 minutos); um início desalinhado é arredondado para a próxima
+célula. Agendamentos desalinhados marcam todas as células que tocam.
+"""
+
+from typing import List, Optional
+from datetime import datetime, timedelta, date, time
+
+from app.config.config import settings
+
+
+class MapaOcupacao:
+    """Mapa de ocupação de um médico em um dia, com um bit por célula da grade"""
+
+    __slots__ = ("medico_id", "dia", "disponivel", "ocupado")
+
+    def __init__(self, medico_id: int, dia: date, disponivel: int = 0, ocupado: int = 0):
+        self.medico_id = medico_id
+        self.dia = dia
+        self.disponivel = disponivel
+        self.ocupado = ocupado
+
+    @staticmethod
+    def resolucao_minutos() -> int:
+        """Tamanho de cada célula da grade, em minutos."""
+        return settings.consultation_interval_minutes
+
+    @classmethod
+    def total_celulas(cls) -> int:
+        """Número de células de um dia."""
+        return (24 * 60 + cls.resolucao_minutos() - 1) // cls.resolucao_minutos()
+
+    @classmethod
+    def celulas_da_duracao(cls, duracao_minutos: int) -> int:
+        """Número de células cobertas por uma consulta com a duração informada."""
+        return max(1, -(-duracao_minutos // cls.resolucao_minutos()))
+
+    def _minutos(self, momento: datetime) -> int:
+        """Minutos desde a meia-noite do dia do mapa (limitados ao dia)."""
+        inicio_dia = datetime.combine(self.dia, time.min)
+        minutos = int((momento - inicio_dia).total_seconds() // 60)
+        return min(max(minutos, 0), 24 * 60)
+
+    @classmethod
+    def _mascara(cls, primeira: int, ultima: int) -> int:
+        """Máscara com os bits das células [primeira, ultima)."""
+        if ultima <= primeira:
+            return 0
+        return ((1 << (ultima - primeira)) - 1) << primeira
+
+    @classmethod
+    def mascara_horario(cls, hora_inicio: time, hora_fim: Optional[time] = None) -> int:
+        """Bits das células que começam em [hora_inicio, hora_fim) (padrão: até o fim do dia)."""
+        resolucao = cls.resolucao_minutos()
+        inicio = hora_inicio.hour * 60 + hora_inicio.minute
+        fim = hora_fim.hour * 60 + hora_fim.minute if hora_fim else 24 * 60
+        return cls._mascara(-(-inicio // resolucao), -(-fim // resolucao))
+
+    def marcar_disponivel(self, hora_inicio: time, hora_fim: time) -> None:
+        """Marca as células em que uma consulta pode começar dentro do período."""
+        self.disponivel |= self.mascara_horario(hora_inicio, hora_fim)
+
+    def marcar_ocupado(self, inicio: datetime, fim: datetime) -> None:
+        """Marca as células tocadas pelo intervalo [inicio, fim)."""
+        resolucao = self.resolucao_minutos()
+        minuto_inicio = self._minutos(inicio)
+        minuto_fim = self._minutos(fim)
+        if minuto_fim <= minuto_inicio:
+            return
+        self.ocupado |= self._mascara(
+            minuto_inicio // resolucao, -(-minuto_fim // resolucao)
+        )
+
+    def _bloqueados(self, duracao_minutos: int) -> int:
+        """Células em que uma consulta da duração informada colidiria com a ocupação."""
+        bloqueados = 0
+        for deslocamento in range(self.celulas_da_duracao(duracao_minutos)):
+            bloqueados |= self.ocupado >> deslocamento
+        return bloqueados
+
+    def livres(self, duracao_minutos: Optional[int] = None) -> int:
+        """Bits das células em que uma consulta pode começar sem conflito."""
+        if duracao_minutos is None:
+            duracao_minutos = settings.default_consultation_duration_minutes
+        return self.disponivel & ~self._bloqueados(duracao_minutos)
+
+    def possui_horario_livre(self, duracao_minutos: Optional[int] = None) -> bool:
+        """Indica se o dia tem ao menos um horário livre."""
+        return self.livres(duracao_minutos) != 0
+
+    def contar_livres(self, duracao_minutos: Optional[int] = None) -> int:
+        """Quantidade de horários livres no dia."""
+        return self.livres(duracao_minutos).bit_count()
+
+    def conflita(self, inicio: datetime, duracao_minutos: int) -> bool:
+        """Indica se uma consulta em [inicio, inicio + duracao) toca uma célula ocupada."""
+        resolucao = self.resolucao_minutos()
+        minuto_inicio = self._minutos(inicio)
+        minuto_fim = self._minutos(inicio + timedelta(minutes=duracao_minutos))
+        mascara = self._mascara(minuto_inicio // resolucao, -(-minuto_fim // resolucao))
+        return self.ocupado & mascara != 0
+
+    def horarios(self, bits: int) -> List[datetime]:
+        """Converte um conjunto de bits nas datas/horas de início das células."""
+        resolucao = timedelta(minutes=self.resolucao_minutos())
+        inicio_dia = datetime.combine(self.dia, time.min)
+        resultado: List[datetime] = []
+        while bits:
+            menor = bits & -bits
+            resultado.append(inicio_dia + resolucao * (menor.bit_length() - 1))
+            bits ^= menor
+        return resultado
+
+    def horarios_disponiveis(self) -> List[datetime]:
+        """Todos os horários de início dos períodos de atendimento do dia."""
+        return self.horarios(self.disponivel)
+
+    def horarios_livres(self, duracao_minutos: Optional[int] = None) -> List[datetime]:
+        """Horários livres do dia, em ordem crescente."""
+        return self.horarios(self.livres(duracao_minutos))
@@ -5,9 +5,10 @@ Serviço para gestão de médicos e especialidades.
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from loguru import logger
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.database.models import Medico, Especialidade
+from app.services.servico_assincrono import ServicoAssincrono
 
 
 class MedicoService:
@@ -83,12 +84,15 @@ class MedicoService:
             self.db.rollback()
             return None
 
-    def buscar_medico(self, medico_id: int) -> Optional[Medico]:
+    def buscar_medico(
+        self, medico_id: int, com_especialidade: bool = False
+    ) -> Optional[Medico]:
         """
         Busca um médico por ID.
         
         Args:
             medico_id: ID do médico a ser buscado
+            com_especialidade: Carrega a especialidade na mesma consulta
             
         Returns:
             Médico encontrado ou None
@@ -96,9 +100,10 @@ class MedicoService:
         logger.debug(f"Buscando médico | medico_id={medico_id}")
         
         try:
-            medico = (
-                self.db.query(Medico).filter(Medico.id == medico_id).first()
-            )
+            query = self.db.query(Medico)
+            if com_especialidade:
+                query = query.options(joinedload(Medico.especialidade))
+            medico = query.filter(Medico.id == medico_id).first()
             
             if medico:
                 logger.debug(
@@ -374,3 +379,53 @@ class EspecialidadeService:
             )
             return []
 
+
+class MedicoServiceAsync(ServicoAssincrono):
+    """Versão assíncrona do MedicoService (mesma lógica, sem bloquear o event loop)"""
+
+    servico_sincrono = MedicoService
+
+    async def criar_medico(self, dados: Dict[str, Any]) -> Optional[Medico]:
+        return await self.executar(self.sincrono.criar_medico, dados)
+
+    async def buscar_medico(
+        self, medico_id: int, com_especialidade: bool = False
+    ) -> Optional[Medico]:
+        return await self.executar(self.sincrono.buscar_medico, medico_id, com_especialidade)
+
+    async def listar_medicos(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        especialidade_id: Optional[int] = None,
+        ativo: Optional[bool] = None,
+    ) -> List[Medico]:
+        return await self.executar(
+            self.sincrono.listar_medicos,
+            skip=skip,
+            limit=limit,
+            especialidade_id=especialidade_id,
+            ativo=ativo,
+        )
+
+    async def atualizar_medico(self, medico_id: int, dados: Dict[str, Any]) -> Optional[Medico]:
+        return await self.executar(self.sincrono.atualizar_medico, medico_id, dados)
+
+
+class EspecialidadeServiceAsync(ServicoAssincrono):
+    """Versão assíncrona do EspecialidadeService (mesma lógica, sem bloquear o event loop)"""
+
+    servico_sincrono = EspecialidadeService
+
+    async def criar_especialidade(self, dados: Dict[str, Any]) -> Optional[Especialidade]:
+        return await self.executar(self.sincrono.criar_especialidade, dados)
+
+    async def buscar_especialidade(self, especialidade_id: int) -> Optional[Especialidade]:
+        return await self.executar(self.sincrono.buscar_especialidade, especialidade_id)
+
+    async def listar_especialidades(
+        self, skip: int = 0, limit: int = 100, ativa: Optional[bool] = None
+    ) -> List[Especialidade]:
+        return await self.executar(
+            self.sincrono.listar_especialidades, skip=skip, limit=limit, ativa=ativa
+        )
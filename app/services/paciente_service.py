@@ -11,8 +11,10 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 from loguru import logger
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 
 from app.database.models import Paciente, Agendamento
+from app.services.servico_assincrono import ServicoAssincrono
 
 
 class PacienteService:
@@ -92,6 +94,53 @@ class PacienteService:
             self.db.rollback()
             return None
 
+    def adicionar_paciente(self, dados: Dict[str, Any]) -> Optional[Paciente]:
+        """
+        Adiciona um novo paciente à transação atual, sem commit.
+        
+        Usado quando o cadastro faz parte de uma operação maior (ex.: criação
+        de agendamento via Botconversa), que confirma tudo em um único commit.
+        O chamador já deve ter verificado que o telefone não está cadastrado;
+        se outro cadastro concorrente gravar o telefone primeiro, a transação é
+        desfeita e o paciente existente é retornado.
+        
+        Args:
+            dados: Dicionário com dados do paciente (nome, telefone, etc.)
+            
+        Returns:
+            Paciente adicionado (com id) ou existente, None em caso de erro
+        """
+        telefone = dados.get("telefone")
+        
+        try:
+            paciente = Paciente(
+                nome=dados.get("nome"),
+                telefone=telefone,
+                email=dados.get("email"),
+                cpf=dados.get("cpf"),
+                data_nascimento=dados.get("data_nascimento"),
+            )
+            self.db.add(paciente)
+            self.db.flush()
+
+            logger.debug(
+                f"Paciente adicionado à transação | paciente_id={paciente.id} | telefone={telefone}"
+            )
+            return paciente
+
+        except IntegrityError:
+            self.db.rollback()
+            logger.warning(
+                f"Paciente cadastrado por requisição concorrente | telefone={telefone}"
+            )
+            return self.buscar_paciente_por_telefone(telefone)
+        except Exception as e:
+            logger.exception(
+                f"Erro ao adicionar paciente | telefone={telefone} | erro={str(e)}"
+            )
+            self.db.rollback()
+            return None
+
     def buscar_paciente(self, paciente_id: int) -> Optional[Paciente]:
         """
         Busca um paciente por ID.
@@ -345,3 +394,31 @@ class PacienteService:
             self.db.rollback()
             return False
 
+
+class PacienteServiceAsync(ServicoAssincrono):
+    """Versão assíncrona do PacienteService (mesma lógica, sem bloquear o event loop)"""
+
+    servico_sincrono = PacienteService
+
+    async def criar_paciente(self, dados: Dict[str, Any]) -> Optional[Paciente]:
+        return await self.executar(self.sincrono.criar_paciente, dados)
+
+    async def buscar_paciente(self, paciente_id: int) -> Optional[Paciente]:
+        return await self.executar(self.sincrono.buscar_paciente, paciente_id)
+
+    async def buscar_paciente_por_telefone(self, telefone: str) -> Optional[Paciente]:
+        return await self.executar(self.sincrono.buscar_paciente_por_telefone, telefone)
+
+    async def buscar_paciente_por_cpf(self, cpf: str) -> Optional[Paciente]:
+        return await self.executar(self.sincrono.buscar_paciente_por_cpf, cpf)
+
+    async def listar_pacientes(self, skip: int = 0, limit: int = 100) -> List[Paciente]:
+        return await self.executar(self.sincrono.listar_pacientes, skip=skip, limit=limit)
+
+    async def atualizar_paciente(
+        self, paciente_id: int, dados: Dict[str, Any]
+    ) -> Optional[Paciente]:
+        return await self.executar(self.sincrono.atualizar_paciente, paciente_id, dados)
+
+    async def deletar_paciente(self, paciente_id: int) -> bool:
+        return await self.executar(self.sincrono.deletar_paciente, paciente_id)
@@ -0,0 +1,197 @@
+"""
+Serviço para reservas temporárias de horário durante a conversa no Botconversa.
+
+Este serviço gerencia:
+- Reserva de um horário para um telefone por reserva_horario_ttl_minutos
+- Liberação da reserva pelo paciente
+- Remoção em lote das reservas expiradas
+
+Cada telefone mantém no máximo uma reserva: uma nova reserva substitui a
+anterior. Enquanto válida, a reserva retira o horário da disponibilidade dos
+demais pacientes e só o dono da reserva consegue agendá-lo. A expiração não
+depende da remoção: todas as consultas filtram por expira_em (indexado), e
+remover_expiradas apenas limpa a tabela e o inventário.
+"""
+
+from typing import Optional
+from datetime import datetime, timedelta
+from loguru import logger
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from app.config.config import settings
+from app.database.models import ReservaHorario
+from app.services.agendamento_service import AgendamentoService
+from app.services.cache_disponibilidade import marcar_para_invalidacao
+from app.services.slot_inventario_service import SlotInventarioService
+from app.services.trava_agenda_service import TravaAgendaService
+
+
+class ReservaHorarioService:
+    """Serviço para reservas temporárias de horário"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def buscar_por_telefone(self, telefone: str) -> Optional[ReservaHorario]:
+        """Busca a reserva ainda válida de um telefone."""
+        return (
+            self.db.query(ReservaHorario)
+            .filter(
+                ReservaHorario.telefone == telefone,
+                ReservaHorario.expira_em > datetime.now(),
+            )
+            .first()
+        )
+
+    def reservar(
+        self,
+        telefone: str,
+        medico_id: int,
+        data_hora: datetime,
+        duracao_minutos: Optional[int] = None,
+    ) -> Optional[ReservaHorario]:
+        """
+        Reserva um horário para o telefone, substituindo a reserva anterior dele.
+
+        Args:
+            telefone: Telefone do paciente
+            medico_id: ID do médico
+            data_hora: Início do horário
+            duracao_minutos: Duração (padrão: default_consultation_duration_minutes)
+
+        Returns:
+            Reserva criada ou None se o horário não estiver disponível
+        """
+        duracao_minutos = duracao_minutos or settings.default_consultation_duration_minutes
+
+        logger.info(
+            f"Iniciando reserva de horário | telefone={telefone} | medico_id={medico_id} | "
+            f"data_hora={data_hora} | duracao={duracao_minutos}min"
+        )
+
+        try:
+            # Serializa com agendamentos e outras reservas na mesma agenda
+            TravaAgendaService(self.db).travar(
+                medico_id, AgendamentoService._dias_do_intervalo(data_hora, duracao_minutos)
+            )
+
+            if not AgendamentoService(self.db)._validar_disponibilidade(
+                medico_id, data_hora, duracao_minutos, telefone_reserva=telefone
+            ):
+                logger.warning(
+                    f"Horário indisponível para reserva | telefone={telefone} | "
+                    f"medico_id={medico_id} | data_hora={data_hora}"
+                )
+                self.db.rollback()
+                return None
+
+            self._remover_do_telefone(telefone)
+
+            reserva = ReservaHorario(
+                medico_id=medico_id,
+                data_hora=data_hora,
+                duracao_minutos=duracao_minutos,
+                telefone=telefone,
+                expira_em=datetime.now() + timedelta(minutes=settings.reserva_horario_ttl_minutos),
+            )
+            self.db.add(reserva)
+            self.db.flush()
+
+            if settings.slot_inventario_habilitado:
+                SlotInventarioService(self.db).marcar_reserva(medico_id, data_hora, True)
+            marcar_para_invalidacao(self.db, [medico_id])
+
+            self.db.commit()
+            self.db.refresh(reserva)
+
+            logger.success(
+                f"Horário reservado | reserva_id={reserva.id} | telefone={telefone} | "
+                f"medico_id={medico_id} | data_hora={data_hora} | expira_em={reserva.expira_em}"
+            )
+            return reserva
+
+        except IntegrityError as e:
+            # Outra reserva concorrente do mesmo telefone foi gravada primeiro
+            self.db.rollback()
+            logger.warning(
+                f"Conflito ao gravar reserva de horário | telefone={telefone} | erro={str(e)}"
+            )
+            return None
+        except Exception as e:
+            logger.exception(
+                f"Erro ao reservar horário | telefone={telefone} | medico_id={medico_id} | "
+                f"erro={str(e)}"
+            )
+            self.db.rollback()
+            return None
+
+    def liberar(self, telefone: str) -> bool:
+        """
+        Libera a reserva do telefone.
+
+        Returns:
+            True se havia reserva, False caso contrário
+        """
+        try:
+            liberada = self._remover_do_telefone(telefone)
+            self.db.commit()
+
+            if liberada:
+                logger.info(f"Reserva de horário liberada | telefone={telefone}")
+            return liberada
+
+        except Exception as e:
+            logger.exception(f"Erro ao liberar reserva de horário | telefone={telefone} | erro={str(e)}")
+            self.db.rollback()
+            return False
+
+    def _remover_do_telefone(self, telefone: str) -> bool:
+        """Remove a reserva do telefone (válida ou expirada). Não faz commit."""
+        reserva = (
+            self.db.query(ReservaHorario).filter(ReservaHorario.telefone == telefone).first()
+        )
+        if reserva is None:
+            return False
+
+        if settings.slot_inventario_habilitado:
+            SlotInventarioService(self.db).marcar_reserva(reserva.medico_id, reserva.data_hora, False)
+        marcar_para_invalidacao(self.db, [reserva.medico_id])
+
+        self.db.delete(reserva)
+        self.db.flush()
+        return True
+
+    def remover_expiradas(self) -> int:
+        """
+        Remove as reservas expiradas usando o índice de expira_em.
+
+        Returns:
+            Número de reservas removidas
+        """
+        try:
+            agora = datetime.now()
+            expiradas = self.db.execute(
+                select(ReservaHorario.medico_id, ReservaHorario.data_hora).where(
+                    ReservaHorario.expira_em <= agora
+                )
+            ).all()
+            if not expiradas:
+                return 0
+
+            if settings.slot_inventario_habilitado:
+                inventario = SlotInventarioService(self.db)
+                for medico_id, data_hora in expiradas:
+                    inventario.marcar_reserva(medico_id, data_hora, False)
+
+            self.db.execute(delete(ReservaHorario).where(ReservaHorario.expira_em <= agora))
+            self.db.commit()
+
+            logger.info(f"Reservas de horário expiradas removidas | total={len(expiradas)}")
+            return len(expiradas)
+
+        except Exception as e:
+            logger.exception(f"Erro ao remover reservas de horário expiradas | erro={str(e)}")
+            self.db.rollback()
+            return 0
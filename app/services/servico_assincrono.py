@@ -0,0 +1,75 @@
+"""
+Base dos serviços assíncronos usados pelas rotas async def.
+
+Os serviços assíncronos reutilizam a lógica dos serviços síncronos em vez de
+duplicá-la. Com uma AsyncSession, cada chamada roda via AsyncSession.run_sync:
+o código síncrono executa em um greenlet e cada ida ao banco é aguardada no
+event loop pelo driver assíncrono (aiosqlite, asyncpg, oracledb). Com uma
+Session síncrona (DATABASE_ASYNC_HABILITADO desligado ou Firebird), a chamada
+roda no executor limitado do banco (app.database.executor_banco). Nos dois
+casos o event loop fica livre para outras requisições enquanto o banco responde.
+
+Fora do greenlet uma AsyncSession não pode carregar atributos sob demanda, então
+o resultado é materializado ainda dentro da chamada: colunas expiradas são
+recarregadas e as relações usadas nos schemas de resposta são carregadas.
+"""
+
+from typing import Any, Callable, Dict, Tuple, Type
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.base import Base
+from app.database.executor_banco import executor_banco
+from app.database.manager import SessaoBanco
+from app.database.models import Agendamento, Medico
+
+# Relações lidas pelos schemas de resposta de cada modelo
+RELACOES_RESPOSTA: Dict[type, Tuple[str, ...]] = {
+    Agendamento: ("paciente", "medico"),
+    Medico: ("especialidade",),
+}
+
+
+def materializar(resultado: Any) -> Any:
+    """Carrega colunas e relações usadas na resposta, percorrendo listas e dicionários."""
+    if isinstance(resultado, (list, tuple)):
+        for item in resultado:
+            materializar(item)
+    elif isinstance(resultado, dict):
+        for valor in resultado.values():
+            materializar(valor)
+    elif isinstance(resultado, Base):
+        estado = inspect(resultado)
+        if estado.session is None:
+            return resultado
+        pendentes = estado.unloaded
+        for chave in estado.mapper.column_attrs.keys():
+            if chave in pendentes:
+                # Um acesso recarrega todas as colunas expiradas de uma vez
+                getattr(resultado, chave)
+                break
+        for relacao in RELACOES_RESPOSTA.get(type(resultado), ()):
+            materializar(getattr(resultado, relacao))
+    return resultado
+
+
+class ServicoAssincrono:
+    """Executa os métodos de um serviço síncrono sem bloquear o event loop"""
+
+    servico_sincrono: Type
+
+    def __init__(self, db: SessaoBanco):
+        self.db = db
+        sessao = db.sync_session if isinstance(db, AsyncSession) else db
+        self.sincrono = self.servico_sincrono(sessao)
+
+    async def executar(self, metodo: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Executa um método do serviço síncrono e materializa o resultado."""
+
+        def chamar(*_: Any) -> Any:
+            return materializar(metodo(*args, **kwargs))
+
+        if isinstance(self.db, AsyncSession):
+            return await self.db.run_sync(chamar)
+        return await executor_banco.executar(chamar)
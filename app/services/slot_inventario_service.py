@@ -0,0 +1,361 @@
+"""
+Serviço para gestão do inventário materializado de horários.
+
+Este serviço gerencia:
+- Reconstrução incremental do inventário a partir das disponibilidades semanais
+- Atualização incremental dos dias afetados por agendamentos
+- Marcação dos slots com reserva temporária
+- Consulta de horários e datas livres por varredura indexada
+"""
+
+from typing import List, Optional, Dict, Iterable
+from datetime import datetime, timedelta, date
+from loguru import logger
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, exists, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.database.models import ReservaHorario, SlotInventario, StatusSlot
+from app.config.config import settings
+from app.services.disponibilidade_service import DisponibilidadeService
+from app.services.mapa_ocupacao import MapaOcupacao
+
+
+class SlotInventarioService:
+    """Serviço para gestão do inventário de horários"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def reconstruir(self, medico_id: Optional[int] = None) -> int:
+        """
+        Reconstrói o inventário de horários a partir das disponibilidades.
+
+        Gera os slots de hoje até o fim do horizonte de agendamento
+        (max_advance_booking_days), marcando como ocupados os que conflitam com
+        agendamentos ativos, e aplica apenas a diferença em relação ao
+        inventário gravado: slots fora do horizonte ou da agenda são removidos,
+        os de estado diferente são atualizados e os que faltam são inseridos.
+        Deve ser executado quando a agenda semanal de um médico muda e
+        diariamente para avançar o horizonte. Execuções simultâneas (ex.: na
+        inicialização de vários workers) não falham: um slot já inserido por
+        outra execução é mantido.
+
+        Args:
+            medico_id: Reconstrói apenas o inventário deste médico (padrão: todos)
+
+        Returns:
+            Número de slots do inventário após a reconstrução
+        """
+        logger.info(f"Iniciando reconstrução do inventário de horários | medico_id={medico_id}")
+
+        try:
+            hoje = date.today()
+            inicio = datetime.combine(hoje, datetime.min.time())
+            fim = inicio + timedelta(days=settings.max_advance_booking_days)
+
+            disponibilidade_service = DisponibilidadeService(self.db)
+            medicos = disponibilidade_service.carregar_medicos(medico_id=medico_id)
+            medico_ids = [medico.id for medico in medicos]
+
+            # Remove slots fora do horizonte e de médicos inativos
+            remocao = delete(SlotInventario).where(
+                or_(
+                    SlotInventario.data_hora < inicio,
+                    SlotInventario.data_hora >= fim,
+                    SlotInventario.medico_id.notin_(medico_ids),
+                )
+            )
+            if medico_id:
+                remocao = remocao.where(SlotInventario.medico_id == medico_id)
+            self.db.execute(remocao.execution_options(synchronize_session=False))
+
+            mapas = disponibilidade_service.construir_mapas(medico_ids, hoje, fim.date())
+
+            # Horários com reserva temporária válida aparecem ocupados nos mapas
+            reservados = {
+                (id_medico, inicio_reserva)
+                for id_medico, reservas in disponibilidade_service.carregar_reservas(
+                    medico_ids, inicio, fim
+                ).items()
+                for inicio_reserva, _, _ in reservas
+            }
+
+            total = 0
+            for id_medico in medico_ids:
+                esperados: Dict[datetime, StatusSlot] = {}
+                for dia in sorted(mapas[id_medico]):
+                    mapa = mapas[id_medico][dia]
+                    livres = set(mapa.horarios_livres())
+                    for slot in mapa.horarios_disponiveis():
+                        if slot in livres:
+                            esperados[slot] = StatusSlot.LIVRE
+                        elif (id_medico, slot) in reservados:
+                            esperados[slot] = StatusSlot.RESERVADO
+                        else:
+                            esperados[slot] = StatusSlot.OCUPADO
+
+                self._aplicar_diferenca(id_medico, inicio, fim, esperados)
+                total += len(esperados)
+
+            self.db.commit()
+
+            logger.success(
+                f"Inventário de horários reconstruído | medico_id={medico_id} | "
+                f"medicos={len(medico_ids)} | total_slots={total}"
+            )
+            return total
+
+        except Exception as e:
+            logger.exception(
+                f"Erro ao reconstruir inventário de horários | medico_id={medico_id} | erro={str(e)}"
+            )
+            self.db.rollback()
+            raise
+
+    def _aplicar_diferenca(
+        self,
+        medico_id: int,
+        inicio: datetime,
+        fim: datetime,
+        esperados: Dict[datetime, StatusSlot],
+    ) -> None:
+        """Grava no inventário do médico apenas as diferenças para os slots esperados."""
+        gravados = {
+            data_hora: (slot_id, status_slot)
+            for slot_id, data_hora, status_slot in self.db.execute(
+                select(SlotInventario.id, SlotInventario.data_hora, SlotInventario.status).where(
+                    and_(
+                        SlotInventario.medico_id == medico_id,
+                        SlotInventario.data_hora >= inicio,
+                        SlotInventario.data_hora < fim,
+                    )
+                )
+            )
+        }
+
+        removidos = [
+            slot_id for data_hora, (slot_id, _) in gravados.items() if data_hora not in esperados
+        ]
+        if removidos:
+            self.db.execute(
+                delete(SlotInventario)
+                .where(SlotInventario.id.in_(removidos))
+                .execution_options(synchronize_session=False)
+            )
+
+        alterados: Dict[StatusSlot, List[int]] = {}
+        for data_hora, (slot_id, status_slot) in gravados.items():
+            novo_status = esperados.get(data_hora)
+            if novo_status is not None and novo_status != status_slot:
+                alterados.setdefault(novo_status, []).append(slot_id)
+        for novo_status, slot_ids in alterados.items():
+            self.db.execute(
+                update(SlotInventario)
+                .where(SlotInventario.id.in_(slot_ids))
+                .values(status=novo_status)
+                .execution_options(synchronize_session=False)
+            )
+
+        faltantes = [
+            {"medico_id": medico_id, "data_hora": data_hora, "status": status_slot}
+            for data_hora, status_slot in sorted(esperados.items())
+            if data_hora not in gravados
+        ]
+        if faltantes:
+            # Outra reconstrução simultânea pode ter inserido alguns slots:
+            # insere os demais um a um, mantendo os já existentes
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(insert(SlotInventario), faltantes)
+            except IntegrityError:
+                for linha in faltantes:
+                    try:
+                        with self.db.begin_nested():
+                            self.db.execute(insert(SlotInventario).values(**linha))
+                    except IntegrityError:
+                        pass
+
+        logger.debug(
+            f"Inventário do médico sincronizado | medico_id={medico_id} | "
+            f"removidos={len(removidos)} | alterados={sum(map(len, alterados.values()))} | "
+            f"inseridos={len(faltantes)}"
+        )
+
+    def atualizar_dias(self, medico_id: int, dias: Iterable[date]) -> None:
+        """
+        Recalcula o estado dos slots de um médico nos dias informados.
+
+        Usado após escritas em agendamentos. Não faz commit: as alterações são
+        gravadas na mesma transação da operação que as originou.
+
+        Args:
+            medico_id: ID do médico
+            dias: Dias afetados pela escrita
+        """
+        disponibilidade_service = DisponibilidadeService(self.db)
+
+        for dia in sorted(set(dias)):
+            inicio = datetime.combine(dia, datetime.min.time())
+            fim = inicio + timedelta(days=1)
+
+            slots = (
+                self.db.query(SlotInventario)
+                .filter(
+                    and_(
+                        SlotInventario.medico_id == medico_id,
+                        SlotInventario.data_hora >= inicio,
+                        SlotInventario.data_hora < fim,
+                    )
+                )
+                .order_by(SlotInventario.data_hora.asc())
+                .all()
+            )
+            if not slots:
+                continue
+
+            mapa = MapaOcupacao(medico_id, dia)
+            for inicio_ocupado, fim_ocupado in disponibilidade_service.carregar_ocupacoes(
+                [medico_id], inicio, fim
+            )[medico_id]:
+                mapa.marcar_ocupado(inicio_ocupado, fim_ocupado)
+
+            alterados = 0
+            for slot in slots:
+                novo_status = (
+                    StatusSlot.OCUPADO
+                    if mapa.conflita(slot.data_hora, settings.default_consultation_duration_minutes)
+                    else StatusSlot.LIVRE
+                )
+                # Reservas temporárias são preservadas enquanto o slot não for ocupado
+                if slot.status == StatusSlot.RESERVADO and novo_status == StatusSlot.LIVRE:
+                    continue
+                if slot.status != novo_status:
+                    slot.status = novo_status
+                    alterados += 1
+
+            self.db.flush()
+            logger.debug(
+                f"Inventário atualizado | medico_id={medico_id} | dia={dia} | "
+                f"slots={len(slots)} | alterados={alterados}"
+            )
+
+    def marcar_reserva(self, medico_id: int, data_hora: datetime, reservado: bool) -> None:
+        """
+        Marca (ou desmarca) como reservado o slot de uma reserva temporária.
+
+        Apenas slots livres passam a reservados e apenas slots reservados voltam
+        a livres; slots ocupados não são alterados. Não faz commit.
+
+        Args:
+            medico_id: ID do médico
+            data_hora: Início do horário reservado
+            reservado: True ao reservar, False ao liberar
+        """
+        status_atual, novo_status = (
+            (StatusSlot.LIVRE, StatusSlot.RESERVADO)
+            if reservado
+            else (StatusSlot.RESERVADO, StatusSlot.LIVRE)
+        )
+        self.db.execute(
+            update(SlotInventario)
+            .where(
+                and_(
+                    SlotInventario.medico_id == medico_id,
+                    SlotInventario.data_hora == data_hora,
+                    SlotInventario.status == status_atual,
+                )
+            )
+            .values(status=novo_status)
+        )
+
+    @staticmethod
+    def _filtro_livre():
+        """
+        Condição de slot livre.
+
+        Slots reservados cuja reserva já expirou (e ainda não foi removida)
+        também são considerados livres.
+        """
+        reserva_valida = exists().where(
+            and_(
+                ReservaHorario.medico_id == SlotInventario.medico_id,
+                ReservaHorario.data_hora == SlotInventario.data_hora,
+                ReservaHorario.expira_em > datetime.now(),
+            )
+        )
+        return or_(
+            SlotInventario.status == StatusSlot.LIVRE,
+            and_(SlotInventario.status == StatusSlot.RESERVADO, ~reserva_valida),
+        )
+
+    def listar_horarios_livres(self, medico_id: int, dia: date) -> List[datetime]:
+        """
+        Lista os horários livres de um médico em um dia.
+
+        Args:
+            medico_id: ID do médico
+            dia: Data desejada
+
+        Returns:
+            Lista de datas/horas livres ordenadas
+        """
+        inicio = max(
+            datetime.combine(dia, datetime.min.time()),
+            datetime.now() + timedelta(hours=settings.min_advance_booking_hours),
+        )
+        fim = datetime.combine(dia, datetime.min.time()) + timedelta(days=1)
+
+        linhas = (
+            self.db.query(SlotInventario.data_hora)
+            .filter(
+                and_(
+                    SlotInventario.medico_id == medico_id,
+                    self._filtro_livre(),
+                    SlotInventario.data_hora >= inicio,
+                    SlotInventario.data_hora < fim,
+                )
+            )
+            .order_by(SlotInventario.data_hora.asc())
+            .all()
+        )
+        return [data_hora for (data_hora,) in linhas]
+
+    def listar_datas_livres(
+        self, medico_id: int, data_inicio: date, data_fim: date
+    ) -> Dict[date, int]:
+        """
+        Lista as datas com horários livres de um médico e a quantidade de slots livres.
+
+        Args:
+            medico_id: ID do médico
+            data_inicio: Primeira data do período
+            data_fim: Última data do período (inclusive)
+
+        Returns:
+            Dicionário ordenado data -> quantidade de slots livres
+        """
+        inicio = max(
+            datetime.combine(data_inicio, datetime.min.time()),
+            datetime.now() + timedelta(hours=settings.min_advance_booking_hours),
+        )
+        fim = datetime.combine(data_fim, datetime.min.time()) + timedelta(days=1)
+
+        linhas = (
+            self.db.query(SlotInventario.data_hora)
+            .filter(
+                and_(
+                    SlotInventario.medico_id == medico_id,
+                    self._filtro_livre(),
+                    SlotInventario.data_hora >= inicio,
+                    SlotInventario.data_hora < fim,
+                )
+            )
+            .order_by(SlotInventario.data_hora.asc())
+            .all()
+        )
+
+        datas: Dict[date, int] = {}
+        for (data_hora,) in linhas:
+            datas[data_hora.date()] = datas.get(data_hora.date(), 0) + 1
+        return datas
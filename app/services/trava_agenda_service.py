@@ -0,0 +1,123 @@
+"""
+Serviço para serialização das escritas na agenda de um médico em um dia.
+
+Este serviço gerencia:
+- Trava por linha (SELECT ... FOR UPDATE na tabela travas_agenda; no SQLite,
+  que trava o banco inteiro, um UPDATE sem efeito nas mesmas linhas)
+- Trava consultiva do PostgreSQL (pg_advisory_xact_lock)
+
+A trava é obtida no início da transação de escrita, antes da validação do
+horário, e liberada no commit ou rollback. Escritas em médicos ou dias
+diferentes seguem em paralelo; criação e reagendamento no mesmo médico e dia
+não se intercalam. Os dias são travados sempre em ordem crescente para evitar
+deadlocks quando um reagendamento envolve dois dias.
+"""
+
+from typing import Iterable, List
+from datetime import date
+from loguru import logger
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config.config import settings, EstrategiaTravaAgenda
+from app.database.models import TravaAgenda
+
+
+class TravaAgendaService:
+    """Serviço para travas de escrita por médico e dia"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _estrategia(self) -> EstrategiaTravaAgenda:
+        """Estratégia configurada, com fallback para trava por linha fora do PostgreSQL."""
+        estrategia = settings.trava_agenda_estrategia
+        if (
+            estrategia == EstrategiaTravaAgenda.ADVISORY
+            and self.db.get_bind().dialect.name != "postgresql"
+        ):
+            return EstrategiaTravaAgenda.LINHA
+        return estrategia
+
+    def travar(self, medico_id: int, dias: Iterable[date]) -> None:
+        """
+        Trava a agenda do médico nos dias informados até o fim da transação.
+
+        Args:
+            medico_id: ID do médico
+            dias: Dias afetados pela escrita
+        """
+        estrategia = self._estrategia()
+        if estrategia == EstrategiaTravaAgenda.NENHUMA:
+            return
+
+        dias = sorted(set(dias))
+        if not dias:
+            return
+
+        if estrategia == EstrategiaTravaAgenda.ADVISORY:
+            for dia in dias:
+                self.db.execute(select(func.pg_advisory_xact_lock(medico_id, dia.toordinal())))
+        else:
+            self._travar_linhas(medico_id, dias)
+
+        logger.debug(
+            f"Agenda travada | medico_id={medico_id} | dias={[str(dia) for dia in dias]} | "
+            f"estrategia={estrategia.value}"
+        )
+
+    def _travar_linhas(self, medico_id: int, dias: List[date]) -> None:
+        """
+        Bloqueia as linhas do médico nos dias informados, criando as que não existirem.
+
+        As linhas que faltam são criadas antes do bloqueio, em ordem crescente de
+        dia, e todas são então bloqueadas por um único SELECT ... FOR UPDATE
+        ordenado: o custo não cresce com o número de dias e a ordem de
+        aquisição continua a mesma em todas as transações.
+        """
+        existentes = set(
+            self.db.execute(
+                select(TravaAgenda.dia).where(
+                    and_(TravaAgenda.medico_id == medico_id, TravaAgenda.dia.in_(dias))
+                )
+            ).scalars()
+        )
+        faltantes = [dia for dia in dias if dia not in existentes]
+
+        if faltantes:
+            # Primeira escrita nestes dias: cria as linhas. Se outra transação
+            # criou alguma antes, cria as demais uma a uma e aguarda o
+            # bloqueio dela no SELECT seguinte.
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(
+                        insert(TravaAgenda),
+                        [{"medico_id": medico_id, "dia": dia} for dia in faltantes],
+                    )
+            except IntegrityError:
+                for dia in faltantes:
+                    try:
+                        with self.db.begin_nested():
+                            self.db.execute(insert(TravaAgenda).values(medico_id=medico_id, dia=dia))
+                    except IntegrityError:
+                        pass
+
+        filtro = and_(TravaAgenda.medico_id == medico_id, TravaAgenda.dia.in_(dias))
+        if self.db.get_bind().dialect.name == "sqlite":
+            # O SQLite ignora FOR UPDATE; um UPDATE sem efeito pega o lock de
+            # escrita do banco, que serializa esta transação com as demais
+            self.db.execute(
+                update(TravaAgenda)
+                .where(filtro)
+                .values(dia=TravaAgenda.dia)
+                .execution_options(synchronize_session=False)
+            )
+            return
+
+        self.db.execute(
+            select(TravaAgenda.dia)
+            .where(filtro)
+            .order_by(TravaAgenda.dia.asc())
+            .with_for_update()
+        ).all()
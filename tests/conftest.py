@@ -0,0 +1,103 @@
+"""
+Configuração dos testes.
+
+Os testes usam SQLite em memória; as variáveis de ambiente precisam ser
+definidas antes de importar a aplicação, que lê Settings na importação.
+"""
+
+import os
+
+os.environ["DATABASE_TYPE"] = "sqlite"
+os.environ["SQLITE_URL"] = "sqlite://"
+os.environ["DATABASE_URL"] = ""
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from datetime import time
+from itertools import count
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import manager
+from app.database.models import Disponibilidade, Especialidade, Medico, Paciente
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Cliente da API com o banco em memória criado na inicialização da aplicação."""
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture(scope="session")
+def dados(client):
+    """Especialidade, médico atendendo todos os dias das 8h às 18h e um paciente cadastrado."""
+    db = manager.SessionLocal()
+    try:
+        especialidade = Especialidade(nome="Clínica Geral")
+        db.add(especialidade)
+        db.flush()
+        medico = Medico(nome="Dr. Teste", crm="CRM-TESTE", especialidade_id=especialidade.id)
+        db.add(medico)
+        db.flush()
+        for dia_semana in range(7):
+            db.add(
+                Disponibilidade(
+                    medico_id=medico.id,
+                    dia_semana=dia_semana,
+                    hora_inicio=time(8),
+                    hora_fim=time(18),
+                )
+            )
+        paciente = Paciente(nome="Paciente Teste", telefone="5511999990000")
+        db.add(paciente)
+        db.commit()
+        yield {
+            "especialidade_id": especialidade.id,
+            "medico_id": medico.id,
+            "paciente_id": paciente.id,
+            "telefone_paciente": paciente.telefone,
+        }
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="session")
+def novo_medico(dados):
+    """
+    Cria um médico com agenda própria, para testes que não devem compartilhar horários.
+
+    Recebe os períodos de atendimento (hora_inicio, hora_fim), repetidos em todos
+    os dias da semana, e retorna o id do médico.
+    """
+    sequencia = count(1)
+
+    def criar(*periodos):
+        numero = next(sequencia)
+        db = manager.SessionLocal()
+        try:
+            medico = Medico(
+                nome=f"Dr. Teste {numero}",
+                crm=f"CRM-TESTE-{numero}",
+                especialidade_id=dados["especialidade_id"],
+            )
+            db.add(medico)
+            db.flush()
+            for hora_inicio, hora_fim in periodos or ((time(8), time(18)),):
+                for dia_semana in range(7):
+                    db.add(
+                        Disponibilidade(
+                            medico_id=medico.id,
+                            dia_semana=dia_semana,
+                            hora_inicio=hora_inicio,
+                            hora_fim=hora_fim,
+                        )
+                    )
+            db.commit()
+            return medico.id
+        finally:
+            db.close()
+
+    return criar
+
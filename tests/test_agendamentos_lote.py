@@ -0,0 +1,85 @@
+"""
+Criação de agendamentos em lote (POST /agendamentos/lote).
+"""
+
+from datetime import datetime, time, timedelta
+
+from app.database import manager
+from app.database.models import Agendamento, BloqueioHorario
+
+ROTA = "/api/v1/agendamentos/lote"
+
+
+def _data_hora(dias: int, hora: int, minuto: int = 0) -> str:
+    return (
+        (datetime.now() + timedelta(days=dias))
+        .replace(hour=hora, minute=minuto, second=0, microsecond=0)
+        .isoformat()
+    )
+
+
+def _item(dados, medico_id, data_hora, duracao_minutos=30) -> dict:
+    return {
+        "paciente_id": dados["paciente_id"],
+        "medico_id": medico_id,
+        "data_hora": data_hora,
+        "duracao_minutos": duracao_minutos,
+    }
+
+
+def _gravados(medico_id):
+    db = manager.SessionLocal()
+    try:
+        agendamentos = db.query(Agendamento).filter(Agendamento.medico_id == medico_id).count()
+        bloqueios = db.query(BloqueioHorario).filter(BloqueioHorario.medico_id == medico_id).count()
+        return agendamentos, bloqueios
+    finally:
+        db.close()
+
+
+def test_lote_parcial_cria_apenas_os_itens_validos(client, dados, novo_medico):
+    medico_id = novo_medico((time(8), time(12)))
+    itens = [
+        _item(dados, medico_id, _data_hora(40, 9), 60),
+        _item(dados, medico_id, _data_hora(40, 9, 30)),  # conflita com o item anterior
+        _item(dados, medico_id, _data_hora(40, 10)),
+    ]
+
+    resposta = client.post(ROTA, json={"agendamentos": itens})
+
+    assert resposta.status_code == 200, resposta.text
+    corpo = resposta.json()
+    assert (corpo["criados"], corpo["rejeitados"]) == (2, 1)
+    assert [r["sucesso"] for r in corpo["resultados"]] == [True, False, True]
+    assert corpo["resultados"][1]["motivo"] == "Horário já ocupado"
+    assert _gravados(medico_id) == (2, 3)
+
+
+def test_tudo_ou_nada_nao_grava_nada_se_um_item_for_rejeitado(client, dados, novo_medico):
+    medico_id = novo_medico((time(8), time(12)))
+    validos = [
+        _item(dados, medico_id, _data_hora(41, 9)),
+        _item(dados, medico_id, _data_hora(41, 10)),
+    ]
+    fora_do_periodo = _item(dados, medico_id, _data_hora(41, 15))
+
+    resposta = client.post(
+        ROTA, json={"agendamentos": validos + [fora_do_periodo], "tudo_ou_nada": True}
+    )
+
+    assert resposta.status_code == 200, resposta.text
+    corpo = resposta.json()
+    assert (corpo["criados"], corpo["rejeitados"]) == (0, 3)
+    motivos = [r["motivo"] for r in corpo["resultados"]]
+    assert motivos == [
+        "Lote rejeitado: outro item é inválido",
+        "Lote rejeitado: outro item é inválido",
+        "Horário fora do período de disponibilidade do médico",
+    ]
+    assert _gravados(medico_id) == (0, 0)
+
+    # Os horários continuam livres para um novo lote
+    resposta = client.post(ROTA, json={"agendamentos": validos, "tudo_ou_nada": True})
+
+    assert resposta.json()["criados"] == 2
+    assert _gravados(medico_id) == (2, 2)
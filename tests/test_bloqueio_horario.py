@@ -0,0 +1,84 @@
+"""
+Bloqueios por célula da grade (restrição única medico_id, inicio).
+"""
+
+from datetime import datetime, time
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.database import manager
+from app.database.models import Agendamento, StatusAgendamento
+from app.services.bloqueio_horario_service import BloqueioHorarioService
+
+DIA = datetime(2030, 1, 15)
+
+
+def _hora(hora: int, minuto: int = 0) -> datetime:
+    return DIA.replace(hour=hora, minute=minuto)
+
+
+@pytest.fixture
+def db(client):
+    sessao = manager.SessionLocal()
+    yield sessao
+    sessao.rollback()
+    sessao.close()
+
+
+def _agendar(db, dados, medico_id, data_hora, duracao_minutos=30) -> Agendamento:
+    agendamento = Agendamento(
+        paciente_id=dados["paciente_id"],
+        medico_id=medico_id,
+        data_hora=data_hora,
+        duracao_minutos=duracao_minutos,
+    )
+    db.add(agendamento)
+    db.flush()
+    return agendamento
+
+
+def test_celulas_tocadas_pelo_agendamento():
+    assert BloqueioHorarioService.celulas(_hora(10), 30) == [_hora(10)]
+    assert BloqueioHorarioService.celulas(_hora(10), 60) == [_hora(10), _hora(10, 30)]
+    assert BloqueioHorarioService.celulas(_hora(10, 10), 30) == [_hora(10), _hora(10, 30)]
+    assert BloqueioHorarioService.celulas(_hora(10), 0) == [_hora(10)]
+
+
+def test_agendamento_que_compartilha_celula_e_rejeitado(db, dados, novo_medico):
+    medico_id = novo_medico((time(8), time(12)))
+    service = BloqueioHorarioService(db)
+    service.bloquear(_agendar(db, dados, medico_id, _hora(10), 60))
+
+    sobreposto = _agendar(db, dados, medico_id, _hora(10, 30))
+    with pytest.raises(IntegrityError):
+        with db.begin_nested():
+            service.bloquear(sobreposto)
+
+
+def test_agendamentos_adjacentes_nao_conflitam(db, dados, novo_medico):
+    medico_id = novo_medico((time(8), time(12)))
+    service = BloqueioHorarioService(db)
+    service.bloquear(_agendar(db, dados, medico_id, _hora(10), 60))
+
+    service.bloquear(_agendar(db, dados, medico_id, _hora(9, 30)))
+    service.bloquear(_agendar(db, dados, medico_id, _hora(11)))
+
+
+def test_medicos_diferentes_no_mesmo_horario(db, dados, novo_medico):
+    service = BloqueioHorarioService(db)
+    service.bloquear(_agendar(db, dados, novo_medico((time(8), time(12))), _hora(10)))
+
+    service.bloquear(_agendar(db, dados, novo_medico((time(8), time(12))), _hora(10)))
+
+
+def test_cancelamento_libera_as_celulas(db, dados, novo_medico):
+    medico_id = novo_medico((time(8), time(12)))
+    service = BloqueioHorarioService(db)
+    agendamento = _agendar(db, dados, medico_id, _hora(10), 60)
+    service.bloquear(agendamento)
+
+    agendamento.status = StatusAgendamento.CANCELADO
+    service.sincronizar(agendamento)
+
+    service.bloquear(_agendar(db, dados, medico_id, _hora(10, 30)))
@@ -0,0 +1,88 @@
+"""
+Cálculo em lote dos horários disponíveis (GET /disponibilidade/horarios).
+
+Cada teste usa um médico próprio para não depender dos agendamentos criados
+pelos demais.
+"""
+
+from datetime import datetime, time, timedelta
+
+ROTA = "/api/v1/disponibilidade/horarios"
+
+
+def _dia(dias: int) -> datetime:
+    return (datetime.now() + timedelta(days=dias)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def _horarios_do_dia(client, medico_id, dia):
+    resposta = client.get(
+        ROTA,
+        params={
+            "medico_id": medico_id,
+            "data_inicio": dia.isoformat(),
+            "data_fim": (dia + timedelta(days=1, seconds=-1)).isoformat(),
+        },
+    )
+    assert resposta.status_code == 200, resposta.text
+    return [
+        datetime.fromisoformat(h["data_hora"]).time()
+        for h in resposta.json()["horarios_disponiveis"]
+    ]
+
+
+def test_horarios_de_todos_os_periodos_do_dia(client, novo_medico):
+    medico_id = novo_medico((time(8), time(10)), (time(14), time(16)))
+
+    horarios = _horarios_do_dia(client, medico_id, _dia(10))
+
+    assert horarios == [
+        time(8), time(8, 30), time(9), time(9, 30),
+        time(14), time(14, 30), time(15), time(15, 30),
+    ]
+
+
+def test_agendamento_remove_horarios_que_cobre(client, dados, novo_medico):
+    medico_id = novo_medico((time(8), time(12)))
+    dia = _dia(11)
+    resposta = client.post(
+        "/api/v1/agendamentos",
+        json={
+            "paciente_id": dados["paciente_id"],
+            "medico_id": medico_id,
+            "data_hora": dia.replace(hour=10).isoformat(),
+            "duracao_minutos": 60,
+        },
+    )
+    assert resposta.status_code == 201, resposta.text
+
+    horarios = _horarios_do_dia(client, medico_id, dia)
+
+    assert time(9, 30) in horarios
+    assert time(10) not in horarios
+    assert time(10, 30) not in horarios
+    assert time(11) in horarios
+
+
+def test_agendamento_cancelado_libera_horario(client, dados, novo_medico):
+    medico_id = novo_medico((time(8), time(12)))
+    dia = _dia(12)
+    resposta = client.post(
+        "/api/v1/agendamentos",
+        json={
+            "paciente_id": dados["paciente_id"],
+            "medico_id": medico_id,
+            "data_hora": dia.replace(hour=9).isoformat(),
+        },
+    )
+    assert resposta.status_code == 201, resposta.text
+    assert time(9) not in _horarios_do_dia(client, medico_id, dia)
+
+    resposta = client.post(
+        f"/api/v1/agendamentos/{resposta.json()['id']}/cancelar",
+        json={"motivo": "Paciente desistiu"},
+    )
+    assert resposta.status_code == 200, resposta.text
+
+    assert time(9) in _horarios_do_dia(client, medico_id, dia)
@@ -0,0 +1,124 @@
+"""
+Idempotency-Key em POST /botconversa/criar-agendamento.
+"""
+
+from datetime import datetime, timedelta
+from itertools import count
+
+from app.api.routes.botconversa import ROTA_CRIAR_AGENDAMENTO
+from app.database import manager
+from app.database.models import Agendamento, ChaveIdempotencia
+from app.schemas.schemas import AgendamentoBotconversaCreate
+from app.services.idempotencia_service import IdempotenciaService
+
+ROTA = "/api/v1/botconversa/criar-agendamento"
+
+_dias = count(30)
+
+
+def _corpo(dados, medico_id) -> dict:
+    # Cada corpo usa um dia diferente para não disputar horário com os demais testes
+    data_hora = (datetime.now() + timedelta(days=next(_dias))).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    )
+    return {
+        "telefone": dados["telefone_paciente"],
+        "medico_id": medico_id,
+        "data_hora": data_hora.isoformat(),
+    }
+
+
+def _criar(client, corpo, chave):
+    return client.post(ROTA, json=corpo, headers={"Idempotency-Key": chave})
+
+
+def _total_agendamentos(medico_id) -> int:
+    db = manager.SessionLocal()
+    try:
+        return db.query(Agendamento).filter(Agendamento.medico_id == medico_id).count()
+    finally:
+        db.close()
+
+
+def _reservar_chave(chave, corpo, em_andamento_ate):
+    """Simula uma reserva sem resposta deixada por uma requisição em andamento ou que caiu."""
+    db = manager.SessionLocal()
+    try:
+        db.add(
+            ChaveIdempotencia(
+                chave=chave,
+                rota=ROTA_CRIAR_AGENDAMENTO,
+                hash_requisicao=IdempotenciaService.calcular_hash(
+                    AgendamentoBotconversaCreate(**corpo).model_dump_json()
+                ),
+                em_andamento_ate=em_andamento_ate,
+                expira_em=datetime.now() + timedelta(hours=24),
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_repeticao_recebe_a_resposta_gravada(client, dados, novo_medico):
+    medico_id = novo_medico()
+    corpo = _corpo(dados, medico_id)
+
+    primeira = _criar(client, corpo, "idem-repeticao")
+    repeticao = _criar(client, corpo, "idem-repeticao")
+
+    assert primeira.status_code == 200, primeira.text
+    assert "Idempotent-Replayed" not in primeira.headers
+    assert repeticao.status_code == 200
+    assert repeticao.headers["Idempotent-Replayed"] == "true"
+    assert repeticao.json() == primeira.json()
+    assert _total_agendamentos(medico_id) == 1
+
+
+def test_chave_reutilizada_com_outro_corpo(client, dados, novo_medico):
+    medico_id = novo_medico()
+    assert _criar(client, _corpo(dados, medico_id), "idem-outro-corpo").status_code == 200
+
+    resposta = _criar(client, _corpo(dados, medico_id), "idem-outro-corpo")
+
+    assert resposta.status_code == 422
+    assert _total_agendamentos(medico_id) == 1
+
+
+def test_chave_em_andamento(client, dados, novo_medico):
+    medico_id = novo_medico()
+    corpo = _corpo(dados, medico_id)
+    _reservar_chave("idem-em-andamento", corpo, datetime.now() + timedelta(minutes=5))
+
+    resposta = _criar(client, corpo, "idem-em-andamento")
+
+    assert resposta.status_code == 409
+    assert resposta.headers["Retry-After"] == "1"
+    assert _total_agendamentos(medico_id) == 0
+
+
+def test_reserva_com_prazo_vencido_e_assumida(client, dados, novo_medico):
+    medico_id = novo_medico()
+    corpo = _corpo(dados, medico_id)
+    _reservar_chave("idem-prazo-vencido", corpo, datetime.now() - timedelta(minutes=5))
+
+    resposta = _criar(client, corpo, "idem-prazo-vencido")
+    repeticao = _criar(client, corpo, "idem-prazo-vencido")
+
+    assert resposta.status_code == 200, resposta.text
+    assert "Idempotent-Replayed" not in resposta.headers
+    assert repeticao.headers["Idempotent-Replayed"] == "true"
+    assert _total_agendamentos(medico_id) == 1
+
+
+def test_erro_libera_a_chave(client, dados, novo_medico):
+    medico_id = novo_medico()
+    corpo = _corpo(dados, medico_id)
+    corpo["data_hora"] = (datetime.now() - timedelta(days=1)).isoformat()
+
+    primeira = _criar(client, corpo, "idem-erro")
+    repeticao = _criar(client, corpo, "idem-erro")
+
+    assert primeira.status_code == 400
+    assert repeticao.status_code == 400
+    assert "Idempotent-Replayed" not in repeticao.headers
@@ -0,0 +1,86 @@
+"""
+Mapa de ocupação em bits (grade padrão de 30 minutos).
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from app.services.mapa_ocupacao import MapaOcupacao
+
+DIA = date(2030, 1, 15)
+
+
+def _momento(hora: int, minuto: int = 0, dia: date = DIA) -> datetime:
+    return datetime.combine(dia, time(hora, minuto))
+
+
+def _mapa(hora_inicio: time = time(8), hora_fim: time = time(12)) -> MapaOcupacao:
+    mapa = MapaOcupacao(medico_id=1, dia=DIA)
+    mapa.marcar_disponivel(hora_inicio, hora_fim)
+    return mapa
+
+
+def test_grade_do_dia():
+    assert MapaOcupacao.total_celulas() == 48
+    assert MapaOcupacao.celulas_da_duracao(30) == 1
+    assert MapaOcupacao.celulas_da_duracao(45) == 2
+    assert MapaOcupacao.celulas_da_duracao(0) == 1
+
+
+def test_periodo_desalinhado_comeca_na_proxima_celula():
+    mapa = _mapa(time(8, 10), time(9, 30))
+
+    assert mapa.horarios_disponiveis() == [_momento(8, 30), _momento(9)]
+
+
+def test_agendamento_desalinhado_marca_todas_as_celulas_que_toca():
+    mapa = _mapa()
+    mapa.marcar_ocupado(_momento(10, 10), _momento(10, 40))
+
+    assert mapa.ocupado == (1 << 20) | (1 << 21)
+
+
+def test_intervalo_vazio_nao_marca_nada():
+    mapa = _mapa()
+    mapa.marcar_ocupado(_momento(10), _momento(10))
+
+    assert mapa.ocupado == 0
+
+
+def test_agendamento_que_atravessa_a_meia_noite_fica_limitado_ao_dia():
+    mapa = _mapa()
+    mapa.marcar_ocupado(_momento(23, 30), _momento(0, 30, DIA + timedelta(days=1)))
+
+    assert mapa.ocupado == 1 << 47
+    assert mapa.ocupado.bit_length() <= MapaOcupacao.total_celulas()
+
+
+def test_agendamento_do_dia_anterior_ocupa_o_inicio_do_dia():
+    mapa = MapaOcupacao(medico_id=1, dia=DIA)
+    mapa.marcar_ocupado(_momento(23, 0, DIA - timedelta(days=1)), _momento(0, 30))
+
+    assert mapa.ocupado == 1
+
+
+def test_horarios_livres_consideram_a_duracao_da_consulta():
+    mapa = _mapa()
+    mapa.marcar_ocupado(_momento(10), _momento(10, 30))
+
+    livres_30 = mapa.horarios_livres(30)
+    livres_60 = mapa.horarios_livres(60)
+
+    assert _momento(9, 30) in livres_30
+    assert _momento(10) not in livres_30
+    assert _momento(10, 30) in livres_30
+    assert _momento(9, 30) not in livres_60
+    assert _momento(9) in livres_60
+    assert mapa.contar_livres(30) == 7
+
+
+def test_conflito_com_horarios_adjacentes():
+    mapa = _mapa()
+    mapa.marcar_ocupado(_momento(10), _momento(10, 30))
+
+    assert not mapa.conflita(_momento(9, 30), 30)
+    assert not mapa.conflita(_momento(10, 30), 30)
+    assert mapa.conflita(_momento(9, 45), 30)
+    assert mapa.conflita(_momento(9), 90)
@@ -0,0 +1,89 @@
+"""
+Orçamento de comandos SQL de POST /botconversa/criar-agendamento.
+
+Conta todos os comandos enviados ao banco durante a requisição e compara com
+o número medido de cada caminho. Um comando a mais aponta regressões de N+1
+ou idas extras ao banco na criação de agendamentos; um a menos é uma melhoria
+e o valor esperado deve ser atualizado junto. Os valores são fixos aqui para
+não dependerem de ORCAMENTO_CONSULTAS_CRIAR_AGENDAMENTO_BOT, que pode ser
+alterado por ambiente.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.database import manager
+
+ROTA = "/api/v1/botconversa/criar-agendamento"
+
+# Comandos medidos em cada caminho
+COMANDOS_PACIENTE_NOVO = 15
+COMANDOS_PACIENTE_EXISTENTE = 14
+COMANDOS_PACIENTE_EXISTENTE_COM_NOVO_NOME = 15
+
+
+@pytest.fixture
+def contar_comandos():
+    """Lista dos comandos SQL executados enquanto o teste roda."""
+    comandos = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+
+    event.listen(manager.engine, "before_cursor_execute", registrar)
+    yield comandos
+    event.remove(manager.engine, "before_cursor_execute", registrar)
+
+
+def _data_hora(dias: int) -> str:
+    data_hora = (datetime.now() + timedelta(days=dias)).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    )
+    return data_hora.isoformat()
+
+
+def _criar(client, contar_comandos, corpo):
+    contar_comandos.clear()
+    resposta = client.post(ROTA, json=corpo)
+    assert resposta.status_code == 200, resposta.text
+    return len(contar_comandos)
+
+
+def test_orcamento_paciente_novo(client, dados, contar_comandos):
+    corpo = {
+        "telefone": "5511988887777",
+        "nome_paciente": "Paciente Novo",
+        "medico_id": dados["medico_id"],
+        "data_hora": _data_hora(3),
+    }
+
+    total = _criar(client, contar_comandos, corpo)
+
+    assert total == COMANDOS_PACIENTE_NOVO
+
+
+def test_orcamento_paciente_existente(client, dados, contar_comandos):
+    corpo = {
+        "telefone": dados["telefone_paciente"],
+        "medico_id": dados["medico_id"],
+        "data_hora": _data_hora(4),
+    }
+
+    total = _criar(client, contar_comandos, corpo)
+
+    assert total == COMANDOS_PACIENTE_EXISTENTE
+
+
+def test_orcamento_paciente_existente_com_novo_nome(client, dados, contar_comandos):
+    corpo = {
+        "telefone": dados["telefone_paciente"],
+        "nome_paciente": "Paciente Renomeado",
+        "medico_id": dados["medico_id"],
+        "data_hora": _data_hora(5),
+    }
+
+    total = _criar(client, contar_comandos, corpo)
+
+    assert total == COMANDOS_PACIENTE_EXISTENTE_COM_NOVO_NOME
@@ -0,0 +1,91 @@
+"""
+Paginação por cursor de GET /disponibilidade/horarios.
+"""
+
+from datetime import datetime, time, timedelta
+
+from app.services.disponibilidade_service import DisponibilidadeService
+
+ROTA = "/api/v1/disponibilidade/horarios"
+
+
+def _periodo(dias: int, total_dias: int = 1) -> dict:
+    inicio = (datetime.now() + timedelta(days=dias)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    fim = inicio + timedelta(days=total_dias, seconds=-1)
+    return {"data_inicio": inicio.isoformat(), "data_fim": fim.isoformat()}
+
+
+def _buscar(client, **params):
+    resposta = client.get(ROTA, params=params)
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def test_cursor_ida_e_volta():
+    horario = {"data_hora": datetime(2030, 1, 15, 9, 30), "medico_id": 42}
+
+    cursor = DisponibilidadeService.codificar_cursor(horario)
+
+    assert DisponibilidadeService.decodificar_cursor(cursor) == (datetime(2030, 1, 15, 9, 30), 42)
+
+
+def test_cursor_invalido(client):
+    resposta = client.get(ROTA, params={"cursor": "nao-e-um-cursor"})
+
+    assert resposta.status_code == 400
+
+
+def test_paginas_cobrem_todos_os_horarios_sem_repetir(client, novo_medico):
+    # 4 horários por dia durante 2 dias, em páginas de 3
+    medico_id = novo_medico((time(8), time(10)))
+    periodo = _periodo(20, total_dias=2)
+    completo = _buscar(client, medico_id=medico_id, **periodo)["horarios_disponiveis"]
+
+    paginas = []
+    cursor = None
+    while True:
+        params = {"medico_id": medico_id, "limit": 3, **periodo}
+        if cursor:
+            params["cursor"] = cursor
+        pagina = _buscar(client, **params)
+        paginas.append(pagina["horarios_disponiveis"])
+        cursor = pagina["proximo_cursor"]
+        if not cursor:
+            break
+
+    assert [len(pagina) for pagina in paginas] == [3, 3, 2]
+    assert [h for pagina in paginas for h in pagina] == completo
+
+
+def test_pagina_exata_nao_tem_proximo_cursor(client, novo_medico):
+    medico_id = novo_medico((time(8), time(10)))
+
+    pagina = _buscar(client, medico_id=medico_id, limit=4, **_periodo(21))
+
+    assert pagina["total"] == 4
+    assert pagina["proximo_cursor"] is None
+
+
+def test_cursor_desempata_pelo_medico_no_mesmo_horario(client, novo_medico):
+    primeiro = novo_medico((time(8), time(9)))
+    segundo = novo_medico((time(8), time(9)))
+    periodo = _periodo(22)
+    oito_horas = datetime.fromisoformat(periodo["data_inicio"]).replace(hour=8)
+    cursor = DisponibilidadeService.codificar_cursor(
+        {"data_hora": oito_horas, "medico_id": primeiro}
+    )
+
+    pagina = _buscar(client, cursor=cursor, **periodo)
+
+    horarios = [
+        (datetime.fromisoformat(h["data_hora"]), h["medico_id"])
+        for h in pagina["horarios_disponiveis"]
+        if h["medico_id"] in (primeiro, segundo)
+    ]
+    assert horarios == [
+        (oito_horas, segundo),
+        (oito_horas.replace(minute=30), primeiro),
+        (oito_horas.replace(minute=30), segundo),
+    ]
@@ -0,0 +1,89 @@
+"""
+Regras de transição de status (TRANSICOES_PERMITIDAS) nas rotas dedicadas e no PUT.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+ROTA = "/api/v1/agendamentos"
+
+
+@pytest.fixture
+def agendamento(client, dados, novo_medico):
+    """Agendamento recém-criado (status agendado) em uma agenda própria."""
+    data_hora = (datetime.now() + timedelta(days=50)).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    )
+    resposta = client.post(
+        ROTA,
+        json={
+            "paciente_id": dados["paciente_id"],
+            "medico_id": novo_medico(),
+            "data_hora": data_hora.isoformat(),
+        },
+    )
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()
+
+
+def _acao(client, agendamento_id, acao):
+    if acao == "cancelar":
+        return client.post(f"{ROTA}/{agendamento_id}/cancelar", json={"motivo": "Teste"})
+    return client.post(f"{ROTA}/{agendamento_id}/{acao}")
+
+
+@pytest.mark.parametrize("acao", ["confirmar", "cancelar", "concluir", "falta"])
+def test_nenhuma_transicao_a_partir_de_cancelado(client, agendamento, acao):
+    assert _acao(client, agendamento["id"], "cancelar").status_code == 200
+
+    resposta = _acao(client, agendamento["id"], acao)
+
+    assert resposta.status_code == 409
+    assert resposta.json()["detail"].startswith("Agendamento está cancelado")
+
+
+def test_falta_apos_concluir(client, agendamento):
+    assert _acao(client, agendamento["id"], "concluir").status_code == 200
+
+    resposta = _acao(client, agendamento["id"], "falta")
+
+    assert resposta.status_code == 409
+
+
+def test_confirmar_duas_vezes(client, agendamento):
+    assert _acao(client, agendamento["id"], "confirmar").status_code == 200
+
+    assert _acao(client, agendamento["id"], "confirmar").status_code == 409
+
+
+def test_concluir_apos_confirmar(client, agendamento):
+    assert _acao(client, agendamento["id"], "confirmar").status_code == 200
+
+    resposta = _acao(client, agendamento["id"], "concluir")
+
+    assert resposta.status_code == 200
+    assert resposta.json()["status"] == "concluida"
+
+
+def test_put_aplica_as_mesmas_regras(client, agendamento):
+    url = f"{ROTA}/{agendamento['id']}"
+
+    resposta = client.put(url, json={"status": "confirmado", "observacoes": "Confirmado por telefone"})
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.json()["status"] == "confirmado"
+    assert resposta.json()["observacoes"] == "Confirmado por telefone"
+    assert resposta.json()["versao"] == agendamento["versao"] + 1
+
+    assert client.put(url, json={"status": "agendado"}).status_code == 409
+    assert client.put(url, json={"status": "confirmado"}).status_code == 409
+
+
+def test_put_com_versao_desatualizada(client, agendamento):
+    url = f"{ROTA}/{agendamento['id']}"
+    assert client.put(url, json={"observacoes": "Primeira alteração"}).status_code == 200
+
+    resposta = client.put(url, json={"status": "cancelado", "versao": agendamento["versao"]})
+
+    assert resposta.status_code == 409
+    assert client.get(url).json()["status"] == "agendado"